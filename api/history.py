@@ -0,0 +1,432 @@
+"""
+Conversation History Store
+
+Responsibilities:
+- Keep the last N messages per session (fixed-size deques, O(1) append)
+- Bound total memory with a session cap and idle-session eviction
+- Pluggable backends:
+  - memory: in-process, one store per worker
+  - sqlite: shared by every worker on a host, batched write-behind with
+    a bounded queue
+"""
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from config.settings import HistoryConfig, load_history_config
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryStore(ABC):
+    """
+    Session-keyed store of recent user messages.
+    """
+
+    @abstractmethod
+    def append(self, session_id: str, message: str) -> List[str]:
+        """
+        Record a message and return the session's history, oldest first.
+        """
+
+    @abstractmethod
+    def get(self, session_id: str) -> List[str]:
+        """
+        Return the session's history, oldest first.
+        """
+
+    @abstractmethod
+    def clear(self, session_id: str) -> None:
+        """
+        Forget one session.
+        """
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """
+        Size and activity counters.
+        """
+
+    def close(self) -> None:
+        """
+        Release resources and persist pending writes.
+        """
+
+
+class _Session:
+    __slots__ = ("messages", "last_seen")
+
+    def __init__(self, max_messages: int, now: float) -> None:
+        self.messages: Deque[str] = deque(maxlen=max_messages)
+        self.last_seen = now
+
+
+class InMemoryHistoryStore(HistoryStore):
+    """
+    Thread-safe in-process store.
+
+    Sessions are kept in last-activity order, so idle eviction and the
+    session cap only ever pop from the front.
+    """
+
+    def __init__(
+        self,
+        max_messages: int = 10,
+        max_sessions: int = 10000,
+        idle_seconds: float = 1800.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._max_messages = max_messages
+        self._max_sessions = max_sessions
+        self._idle_seconds = idle_seconds
+        self._clock = clock
+
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"appends": 0, "idle_evictions": 0, "cap_evictions": 0}
+
+    def append(self, session_id: str, message: str) -> List[str]:
+        now = self._clock()
+
+        with self._lock:
+            self._evict_idle(now)
+
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = _Session(self._max_messages, now)
+                self._sessions[session_id] = session
+                while len(self._sessions) > self._max_sessions:
+                    self._sessions.popitem(last=False)
+                    self._stats["cap_evictions"] += 1
+            else:
+                session.last_seen = now
+                self._sessions.move_to_end(session_id)
+
+            session.messages.append(message)
+            self._stats["appends"] += 1
+            return list(session.messages)
+
+    def get(self, session_id: str) -> List[str]:
+        with self._lock:
+            self._evict_idle(self._clock())
+            session = self._sessions.get(session_id)
+            return list(session.messages) if session is not None else []
+
+    def clear(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _evict_idle(self, now: float) -> None:
+        cutoff = now - self._idle_seconds
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if oldest.last_seen > cutoff:
+                break
+            self._sessions.popitem(last=False)
+            self._stats["idle_evictions"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["sessions"] = len(self._sessions)
+            stats["messages"] = sum(len(s.messages) for s in self._sessions.values())
+        stats["backend"] = "memory"
+        stats["max_sessions"] = self._max_sessions
+        return stats
+
+
+# ======================================================
+# SQLite backend
+# ======================================================
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS history (
+        session_id TEXT NOT NULL,
+        created_ns INTEGER NOT NULL,
+        message TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS history_session ON history (session_id, created_ns)",
+)
+
+# (created_ns, message)
+_Entry = Tuple[int, str]
+
+
+class SQLiteHistoryStore(HistoryStore):
+    """
+    History shared through a SQLite file (WAL mode).
+
+    Appends go to an in-memory queue that a writer thread flushes in one
+    transaction every flush_interval_ms (or sooner once flush_batch
+    messages are queued). Reads merge the database with this worker's
+    unflushed messages, so a worker always sees its own writes; other
+    workers see them after the next flush.
+
+    The queue holds at most max_pending messages. While flushes keep
+    failing, the oldest queued message is dropped to make room.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_messages: int = 10,
+        max_sessions: int = 10000,
+        idle_seconds: float = 1800.0,
+        flush_interval_ms: float = 200.0,
+        flush_batch: int = 256,
+        max_pending: int = 10000,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._path = path
+        self._max_messages = max_messages
+        self._max_sessions = max_sessions
+        self._idle_seconds = idle_seconds
+        self._flush_interval = flush_interval_ms / 1000.0
+        self._flush_batch = flush_batch
+        self._max_pending = max(max_pending, 1)
+        self._clock = clock
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        # Every write holds _flush_lock and goes through this connection
+        self._connection = self._connect(check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        with self._connection:
+            for statement in _SCHEMA:
+                self._connection.execute(statement)
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._queue: List[Tuple[str, int, str]] = []
+        self._pending: Dict[str, Deque[_Entry]] = {}
+        self._last_ns = 0
+        self._last_sweep = 0.0
+        self._stats = {
+            "appends": 0, "flushes": 0, "flushed": 0, "flush_errors": 0, "dropped": 0,
+        }
+
+        self._wakeup = threading.Event()
+        self._closed = threading.Event()
+        self._writer = threading.Thread(
+            target=self._write_loop, name="history-writer", daemon=True
+        )
+        self._writer.start()
+
+    def _connect(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            self._path, timeout=5.0, check_same_thread=check_same_thread
+        )
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _reader(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._connect()
+            self._local.connection = connection
+        return connection
+
+    def _timestamp_ns(self) -> int:
+        # Strictly increasing within the process so same-tick appends keep order
+        self._last_ns = max(int(self._clock() * 1e9), self._last_ns + 1)
+        return self._last_ns
+
+    # -------------------------
+    # Reads / writes
+    # -------------------------
+
+    def append(self, session_id: str, message: str) -> List[str]:
+        with self._lock:
+            if len(self._queue) >= self._max_pending:
+                self._drop_oldest()
+            entry = (self._timestamp_ns(), message)
+            self._queue.append((session_id, *entry))
+            self._pending.setdefault(session_id, deque()).append(entry)
+            self._stats["appends"] += 1
+            queued = len(self._queue)
+
+        if queued >= self._flush_batch:
+            self._wakeup.set()
+
+        return self.get(session_id)
+
+    def _drop_oldest(self) -> None:
+        # Caller holds _lock. The oldest queued entry is also the oldest
+        # pending entry of its session.
+        session_id, _, _ = self._queue.pop(0)
+        pending = self._pending[session_id]
+        pending.popleft()
+        if not pending:
+            del self._pending[session_id]
+        self._stats["dropped"] += 1
+        if self._stats["dropped"] == 1 or self._stats["dropped"] % 1000 == 0:
+            logger.warning(
+                "History queue full (%d); dropped %d messages",
+                self._max_pending, self._stats["dropped"],
+            )
+
+    def get(self, session_id: str) -> List[str]:
+        rows = self._reader().execute(
+            "SELECT created_ns, message FROM history WHERE session_id = ? "
+            "ORDER BY created_ns DESC LIMIT ?",
+            (session_id, self._max_messages),
+        ).fetchall()
+
+        with self._lock:
+            pending = list(self._pending.get(session_id, ()))
+
+        # A flush may commit between the two reads: de-duplicate by timestamp
+        merged = dict(rows)
+        merged.update(pending)
+        newest = sorted(merged.items())[-self._max_messages:]
+        return [message for _, message in newest]
+
+    def clear(self, session_id: str) -> None:
+        with self._flush_lock:
+            with self._lock:
+                self._pending.pop(session_id, None)
+                self._queue = [entry for entry in self._queue if entry[0] != session_id]
+
+            with self._connection:
+                self._connection.execute(
+                    "DELETE FROM history WHERE session_id = ?", (session_id,)
+                )
+
+    # -------------------------
+    # Write-behind
+    # -------------------------
+
+    def _write_loop(self) -> None:
+        while not self._closed.is_set():
+            self._wakeup.wait(self._flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except sqlite3.Error:
+                # Batch stays queued and is retried on the next tick
+                self._stats["flush_errors"] += 1
+                logger.warning("History flush failed", exc_info=True)
+
+    def flush(self) -> int:
+        """
+        Write queued messages in one transaction. Returns rows written.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._queue)
+
+            if batch:
+                self._write(batch)
+
+            with self._lock:
+                # Remove by timestamp: appends that raced the write stay
+                # queued, and a full queue may already have dropped entries
+                written = {created_ns for _, created_ns, _ in batch}
+                self._queue = [entry for entry in self._queue if entry[1] not in written]
+                for session_id in {session_id for session_id, _, _ in batch}:
+                    pending = self._pending.get(session_id)
+                    if pending is None:
+                        continue
+                    remaining = deque(entry for entry in pending if entry[0] not in written)
+                    if remaining:
+                        self._pending[session_id] = remaining
+                    else:
+                        del self._pending[session_id]
+                if batch:
+                    self._stats["flushes"] += 1
+                    self._stats["flushed"] += len(batch)
+
+            now = self._clock()
+            if now - self._last_sweep >= min(self._idle_seconds, 60.0):
+                self._last_sweep = now
+                self._sweep(now)
+
+        return len(batch)
+
+    def _write(self, batch: List[Tuple[str, int, str]]) -> None:
+        sessions = {session_id for session_id, _, _ in batch}
+
+        with self._connection as connection:
+            connection.executemany(
+                "INSERT INTO history (session_id, created_ns, message) VALUES (?, ?, ?)",
+                batch,
+            )
+            # Keep only the newest max_messages rows of each touched session
+            connection.executemany(
+                "DELETE FROM history WHERE session_id = ? AND created_ns < ("
+                "SELECT created_ns FROM history WHERE session_id = ? "
+                "ORDER BY created_ns DESC LIMIT 1 OFFSET ?)",
+                [(s, s, self._max_messages - 1) for s in sessions],
+            )
+
+    def _sweep(self, now: float) -> None:
+        cutoff_ns = int((now - self._idle_seconds) * 1e9)
+
+        with self._connection as connection:
+            connection.execute(
+                "DELETE FROM history WHERE session_id IN ("
+                "SELECT session_id FROM history GROUP BY session_id "
+                "HAVING MAX(created_ns) < ?)",
+                (cutoff_ns,),
+            )
+            connection.execute(
+                "DELETE FROM history WHERE session_id IN ("
+                "SELECT session_id FROM history GROUP BY session_id "
+                "ORDER BY MAX(created_ns) DESC LIMIT -1 OFFSET ?)",
+                (self._max_sessions,),
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = len(self._queue)
+
+        row = self._reader().execute(
+            "SELECT COUNT(DISTINCT session_id), COUNT(*) FROM history"
+        ).fetchone()
+        stats["sessions"], stats["messages"] = row
+        stats["backend"] = "sqlite"
+        stats["max_sessions"] = self._max_sessions
+        return stats
+
+    def close(self) -> None:
+        self._closed.set()
+        self._wakeup.set()
+        self._writer.join(timeout=5.0)
+        self.flush()
+        with self._flush_lock:
+            self._connection.close()
+
+
+def create_history_store(config: Optional[HistoryConfig] = None) -> HistoryStore:
+    """
+    Build the history backend named in config.
+    """
+    config = config or load_history_config()
+
+    if config.backend == "memory":
+        return InMemoryHistoryStore(
+            config.max_messages, config.max_sessions, config.idle_seconds
+        )
+    if config.backend == "sqlite":
+        return SQLiteHistoryStore(
+            config.sqlite_path,
+            config.max_messages,
+            config.max_sessions,
+            config.idle_seconds,
+            config.flush_interval_ms,
+            config.flush_batch,
+            config.max_pending,
+        )
+
+    raise ValueError(f"Unknown history backend: {config.backend}")
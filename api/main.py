@@ -4,15 +4,68 @@ FastAPI entry point for AI Support Desk.
 Phase 4 responsibilities:
 - HTTP transport only
 - Call LangGraph
-- Maintain last 10 messages
+- Maintain the last 10 messages per session
+- Serve repeated questions from the final-answer cache
+- Warm up / shut down shared tools
+- Stream node events and answer tokens over SSE
+- Expose latency histograms at /metrics and per-request Server-Timing
+- Accept knowledge-base article changes at /kb/articles
 """
 
-from typing import List
+import asyncio
+import json
+import logging
+import re
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Annotated, Any, AsyncIterator, Dict, List, Optional, Tuple
 
-from fastapi import FastAPI
-from pydantic import BaseModel
+from fastapi import FastAPI, Path, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from api.history import create_history_store
+from config.settings import load_metrics_config, load_startup_config
+from graph.answer_cache import AnswerCache, AnswerKey
+from graph.batch import chunked, process_chunk
+from graph.graph_builder import build_graph, is_fanout
+from graph.runtime import get_runtime, shutdown_runtime
+from router.router_node import Route, get_router
+from tools.metrics import CONTENT_TYPE, add_span, collect_spans, render_metrics, server_timing
+from tools.knowledge_base import CREATED, UNCHANGED, slugify
+from tools.registry import get_registry
+
+logger = logging.getLogger(__name__)
+
+# -------------------------
+# Lifecycle
+# -------------------------
+
+registry = get_registry()
+
+
+def _warmup() -> None:
+    # PREWARM selects subsystems; anything else loads on first use
+    try:
+        registry.warmup(load_startup_config().prewarm)
+    except Exception:
+        logger.exception("Tool warmup failed")
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    # Sync lookups (e.g. /chat/batch) share the asyncpg pool on this loop
+    registry.bind_loop(asyncio.get_running_loop())
+    # Load selected models in the background so the server can answer /ready
+    threading.Thread(target=_warmup, name="tool-warmup", daemon=True).start()
+    yield
+    await registry.ashutdown()
+    registry.bind_loop(None)
+    history.close()
+    shutdown_runtime()
 
-from graph.graph_builder import build_graph
 
 # -------------------------
 # App setup
@@ -21,58 +74,337 @@ from graph.graph_builder import build_graph
 app = FastAPI(
     title="AI Support Desk",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 graph = build_graph()
 
-# In-memory conversation history (Phase 4 scope)
-conversation_history: List[str] = []
+# Per-session conversation history (HISTORY_BACKEND)
+history = create_history_store()
+
+# Final answers for opted-in routes (ANSWER_CACHE_ROUTES)
+answer_cache = AnswerCache.from_config()
+
+# /metrics and Server-Timing (METRICS_ENABLED, SERVER_TIMING)
+metrics_config = load_metrics_config()
 
 
 # -------------------------
 # Request / Response models
 # -------------------------
 
+# Longest accepted chat message, in characters; bounds the history store
+MAX_MESSAGE_LENGTH = 4096
+
+
 class ChatRequest(BaseModel):
-    message: str
+    message: str = Field(max_length=MAX_MESSAGE_LENGTH)
+    session_id: Optional[str] = Field(default=None, max_length=128)
 
 
 class ChatResponse(BaseModel):
     answer: str
+    session_id: str
+    cached: bool = False
+
+
+class BatchChatRequest(BaseModel):
+    messages: List[Annotated[str, Field(max_length=MAX_MESSAGE_LENGTH)]]
+    chunk_size: int = Field(default=256, ge=1, le=4096)
+
+
+class ArticleRequest(BaseModel):
+    title: str = Field(min_length=1, max_length=256)
+    content: str = Field(min_length=1)
+
+
+# Article ids accepted on POST and PUT
+ARTICLE_ID_PATTERN = r"^[a-z0-9][a-z0-9-]{0,127}$"
+
+
+class NewArticleRequest(ArticleRequest):
+    id: Optional[str] = Field(default=None, pattern=ARTICLE_ID_PATTERN)
 
 
 # -------------------------
-# API endpoint
+# API endpoints
 # -------------------------
 
+@app.get("/ready")
+def ready() -> JSONResponse:
+    """
+    Readiness probe. Returns 200 only once all tools are warm.
+    """
+    if registry.is_ready():
+        return JSONResponse({"status": "ready"})
+
+    body = {"status": "warming_up"}
+    if registry.last_error is not None:
+        body = {"status": "error", "detail": str(registry.last_error)}
+
+    return JSONResponse(body, status_code=503)
+
+
+@app.get("/metrics")
+def metrics() -> Response:
+    """
+    Node and tool latency histograms in Prometheus text format.
+    """
+    if not metrics_config.enabled:
+        return PlainTextResponse("metrics disabled\n", status_code=404)
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
+
+
 @app.post("/chat", response_model=ChatResponse)
-def chat(request: ChatRequest) -> ChatResponse:
+async def chat(request: ChatRequest, response: Response) -> ChatResponse:
     """
     Chat endpoint.
 
-    - Accepts user message
+    - Accepts user message (and an optional session id)
     - Routes via LangGraph
-    - Returns final answer
+    - Returns final answer and the session id to send next time
+    - Answers from the cache when the route opted in (cached=true)
+    - Reports where the time went in a Server-Timing header
     """
+    started = time.perf_counter()
+    with collect_spans() as spans:
+        reply = await _chat(request)
+
+    if metrics_config.server_timing:
+        response.headers["Server-Timing"] = server_timing(spans, time.perf_counter() - started)
+    return reply
 
-    global conversation_history
 
-    # Append user message
-    conversation_history.append(request.message)
+async def _chat(request: ChatRequest) -> ChatResponse:
+    session_id = request.session_id or uuid.uuid4().hex
+    state = await _initial_state(session_id, request.message)
 
-    # Keep only last 10 messages
-    conversation_history = conversation_history[-10:]
+    answer, cache_key = _cached_answer(state)
+    if answer is not None:
+        return ChatResponse(answer=answer, session_id=session_id, cached=True)
+
+    # Invoke graph (blocking work runs on bounded executors)
+    result = await graph.ainvoke(state)
+    _remember_answer(cache_key, result)
+
+    return ChatResponse(answer=result["final_answer"], session_id=session_id)
+
+
+async def _initial_state(session_id: str, message: str) -> Dict[str, Any]:
+    # Append user message; the store keeps the last 10 per session
+    conversation_history = await get_runtime().run_io(history.append, session_id, message)
 
     # Initial graph state
-    state = {
-        "user_message": request.message,
+    return {
+        "user_message": message,
         "conversation_history": conversation_history,
         "route": None,
+        "routes": [],
         "tool_result": None,
+        "tool_results": None,
         "final_answer": None,
     }
 
-    # Invoke graph
-    result = graph.invoke(state)
 
-    return ChatResponse(answer=result["final_answer"])
+def _cached_answer(state: Dict[str, Any]) -> Tuple[Optional[str], Optional[AnswerKey]]:
+    started = time.perf_counter()
+    try:
+        return _lookup_answer(state)
+    finally:
+        add_span("answer_cache", time.perf_counter() - started)
+
+
+def _lookup_answer(state: Dict[str, Any]) -> Tuple[Optional[str], Optional[AnswerKey]]:
+    # Routing is a single regex pass, so it is cheap to do ahead of the graph
+    matches = get_router().matches(state["user_message"])
+    if is_fanout([route.value for route in matches]):
+        # Merged multi-source answers depend on several data versions
+        return None, None
+    route = matches[0] if matches else Route.LLM
+    return answer_cache.lookup(route.value, state["user_message"])
+
+
+def _remember_answer(cache_key: Optional[AnswerKey], result: Dict[str, Any]) -> None:
+    if cache_key is not None and result.get("route") == cache_key[0] and result.get("final_answer"):
+        answer_cache.store(cache_key, result["final_answer"])
+
+
+def _sse(event: str, data: Dict[str, Any]) -> bytes:
+    payload = json.dumps(data, ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n".encode("utf-8")
+
+
+async def _stream_chat(session_id: str, message: str) -> AsyncIterator[bytes]:
+    started = time.perf_counter()
+    with collect_spans() as spans:
+        state = await _initial_state(session_id, message)
+        answer, cache_key = _cached_answer(state)
+        cached = answer is not None
+        streamed_tokens = False
+
+        if cached:
+            yield _sse("node", {"node": "answer_cache", "route": cache_key[0]})
+        else:
+            result: Dict[str, Any] = {}
+            try:
+                async for mode, chunk in graph.astream(state, stream_mode=["updates", "custom"]):
+                    if mode == "custom" and "token" in chunk:
+                        streamed_tokens = True
+                        yield _sse("token", {"text": chunk["token"]})
+                        continue
+
+                    if mode == "updates":
+                        for node, update in chunk.items():
+                            update = update or {}
+                            yield _sse("node", {"node": node, "route": update.get("route")})
+                            result.update(update)
+            except Exception as exc:
+                logger.exception("Streaming chat failed")
+                yield _sse("error", {"detail": str(exc)})
+                return
+
+            answer = result.get("final_answer")
+            _remember_answer(cache_key, result)
+
+    # Deterministic answers arrive whole: send them as word chunks at once
+    if not streamed_tokens and answer:
+        for piece in re.findall(r"\S+\s*", answer):
+            yield _sse("token", {"text": piece})
+
+    done = {"answer": answer, "session_id": session_id, "cached": cached}
+    if metrics_config.server_timing:
+        # Headers went out before the graph ran, so timings ride on "done"
+        done["server_timing"] = server_timing(spans, time.perf_counter() - started)
+    yield _sse("done", done)
+
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest) -> StreamingResponse:
+    """
+    Streaming chat endpoint (server-sent events).
+
+    Events:
+    - node: a graph node finished ({"node", "route"})
+    - token: answer text as it is produced ({"text"})
+    - done: full answer ({"answer", "session_id", "cached"}, plus
+      "server_timing" when SERVER_TIMING is on)
+    - error: graph failure ({"detail"})
+    """
+    session_id = request.session_id or uuid.uuid4().hex
+    return StreamingResponse(
+        _stream_chat(session_id, request.message),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+            "X-Session-Id": session_id,
+        },
+    )
+
+
+async def _stream_batch(request: BatchChatRequest) -> AsyncIterator[bytes]:
+    runtime = get_runtime()
+    router = get_router()
+    offset = 0
+
+    for chunk in chunked(request.messages, request.chunk_size):
+        answers = await runtime.run_cpu(process_chunk, chunk, router)
+        for position, answer in enumerate(answers):
+            line = {"index": offset + position, **answer}
+            yield (json.dumps(line, ensure_ascii=False) + "\n").encode("utf-8")
+        offset += len(chunk)
+
+
+@app.post("/chat/batch")
+async def chat_batch(request: BatchChatRequest) -> StreamingResponse:
+    """
+    Bulk chat endpoint.
+
+    - Routes every message up front
+    - Runs tool work in bulk per route and chunk
+    - Streams one NDJSON line per message, in input order
+    - Does not touch conversation history
+    """
+    return StreamingResponse(
+        _stream_batch(request),
+        media_type="application/x-ndjson",
+    )
+
+
+# -------------------------
+# Knowledge base ingestion
+# -------------------------
+
+def _accepted(article_id: str, status: str, revision: int, status_code: int = 202) -> JSONResponse:
+    # 202: stored now, searchable once the background re-index finishes
+    if status_code == 202:
+        registry.knowledge_base().schedule()
+    return JSONResponse(
+        {"id": article_id, "status": status, "revision": revision},
+        status_code=status_code,
+    )
+
+
+@app.get("/kb/articles")
+def list_articles() -> JSONResponse:
+    revision, articles = registry.knowledge_base().store.snapshot()
+    return JSONResponse({"revision": revision, "articles": articles})
+
+
+@app.get("/kb/articles/{article_id}")
+def get_article(article_id: str) -> JSONResponse:
+    article = registry.knowledge_base().store.get(article_id)
+    if article is None:
+        return JSONResponse({"detail": "Article not found"}, status_code=404)
+    return JSONResponse(article)
+
+
+@app.post("/kb/articles")
+def create_article(request: NewArticleRequest) -> JSONResponse:
+    """
+    Add an article. The id defaults to a slug of the title.
+    """
+    article_id = request.id or slugify(request.title)
+    if not article_id:
+        return JSONResponse({"detail": "Title has no characters usable as an id"}, status_code=422)
+
+    revision = registry.knowledge_base().store.create(article_id, request.title, request.content)
+    if revision is None:
+        return JSONResponse({"detail": f"Article {article_id} already exists"}, status_code=409)
+    return _accepted(article_id, CREATED, revision)
+
+
+@app.put("/kb/articles/{article_id}")
+def put_article(
+    request: ArticleRequest,
+    article_id: str = Path(pattern=ARTICLE_ID_PATTERN),
+) -> JSONResponse:
+    """
+    Create or replace an article. Unchanged content returns 200 and
+    triggers no re-index.
+    """
+    status, revision = registry.knowledge_base().store.put(
+        article_id, request.title, request.content
+    )
+    return _accepted(article_id, status, revision, 200 if status == UNCHANGED else 202)
+
+
+@app.delete("/kb/articles/{article_id}")
+def delete_article(article_id: str) -> JSONResponse:
+    revision = registry.knowledge_base().store.delete(article_id)
+    if revision is None:
+        return JSONResponse({"detail": "Article not found"}, status_code=404)
+    return _accepted(article_id, "deleted", revision)
+
+
+@app.get("/kb/status")
+def knowledge_base_status() -> JSONResponse:
+    """
+    Store revision vs. the revision the live index was built from, plus
+    the live index version and any older versions still draining.
+    """
+    body = registry.knowledge_base().status()
+    vector = registry.peek("vector")
+    if vector is not None:
+        body["index"] = vector.index_stats()
+    return JSONResponse(body)
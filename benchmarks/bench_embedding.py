@@ -0,0 +1,167 @@
+"""
+Embedding Backend Benchmark
+
+Purpose:
+- Compare the torch SentenceTransformer, ONNX Runtime fp32 and ONNX
+  Runtime int8 encoders on one model
+- Report load time (imports included), single-query latency, batch
+  throughput and peak RSS, each backend in a fresh process
+
+Usage:
+    python benchmarks/bench_embedding.py --model models/all-MiniLM-L6-v2
+    python benchmarks/bench_embedding.py --model all-MiniLM-L6-v2 --threads 1
+    python benchmarks/bench_embedding.py --tiny      # offline smoke run
+
+--tiny uses a random 2-layer stand-in encoder: it checks the pipeline,
+its numbers say nothing about all-MiniLM-L6-v2. ONNX files are exported
+under --onnx-dir before the measured runs.
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+STARTED = time.perf_counter()
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BACKENDS = {
+    "torch": ("torch", False),
+    "onnx": ("onnx", False),
+    "onnx-int8": ("onnx", True),
+}
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss survives fork + exec (it would report the parent's peak);
+    # VmHWM belongs to this process image only
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_worker(args) -> None:
+    """
+    Measure one backend in this (fresh) process and print JSON.
+    """
+    from benchmarks.standins import synthetic_articles, synthetic_queries
+    from config.settings import EmbeddingModelConfig
+    from tools.embedding_model import load_embedding_model
+
+    backend, quantize = BACKENDS[args.worker]
+    if backend == "torch" and args.threads:
+        import torch
+
+        torch.set_num_threads(args.threads)
+    model = load_embedding_model(
+        args.model, EmbeddingModelConfig(backend, args.onnx_dir, quantize, args.threads)
+    )
+    load_seconds = time.perf_counter() - STARTED
+    load_rss = _peak_rss_mb()
+
+    queries = synthetic_queries(args.queries)
+    documents = [article["content"] for article in synthetic_articles(args.documents)]
+    for query in queries[:10]:
+        model.encode(query, normalize_embeddings=True)
+
+    samples = []
+    for query in queries:
+        started = time.perf_counter()
+        model.encode(query, normalize_embeddings=True)
+        samples.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    model.encode(documents, batch_size=args.batch_size, normalize_embeddings=True)
+    throughput = len(documents) / (time.perf_counter() - started)
+
+    quantiles = statistics.quantiles(samples, n=100)
+    print(json.dumps({
+        "load_s": load_seconds,
+        "load_rss_mb": load_rss,
+        "p50_ms": quantiles[49],
+        "p95_ms": quantiles[94],
+        "texts_per_s": throughput,
+        "peak_rss_mb": _peak_rss_mb(),
+        "torch_imported": "torch" in sys.modules,
+    }))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--model", help="SentenceTransformer name or local directory")
+    parser.add_argument("--tiny", action="store_true", help="Use a random stand-in encoder")
+    parser.add_argument("--backends", nargs="+", choices=list(BACKENDS), default=list(BACKENDS))
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--documents", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=0, help="0 = library default")
+    parser.add_argument("--work-dir", default=os.path.join(tempfile.gettempdir(), "bench_embedding"))
+    parser.add_argument("--onnx-dir")
+    parser.add_argument("--worker", choices=list(BACKENDS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    if args.tiny:
+        from benchmarks.standins import build_tiny_sentence_transformer, synthetic_articles
+
+        args.model = build_tiny_sentence_transformer(
+            os.path.join(args.work_dir, "tiny-encoder"),
+            [article["content"] for article in synthetic_articles(200)],
+        )
+    if not args.model:
+        parser.error("pass --model (a local copy of all-MiniLM-L6-v2) or --tiny")
+    args.onnx_dir = args.onnx_dir or os.path.join(args.work_dir, "onnx")
+
+    # Export outside the measured processes
+    from config.settings import EmbeddingModelConfig
+    from tools.embedding_model import load_embedding_model
+
+    for name in args.backends:
+        backend, quantize = BACKENDS[name]
+        if backend == "onnx":
+            config = EmbeddingModelConfig(backend, args.onnx_dir, quantize, threads=1)
+            load_embedding_model(args.model, config)
+
+    print(
+        f"{args.model}: {args.queries} single queries, {args.documents} documents "
+        f"in batches of {args.batch_size}, threads={args.threads or 'default'}"
+    )
+    print(
+        f"{'backend':<11}{'load s':>8}{'load MB':>9}{'p50 ms':>9}{'p95 ms':>9}"
+        f"{'texts/s':>10}{'peak MB':>9}{'torch':>7}"
+    )
+    for name in args.backends:
+        command = [
+            sys.executable, os.path.abspath(__file__), "--worker", name,
+            "--model", args.model, "--onnx-dir", args.onnx_dir,
+            "--queries", str(args.queries), "--documents", str(args.documents),
+            "--batch-size", str(args.batch_size), "--threads", str(args.threads),
+        ]
+        output = subprocess.run(command, capture_output=True, text=True)
+        if output.returncode != 0:
+            print(f"{name:<11}failed: {output.stderr.strip().splitlines()[-1]}")
+            continue
+        row = json.loads(output.stdout.strip().splitlines()[-1])
+        print(
+            f"{name:<11}{row['load_s']:>8.2f}{row['load_rss_mb']:>9.0f}{row['p50_ms']:>9.2f}"
+            f"{row['p95_ms']:>9.2f}{row['texts_per_s']:>10.0f}{row['peak_rss_mb']:>9.0f}"
+            f"{'yes' if row['torch_imported'] else 'no':>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Hybrid Search Benchmark
+
+Purpose:
+- Measure how often the BM25 fast path answers a query without running
+  the encoder, and the latency that saves
+- Compare vector-only, hybrid (fusion only) and hybrid + fast path on
+  the same queries: latency, encoder calls and hit@k
+
+Usage:
+    python benchmarks/bench_hybrid.py
+    python benchmarks/bench_hybrid.py --articles 100000 --fusion weighted
+    python benchmarks/bench_hybrid.py --model models/all-MiniLM-L6-v2
+
+Half of the queries name an article by exact terms (its title, or
+"article <n>"); the other half are generic how-to questions that match
+many articles. The query-embedding cache is disabled so every query
+that reaches the encoder pays for it. The hashing encoder is far
+cheaper than a transformer, so pass --model for realistic savings.
+"""
+
+import argparse
+from dataclasses import replace
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.standins import load_embedder, synthetic_articles, synthetic_queries  # noqa: E402
+from config.settings import load_search_config  # noqa: E402
+from tools.embedding_cache import EmbeddingCache  # noqa: E402
+from tools.vector_tool import VectorSearchTool  # noqa: E402
+
+
+class CountingEncoder:
+    """
+    Wraps an encoder and counts the texts it encodes.
+    """
+
+    def __init__(self, model: Any) -> None:
+        self._model = model
+        self.encoded = 0
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self._model.get_sentence_embedding_dimension()
+
+    def encode(self, sentences: Any, **kwargs: Any) -> Any:
+        self.encoded += 1 if isinstance(sentences, str) else len(sentences)
+        return self._model.encode(sentences, **kwargs)
+
+
+def exact_queries(articles: List[Dict[str, str]], count: int, seed: int = 2) -> List[Tuple[str, int]]:
+    """
+    (query, expected row) pairs that name one article by its own terms.
+    """
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        row = rng.randrange(len(articles))
+        if rng.random() < 0.5:
+            queries.append((articles[row]["title"], row))
+        else:
+            queries.append((f"article {row}", row))
+    return queries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--articles", type=int, default=10_000)
+    parser.add_argument("--queries", type=int, default=400)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--fusion", choices=["rrf", "weighted"], default="rrf")
+    parser.add_argument("--model", help="Local SentenceTransformer directory")
+    parser.add_argument("--work-dir", default=os.path.join(tempfile.gettempdir(), "bench_hybrid"))
+    args = parser.parse_args()
+
+    articles = synthetic_articles(args.articles)
+    exact = exact_queries(articles, args.queries // 2)
+    generic = synthetic_queries(args.queries - len(exact))
+    workload = [(query, row) for query, row in exact] + [(query, None) for query in generic]
+    random.Random(3).shuffle(workload)
+
+    encoder = CountingEncoder(load_embedder(args.model))
+    model_name = os.path.basename(args.model.rstrip("/")) if args.model else "hashing"
+    base = load_search_config()
+    modes = {
+        "vector": replace(base, mode="vector"),
+        "hybrid": replace(base, mode="hybrid", fusion=args.fusion, fast_path=False),
+        "fast-path": replace(base, mode="hybrid", fusion=args.fusion, fast_path=True),
+    }
+
+    print(
+        f"{args.articles:,} articles, {len(workload)} queries "
+        f"({len(exact)} exact-term), top_k={args.top_k}, fusion={args.fusion}"
+    )
+    print(
+        f"{'mode':<11}{'skip enc':>10}{'encodes':>9}{'hit@k':>8}"
+        f"{'p50 ms':>9}{'p95 ms':>9}{'mean ms':>9}{'exact ms':>10}"
+    )
+
+    means: Dict[str, float] = {}
+    for name, config in modes.items():
+        tool = VectorSearchTool(
+            query_cache=EmbeddingCache(model_name, capacity=0),
+            model=encoder,
+            model_name=model_name,
+            articles=articles,
+            index_dir=os.path.join(args.work_dir, str(args.articles)),
+            search_config=config,
+        )
+        try:
+            # Warm up outside the measurement
+            for query, _ in workload[:20]:
+                tool.search(query, args.top_k)
+            encoder.encoded = 0
+            skipped_before = tool.search_stats()["fast_path"]
+
+            samples: List[float] = []
+            exact_samples: List[float] = []
+            hits = 0
+            for query, row in workload:
+                started = time.perf_counter()
+                documents = tool.search(query, args.top_k)["documents"]
+                elapsed = (time.perf_counter() - started) * 1000
+                samples.append(elapsed)
+                if row is not None:
+                    exact_samples.append(elapsed)
+                    hits += any(doc["content"] == articles[row]["content"] for doc in documents)
+
+            skipped = tool.search_stats()["fast_path"] - skipped_before
+        finally:
+            tool.close()
+
+        quantiles = statistics.quantiles(samples, n=100)
+        means[name] = statistics.mean(samples)
+        print(
+            f"{name:<11}{skipped / len(workload):>10.1%}{encoder.encoded:>9}"
+            f"{hits / len(exact):>8.3f}{quantiles[49]:>9.3f}{quantiles[94]:>9.3f}"
+            f"{means[name]:>9.3f}{statistics.mean(exact_samples):>10.3f}"
+        )
+
+    saved = means["vector"] - means["fast-path"]
+    print(
+        f"\nFast path vs vector-only: {saved:+.3f} ms/query saved "
+        f"({saved / means['vector']:.1%} of mean latency)"
+    )
+
+
+if __name__ == "__main__":
+    main()
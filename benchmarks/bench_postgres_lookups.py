@@ -0,0 +1,230 @@
+"""
+Postgres Lookup Benchmark
+
+Purpose:
+- Measure the three postgres_node query shapes at production volumes
+- Compare ad-hoc SQL against the prepared QUERY_CATALOG statements
+- Compare with and without the lookup indexes
+- Compare the PostgreSQL server with the in-process SQLite backend
+
+Usage:
+    python benchmarks/bench_postgres_lookups.py
+    python benchmarks/bench_postgres_lookups.py --customers 100000 --tickets 1000000
+    python benchmarks/bench_postgres_lookups.py --backends postgres sqlite
+    python benchmarks/bench_postgres_lookups.py --backends sqlite   # offline
+
+Postgres data is generated into a separate "bench" schema of the
+configured database (POSTGRES_* in .env) and dropped afterwards unless
+--keep is set. SQLite data is generated into a file under --work-dir and
+reused by later runs.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List
+
+import psycopg2
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.standins import build_sqlite_dataset  # noqa: E402
+from config.settings import load_postgres_config  # noqa: E402
+from tools.postgres_tool import QUERY_CATALOG  # noqa: E402
+from tools.relational import SQLiteBackend  # noqa: E402
+
+SCHEMA = "bench"
+
+AD_HOC = {
+    "ticket_by_id": "SELECT id, issue, status FROM tickets WHERE id = %s",
+    "customer_city_by_id": "SELECT name, city FROM customers WHERE id = %s",
+    "tickets_by_customer_name": (
+        "SELECT t.id, t.issue, t.status "
+        "FROM tickets t "
+        "JOIN customers c ON t.customer_id = c.id "
+        "WHERE lower(c.name) = lower(%s)"
+    ),
+}
+
+INDEXES = {
+    "idx_tickets_customer_id": "CREATE INDEX idx_tickets_customer_id ON tickets (customer_id)",
+    "idx_customers_name_lower": "CREATE INDEX idx_customers_name_lower ON customers (lower(name))",
+}
+
+
+def _connect():
+    config = load_postgres_config()
+    connection = psycopg2.connect(
+        host=config.host,
+        port=config.port,
+        dbname=config.database,
+        user=config.user,
+        password=config.password,
+        options=f"-c search_path={SCHEMA}",
+    )
+    connection.autocommit = True
+    return connection
+
+
+def load_dataset(cursor, customers: int, tickets: int) -> None:
+    print(f"▶ Loading {customers:,} customers / {tickets:,} tickets...")
+    started = time.perf_counter()
+
+    cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    cursor.execute(f"CREATE SCHEMA {SCHEMA}")
+    cursor.execute(
+        "CREATE TABLE customers (id INTEGER PRIMARY KEY, name TEXT NOT NULL, city TEXT NOT NULL)"
+    )
+    cursor.execute(
+        "CREATE TABLE tickets ("
+        "id INTEGER PRIMARY KEY, customer_id INTEGER REFERENCES customers(id), "
+        "issue TEXT NOT NULL, status TEXT NOT NULL)"
+    )
+    cursor.execute(
+        "INSERT INTO customers "
+        "SELECT g, 'Customer ' || g, 'City ' || (g %% 500) "
+        "FROM generate_series(1, %s) g",
+        (customers,),
+    )
+    cursor.execute(
+        "INSERT INTO tickets "
+        "SELECT g, 1 + (g %% %s), 'Issue ' || g, "
+        "CASE WHEN g %% 3 = 0 THEN 'close' ELSE 'open' END "
+        "FROM generate_series(1, %s) g",
+        (customers, tickets),
+    )
+    cursor.execute("ANALYZE")
+
+    print(f"✔ Loaded in {time.perf_counter() - started:.1f}s")
+
+
+def _params(name: str, customers: int, tickets: int) -> tuple:
+    if name == "ticket_by_id":
+        return (random.randint(1, tickets),)
+    if name == "customer_city_by_id":
+        return (random.randint(1, customers),)
+    return (f"customer {random.randint(1, customers)}",)
+
+
+def _time(run: Callable[[], None], iterations: int) -> Dict[str, float]:
+    samples: List[float] = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - started) * 1000)
+
+    quantiles = statistics.quantiles(samples, n=100)
+    return {"p50": quantiles[49], "p95": quantiles[94], "p99": quantiles[98]}
+
+
+def bench(cursor, customers: int, tickets: int, iterations: int, label: str) -> None:
+    print(f"\n--- {label} ---")
+    print(f"{'query':<28}{'mode':<10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+
+    for name, (types, body) in QUERY_CATALOG.items():
+        cursor.execute("DEALLOCATE ALL")
+        cursor.execute(f"PREPARE {name} ({', '.join(types)}) AS {body}")
+
+        def ad_hoc() -> None:
+            cursor.execute(AD_HOC[name], _params(name, customers, tickets))
+            cursor.fetchall()
+
+        def prepared() -> None:
+            cursor.execute(f"EXECUTE {name} (%s)", _params(name, customers, tickets))
+            cursor.fetchall()
+
+        for mode, run in (("ad-hoc", ad_hoc), ("prepared", prepared)):
+            result = _time(run, iterations)
+            print(
+                f"{name:<28}{mode:<10}"
+                f"{result['p50']:>10.3f}{result['p95']:>10.3f}{result['p99']:>10.3f}"
+            )
+
+
+def bench_sqlite(backend: SQLiteBackend, customers: int, tickets: int, iterations: int) -> None:
+    print("\n--- SQLite (in-process, with lookup indexes) ---")
+    print(f"{'query':<28}{'mode':<10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+
+    for name in AD_HOC:
+        def ad_hoc() -> None:
+            backend.execute(AD_HOC[name], _params(name, customers, tickets), None)
+
+        def catalog() -> None:
+            backend.execute_named(name, _params(name, customers, tickets), None)
+
+        for mode, run in (("ad-hoc", ad_hoc), ("catalog", catalog)):
+            result = _time(run, iterations)
+            print(
+                f"{name:<28}{mode:<10}"
+                f"{result['p50']:>10.3f}{result['p95']:>10.3f}{result['p99']:>10.3f}"
+            )
+
+
+def run_postgres(args) -> None:
+    connection = _connect()
+    try:
+        with connection.cursor() as cursor:
+            load_dataset(cursor, args.customers, args.tickets)
+
+            # Name lookups without indexes are full scans; keep them short
+            bench(
+                cursor,
+                args.customers,
+                args.tickets,
+                max(args.iterations // 20, 5),
+                "Without lookup indexes",
+            )
+
+            for statement in INDEXES.values():
+                cursor.execute(statement)
+            cursor.execute("ANALYZE")
+
+            bench(cursor, args.customers, args.tickets, args.iterations, "With lookup indexes")
+
+            if not args.keep:
+                cursor.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+    finally:
+        connection.close()
+
+
+def run_sqlite(args) -> None:
+    print(f"▶ Preparing {args.customers:,} customers / {args.tickets:,} tickets in SQLite...")
+    started = time.perf_counter()
+    path = build_sqlite_dataset(
+        os.path.join(args.work_dir, "db", f"supportdesk-{args.customers}-{args.tickets}.sqlite"),
+        args.customers,
+        args.tickets,
+    )
+    print(f"✔ Ready in {time.perf_counter() - started:.1f}s ({path})")
+
+    backend = SQLiteBackend(QUERY_CATALOG, path)
+    try:
+        bench_sqlite(backend, args.customers, args.tickets, args.iterations)
+    finally:
+        backend.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--customers", type=int, default=1_000_000)
+    parser.add_argument("--tickets", type=int, default=10_000_000)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--keep", action="store_true", help="Keep the bench schema")
+    parser.add_argument(
+        "--backends", nargs="+", choices=("postgres", "sqlite"), default=["postgres"]
+    )
+    parser.add_argument("--work-dir", default=os.path.join(ROOT, ".cache", "bench"))
+    args = parser.parse_args()
+
+    if "postgres" in args.backends:
+        run_postgres(args)
+    if "sqlite" in args.backends:
+        run_sqlite(args)
+
+
+if __name__ == "__main__":
+    main()
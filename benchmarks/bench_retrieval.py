@@ -0,0 +1,150 @@
+"""
+Retrieval Backend Benchmark
+
+Purpose:
+- Compare recall@k, query latency and vector memory of the retrieval
+  backends, including exact search over float16 / int8 storage
+- Use synthetic normalized vectors so no model download is needed
+
+Usage:
+    python benchmarks/bench_retrieval.py
+    python benchmarks/bench_retrieval.py --articles 1000000 --backends exact ivf hnsw
+    python benchmarks/bench_retrieval.py --backends exact exact-fp16 exact-int8 exact-int8-rerank
+
+Queries are noisy copies of random articles; ground truth is the exact
+top-k. Backends whose optional dependency is missing are skipped.
+"MB" is the vector data each engine keeps resident ("-" when the
+library does not report it); "*-rerank" variants re-score the best
+top_k * --rerank rows in fp32.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from typing import List
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.retrieval import (  # noqa: E402
+    ChromaBackend,
+    ExactBackend,
+    HNSWBackend,
+    IVFBackend,
+    RetrievalBackend,
+)
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    return (matrix / np.linalg.norm(matrix, axis=1, keepdims=True)).astype(np.float32)
+
+
+def synthetic_corpus(articles: int, dimension: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    # Clustered data behaves more like real embeddings than pure noise
+    centers = rng.standard_normal((max(articles // 100, 1), dimension))
+    labels = rng.integers(0, centers.shape[0], articles)
+    return _normalize(centers[labels] + 0.5 * rng.standard_normal((articles, dimension)))
+
+
+def _chroma_backend(embeddings: np.ndarray) -> RetrievalBackend:
+    import chromadb
+    from chromadb.config import Settings
+
+    client = chromadb.Client(Settings(anonymized_telemetry=False, is_persistent=False))
+    collection = client.create_collection("bench", metadata={"hnsw:space": "cosine"})
+    for start in range(0, embeddings.shape[0], 5000):
+        block = embeddings[start:start + 5000]
+        collection.add(
+            ids=[f"doc_{i}" for i in range(start, start + len(block))],
+            embeddings=block.tolist(),
+        )
+    return ChromaBackend(collection)
+
+
+COMPACT = {
+    "exact-fp16": ("float16", False),
+    "exact-fp16-rerank": ("float16", True),
+    "exact-int8": ("int8", False),
+    "exact-int8-rerank": ("int8", True),
+}
+
+
+def make_backend(name: str, embeddings: np.ndarray, rerank: int = 4) -> RetrievalBackend:
+    if name == "exact":
+        return ExactBackend()
+    if name in COMPACT:
+        storage, reranked = COMPACT[name]
+        return ExactBackend(storage, rerank if reranked else 0)
+    if name == "ivf":
+        return IVFBackend(nlist=int(np.sqrt(embeddings.shape[0])) or 1, nprobe=16)
+    if name == "hnsw":
+        return HNSWBackend()
+    if name == "chroma":
+        return _chroma_backend(embeddings)
+    raise ValueError(name)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--articles", type=int, default=100_000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument(
+        "--backends", nargs="+",
+        default=["exact", "exact-fp16", "exact-int8", "exact-int8-rerank", "ivf", "hnsw", "chroma"],
+    )
+    parser.add_argument("--rerank", type=int, default=4, help="Shortlist = top_k * rerank")
+    args = parser.parse_args()
+
+    embeddings = synthetic_corpus(args.articles, args.dimension)
+    rng = np.random.default_rng(1)
+    picks = rng.integers(0, args.articles, args.queries)
+    noise = 0.3 * rng.standard_normal((args.queries, args.dimension))
+    queries = _normalize(embeddings[picks] + noise)
+
+    exact = ExactBackend()
+    exact.build(embeddings)
+    truth = [set(exact.query(q, args.top_k)[0].tolist()) for q in queries]
+
+    print(f"{args.articles:,} articles x {args.dimension} dims, top_k={args.top_k}")
+    print(
+        f"{'backend':<19}{'build s':>9}{'MB':>8}{'recall':>9}"
+        f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'qps':>8}"
+    )
+
+    for name in args.backends:
+        try:
+            started = time.perf_counter()
+            backend = make_backend(name, embeddings, args.rerank)
+            backend.build(embeddings)
+            build_seconds = time.perf_counter() - started
+        except ImportError as exc:
+            print(f"{name:<19}skipped ({exc})")
+            continue
+
+        samples: List[float] = []
+        hits = 0
+        for query, expected in zip(queries, truth):
+            started = time.perf_counter()
+            indices, _ = backend.query(query, args.top_k)
+            samples.append((time.perf_counter() - started) * 1000)
+            hits += len(expected & set(indices.tolist()))
+
+        quantiles = statistics.quantiles(samples, n=100)
+        recall = hits / (len(truth) * args.top_k)
+        qps = 1000 / statistics.mean(samples)
+        megabytes = backend.memory_bytes() / 2**20
+        print(
+            f"{name:<19}{build_seconds:>9.2f}{f'{megabytes:.0f}' if megabytes else '-':>8}"
+            f"{recall:>9.3f}{quantiles[49]:>9.3f}{quantiles[94]:>9.3f}{quantiles[98]:>9.3f}"
+            f"{qps:>8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
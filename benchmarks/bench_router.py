@@ -0,0 +1,97 @@
+"""
+Router Throughput Benchmark
+
+Purpose:
+- Compare the compiled single-pass router with per-table substring scans
+- Grow the keyword tables to see how each approach scales
+
+Usage:
+    python benchmarks/bench_router.py
+    python benchmarks/bench_router.py --extra-keywords 0 100 500 --messages 50000
+
+Extra keywords are random lowercase words added to every table on top of
+the configured phrases. Both routers must agree on every message.
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+from typing import Callable, List, Sequence, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from router.router_node import Route, RouterNode, load_keyword_tables  # noqa: E402
+
+SAMPLE_MESSAGES = [
+    "Show tickets for customer John",
+    "What is the status of ticket 2?",
+    "How do I reset my password?",
+    "Explain the refund policy",
+    "What is the weather today?",
+    "Bitcoin price right now",
+    "Hello, how are you?",
+    "Can you write me a short poem about the ocean at night?",
+]
+
+
+def scan_router(tables: Sequence[Tuple[Route, Sequence[str]]]) -> Callable[[str], Route]:
+    """
+    The pre-compilation router: one any(...) substring scan per table.
+    """
+    def route(message: str) -> Route:
+        text = message.lower()
+        for table_route, phrases in tables:
+            if any(phrase in text for phrase in phrases):
+                return table_route
+        return Route.LLM
+
+    return route
+
+
+def grow_tables(tables, extra: int, rng: random.Random):
+    def word() -> str:
+        return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(6, 12)))
+
+    return [(route, list(phrases) + [word() for _ in range(extra)]) for route, phrases in tables]
+
+
+def messages_per_second(route_many: Callable[[List[str]], List[Route]], messages: List[str]) -> float:
+    started = time.perf_counter()
+    route_many(messages)
+    return len(messages) / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=20_000)
+    parser.add_argument("--extra-keywords", type=int, nargs="+", default=[0, 100, 300, 1000])
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    messages = [rng.choice(SAMPLE_MESSAGES) for _ in range(args.messages)]
+    base_tables = load_keyword_tables()
+
+    print(f"{args.messages:,} messages")
+    print(f"{'keywords':>10}{'scan msg/s':>15}{'compiled msg/s':>17}{'speedup':>10}")
+
+    for extra in args.extra_keywords:
+        tables = grow_tables(base_tables, extra, rng)
+        keywords = sum(len(phrases) for _, phrases in tables)
+
+        scan = scan_router(tables)
+        compiled = RouterNode(tables)
+        assert [scan(m) for m in SAMPLE_MESSAGES] == compiled.route_many(SAMPLE_MESSAGES)
+
+        scan_rate = messages_per_second(lambda batch: [scan(m) for m in batch], messages)
+        compiled_rate = messages_per_second(compiled.route_many, messages)
+        print(
+            f"{keywords:>10}{scan_rate:>15,.0f}{compiled_rate:>17,.0f}"
+            f"{compiled_rate / scan_rate:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+"""
+Benchmark Suite
+
+Purpose:
+- Latency (p50 / p95 / p99) and throughput of RouterNode.route,
+  VectorSearchTool.search at several knowledge-base sizes, each
+  postgres_node query shape, graph.invoke and HTTP POST /chat
+- Run fully offline: the SQLite relational backend replaces Postgres and
+  a hashing encoder (or a local SentenceTransformer directory) replaces
+  the downloaded embedding model
+- Save results as a JSON baseline and fail when a later run regresses
+
+Usage:
+    python benchmarks/bench_suite.py --save              # record a baseline
+    python benchmarks/bench_suite.py --compare           # exit 1 on regression
+    python benchmarks/bench_suite.py --quick --compare   # CI-sized run
+    python benchmarks/bench_suite.py --only router vector --articles 3 10000
+    python benchmarks/bench_suite.py --model models/all-MiniLM-L6-v2
+
+Baselines are machine specific: record and compare on the same box.
+Article indexes are cached under --work-dir, so only the first run at a
+size pays for encoding; the generated SQLite database likewise.
+"""
+
+import argparse
+from datetime import datetime, timezone
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Measure the uncached paths; set before the app reads its config
+os.environ["PREWARM"] = "none"
+os.environ["ANSWER_CACHE_ROUTES"] = ""
+os.environ["HISTORY_BACKEND"] = "memory"
+os.environ["LLM_AVAILABLE"] = "false"
+
+from benchmarks.standins import (  # noqa: E402
+    build_sqlite_dataset,
+    load_embedder,
+    synthetic_articles,
+    synthetic_queries,
+)
+from data.vector_articles import ARTICLES  # noqa: E402
+from graph.runtime import get_runtime  # noqa: E402
+from router.router_node import get_router  # noqa: E402
+from tools.async_postgres_tool import ExecutorPostgresTool  # noqa: E402
+from tools.embedding_cache import EmbeddingCache  # noqa: E402
+from tools.embedding_model import model_key  # noqa: E402
+from tools.postgres_tool import QUERY_CATALOG, PostgresTool  # noqa: E402
+from tools.registry import get_registry  # noqa: E402
+from tools.relational import SQLiteBackend  # noqa: E402
+from tools.vector_tool import VectorSearchTool  # noqa: E402
+
+SCENARIOS = ("router", "vector", "postgres", "graph", "http")
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baselines", "local.json")
+
+# Compared against the baseline; p99 is reported but too noisy to gate on
+GATED = ("p50_ms", "p95_ms", "ops_per_s")
+
+MESSAGES = [
+    "How do I reset my password?",
+    "What is the status of ticket 42?",
+    "What is the weather today?",
+    "Explain the refund policy and the bitcoin price",
+    "Hello, how are you?",
+    "Which city is customer 7 from?",
+]
+
+POSTGRES_MESSAGES = {
+    "ticket_by_id": "What is the status of ticket {n}?",
+    "customer_city_by_id": "Which city is customer {n} from?",
+    "tickets_by_customer_name": "Show tickets for customer Customer {n}",
+}
+
+
+# -------------------------
+# Measurement
+# -------------------------
+
+def measure(
+    run: Callable[[int], Any],
+    iterations: int,
+    rounds: int = 1,
+    warmup: int = 10,
+    batch: int = 1,
+) -> Dict[str, float]:
+    """
+    Time `iterations` calls of run(i) after `warmup` untimed calls.
+
+    The round with the lowest p50 of `rounds` is kept, which filters
+    out noisy neighbours on shared machines. Microsecond-scale
+    operations set `batch`: each sample then times `batch` consecutive
+    calls, so timer overhead does not dominate.
+    """
+    for i in range(warmup):
+        run(i)
+
+    rounds_measured = [_measure_round(run, iterations, batch) for _ in range(max(1, rounds))]
+    return min(rounds_measured, key=lambda result: result["p50_ms"])
+
+
+def _measure_round(run: Callable[[int], Any], iterations: int, batch: int) -> Dict[str, float]:
+    samples: List[float] = []
+    started = time.perf_counter()
+    for i in range(0, iterations, batch):
+        call_started = time.perf_counter()
+        for j in range(i, i + batch):
+            run(j)
+        samples.append((time.perf_counter() - call_started) * 1000 / batch)
+    elapsed = time.perf_counter() - started
+
+    quantiles = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "iterations": iterations,
+        "p50_ms": quantiles[49],
+        "p95_ms": quantiles[94],
+        "p99_ms": quantiles[98],
+        "mean_ms": statistics.fmean(samples),
+        "ops_per_s": iterations / elapsed,
+    }
+
+
+def _state(message: str) -> Dict[str, Any]:
+    return {
+        "user_message": message,
+        "conversation_history": [],
+        "route": None,
+        "routes": [],
+        "tool_result": None,
+        "tool_results": None,
+        "final_answer": None,
+    }
+
+
+# -------------------------
+# Scenarios
+# -------------------------
+
+def bench_router(args, _context) -> Dict[str, Dict[str, float]]:
+    router = get_router()
+    messages = MESSAGES * 10
+    return {
+        "router.route": measure(
+            lambda i: router.route(messages[i % len(messages)], []),
+            args.iterations * 100,
+            args.rounds,
+            batch=100,
+        )
+    }
+
+
+def _vector_tool(context: Dict[str, Any], articles: List[Dict[str, str]]) -> VectorSearchTool:
+    # Capacity 0: every search encodes, so the model cost is measured
+    return VectorSearchTool(
+        query_cache=EmbeddingCache(context["model_name"], capacity=0),
+        model=context["embedder"],
+        model_name=context["model_name"],
+        articles=articles,
+        index_dir=os.path.join(context["work_dir"], "index", str(len(articles))),
+    )
+
+
+def bench_vector(args, context) -> Dict[str, Dict[str, float]]:
+    queries = synthetic_queries(512)
+    results = {}
+
+    for size in args.articles:
+        started = time.perf_counter()
+        tool = _vector_tool(context, synthetic_articles(size))
+        print(f"  index of {size:,} articles ready in {time.perf_counter() - started:.1f}s")
+
+        # Large corpora: fewer iterations, same statistics
+        iterations = args.iterations if size <= 10_000 else max(50, args.iterations // 10)
+        try:
+            results[f"vector.search[{size}]"] = measure(
+                lambda i: tool.search(queries[i % len(queries)]), iterations, args.rounds
+            )
+        finally:
+            tool.close()
+
+    return results
+
+
+def bench_postgres(args, context) -> Dict[str, Dict[str, float]]:
+    from graph.graph_builder import postgres_node
+
+    limit = min(args.customers, args.tickets)
+    results = {}
+
+    for name, template in POSTGRES_MESSAGES.items():
+        states = [_state(template.format(n=1 + (i * 7919) % limit)) for i in range(512)]
+        assert postgres_node(dict(states[0]))["tool_result"]["rows"], name
+        results[f"postgres.{name}"] = measure(
+            lambda i: postgres_node(dict(states[i % len(states)])), args.iterations, args.rounds
+        )
+
+    return results
+
+
+def bench_graph(args, _context) -> Dict[str, Dict[str, float]]:
+    from graph.graph_builder import build_graph
+
+    graph = build_graph()
+    return {
+        "graph.invoke": measure(
+            lambda i: graph.invoke(_state(MESSAGES[i % len(MESSAGES)])),
+            args.iterations,
+            args.rounds,
+        )
+    }
+
+
+def bench_http(args, _context) -> Dict[str, Dict[str, float]]:
+    from fastapi.testclient import TestClient
+
+    import api.main
+
+    def chat(client, i: int) -> None:
+        response = client.post(
+            "/chat", json={"message": MESSAGES[i % len(MESSAGES)], "session_id": "bench"}
+        )
+        response.raise_for_status()
+
+    # Leaving the client runs the app shutdown, which closes every tool
+    with TestClient(api.main.app) as client:
+        return {"http.chat": measure(lambda i: chat(client, i), args.iterations, args.rounds)}
+
+
+BENCHES = {
+    "router": bench_router,
+    "vector": bench_vector,
+    "postgres": bench_postgres,
+    "graph": bench_graph,
+    "http": bench_http,
+}
+
+
+# -------------------------
+# Baselines
+# -------------------------
+
+def compare(
+    baseline: Dict[str, Dict[str, float]],
+    current: Dict[str, Dict[str, float]],
+    tolerance: float,
+    min_delta_ms: float,
+) -> List[str]:
+    """
+    Human-readable regressions: more than `tolerance` (0.25 = 25%) worse
+    and more than `min_delta_ms` per operation, so microsecond jitter on
+    fast paths does not fail the run.
+    """
+    regressions = []
+    for name, metrics in current.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        for metric in GATED:
+            old, new = before[metric], metrics[metric]
+            if metric == "ops_per_s":
+                # Compare as time per operation
+                old, new = 1000 / old, 1000 / new
+            if new > old * (1 + tolerance) and new - old > min_delta_ms:
+                regressions.append(f"{name} {metric}: {before[metric]:.3f} -> {metrics[metric]:.3f}")
+    return regressions
+
+
+def _print_table(results: Dict[str, Dict[str, float]]) -> None:
+    print(f"\n{'benchmark':<36}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ops/s':>12}")
+    for name, metrics in results.items():
+        print(
+            f"{name:<36}{metrics['p50_ms']:>10.3f}{metrics['p95_ms']:>10.3f}"
+            f"{metrics['p99_ms']:>10.3f}{metrics['ops_per_s']:>12,.0f}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--only", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=3, help="Keep the best of N rounds")
+    parser.add_argument("--articles", type=int, nargs="+", default=[3, 10_000, 1_000_000])
+    parser.add_argument("--customers", type=int, default=100_000)
+    parser.add_argument("--tickets", type=int, default=1_000_000)
+    parser.add_argument("--model", help="Local SentenceTransformer directory (default: hashing encoder)")
+    parser.add_argument("--quick", action="store_true", help="Small sizes for CI")
+    parser.add_argument("--work-dir", default=os.path.join(ROOT, ".cache", "bench"))
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="Write results to --baseline")
+    parser.add_argument("--compare", action="store_true", help="Fail on regression vs --baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--min-delta-ms", type=float, default=0.1)
+    args = parser.parse_args()
+
+    if args.quick:
+        args.iterations = min(args.iterations, 200)
+        args.articles = [size for size in args.articles if size <= 10_000]
+        args.customers, args.tickets = min(args.customers, 10_000), min(args.tickets, 100_000)
+
+    embedder = load_embedder(args.model)
+    # Keyed like the app: int8 ONNX vectors get their own cached index
+    model_name = (
+        model_key(os.path.basename(os.path.normpath(args.model))) if args.model else "hashing-384"
+    )
+    context: Dict[str, Any] = {
+        "embedder": embedder,
+        "model_name": f"bench-{model_name}",
+        "work_dir": args.work_dir,
+    }
+
+    # Tools behind the graph and the API: stand-ins, built once
+    if {"postgres", "graph", "http"} & set(args.only):
+        print(f"▶ Preparing {args.customers:,} customers / {args.tickets:,} tickets in SQLite...")
+        database = build_sqlite_dataset(
+            os.path.join(args.work_dir, "db", f"supportdesk-{args.customers}-{args.tickets}.sqlite"),
+            args.customers,
+            args.tickets,
+        )
+
+        registry = get_registry()
+        registry.register(
+            "postgres", lambda: PostgresTool(backend=SQLiteBackend(QUERY_CATALOG, database))
+        )
+        registry.register(
+            "postgres_async",
+            lambda: ExecutorPostgresTool(registry.postgres, get_runtime().io_executor),
+        )
+        registry.register("vector", lambda: _vector_tool(context, ARTICLES))
+
+    results: Dict[str, Dict[str, float]] = {}
+    for scenario in SCENARIOS:
+        if scenario in args.only:
+            print(f"▶ {scenario}")
+            results.update(BENCHES[scenario](args, context))
+
+    _print_table(results)
+
+    report = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "embedder": model_name,
+            "customers": args.customers,
+            "tickets": args.tickets,
+        },
+        "results": results,
+    }
+
+    status = 0
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"\n✘ No baseline at {args.baseline}; run with --save first")
+            return 2
+        with open(args.baseline, encoding="utf-8") as handle:
+            baseline = json.load(handle)["results"]
+        regressions = compare(baseline, results, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print(f"\n✘ {len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            status = 1
+        else:
+            print(f"\n✔ No regressions beyond {args.tolerance:.0%}")
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+        print(f"✔ Baseline written to {args.baseline}")
+
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
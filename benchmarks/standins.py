@@ -0,0 +1,219 @@
+"""
+Offline Stand-ins for Benchmarks
+
+Purpose:
+- HashingEmbedder: small deterministic text encoder with the
+  SentenceTransformer encode() API (no model download)
+- build_tiny_sentence_transformer: random 2-layer BERT encoder for
+  exercising the torch and ONNX embedding backends offline
+- build_sqlite_dataset: generated customers / tickets database for the
+  SQLite relational backend
+- Synthetic knowledge-base articles and queries
+
+Numbers measured against stand-ins are for comparing a change with a
+baseline on the same machine, not for absolute capacity planning.
+"""
+
+import os
+import random
+import re
+import sqlite3
+import zlib
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from config.settings import load_relational_config
+from tools.postgres_tool import QUERY_CATALOG
+from tools.relational import SQLiteBackend
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+# ======================================================
+# Embedding model
+# ======================================================
+
+class HashingEmbedder:
+    """
+    Signed feature hashing of words and word bigrams into a dense,
+    L2-normalized vector. Same output shape as all-MiniLM-L6-v2.
+    """
+
+    def __init__(self, dimension: int = 384) -> None:
+        self._dimension = dimension
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self._dimension
+
+    def encode(
+        self,
+        sentences: Any,
+        normalize_embeddings: bool = False,
+        **_: Any,
+    ) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+
+        vectors = np.zeros((len(texts), self._dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = _TOKEN.findall(text.lower())
+            features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+            for feature in features:
+                code = zlib.crc32(feature.encode("utf-8"))
+                vectors[row, code % self._dimension] += 1.0 if code & 0x80000000 else -1.0
+
+        if normalize_embeddings:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors /= np.maximum(norms, 1e-12)
+
+        return vectors[0] if single else vectors
+
+
+def load_embedder(model_path: Optional[str] = None) -> Any:
+    """
+    A local SentenceTransformer directory when given (on
+    EMBEDDING_BACKEND), else HashingEmbedder.
+    """
+    if model_path:
+        from tools.embedding_model import load_embedding_model
+
+        return load_embedding_model(model_path)
+    return HashingEmbedder()
+
+
+def build_tiny_sentence_transformer(path: str, texts: List[str], seed: int = 0) -> str:
+    """
+    Save a randomly initialized 2-layer BERT SentenceTransformer (mean
+    pooling + Normalize, like all-MiniLM-L6-v2) with a WordPiece
+    vocabulary built from `texts`. Reused when it already exists.
+
+    Exercises the real torch / ONNX code paths without a download; its
+    embeddings carry no meaning.
+    """
+    if os.path.exists(os.path.join(path, "modules.json")):
+        return path
+
+    import torch
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    words = sorted({word for text in texts for word in _TOKEN.findall(text.lower())})
+    pieces = [f"##{c}" for c in "abcdefghijklmnopqrstuvwxyz0123456789"]
+    vocabulary = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + list(
+        dict.fromkeys(list("abcdefghijklmnopqrstuvwxyz0123456789") + words + pieces)
+    )
+
+    transformer_dir = os.path.join(path, "transformer")
+    os.makedirs(transformer_dir, exist_ok=True)
+    vocab_file = os.path.join(transformer_dir, "vocab.txt")
+    with open(vocab_file, "w", encoding="utf-8") as handle:
+        handle.write("\n".join(vocabulary) + "\n")
+
+    torch.manual_seed(seed)
+    BertModel(BertConfig(
+        vocab_size=len(vocabulary),
+        hidden_size=64,
+        num_hidden_layers=2,
+        num_attention_heads=4,
+        intermediate_size=128,
+        max_position_embeddings=256,
+    )).save_pretrained(transformer_dir)
+    BertTokenizerFast(vocab_file).save_pretrained(transformer_dir)
+
+    SentenceTransformer(modules=[
+        models.Transformer(transformer_dir, max_seq_length=256),
+        models.Pooling(64, "mean"),
+        models.Normalize(),
+    ]).save(path)
+    return path
+
+
+# ======================================================
+# Knowledge base
+# ======================================================
+
+_TOPICS = [
+    "password", "refund", "invoice", "billing", "login", "escalation", "shipping",
+    "subscription", "account", "security", "export", "integration", "api", "mobile",
+    "notification", "backup", "privacy", "upgrade", "cancellation", "warranty",
+]
+_ACTIONS = ["reset", "update", "cancel", "configure", "recover", "verify", "transfer", "renew"]
+_DETAILS = [
+    "within 14 days", "after 48 hours", "from the settings page", "by contacting support",
+    "using the admin console", "with a valid receipt", "through the mobile app",
+    "once the payment clears", "before the billing cycle ends", "for enterprise plans",
+]
+
+
+def synthetic_articles(count: int, seed: int = 0) -> List[Dict[str, str]]:
+    """
+    Deterministic support articles, distinct by number.
+    """
+    rng = random.Random(seed)
+    articles = []
+    for i in range(count):
+        topic, action = rng.choice(_TOPICS), rng.choice(_ACTIONS)
+        detail, other = rng.choice(_DETAILS), rng.choice(_TOPICS)
+        articles.append({
+            "title": f"{topic.title()} guide {i}",
+            "content": (
+                f"{topic.title()} guide {i}: how to {action} your {topic} {detail}. "
+                f"Related to {other} settings, article {i}."
+            ),
+        })
+    return articles
+
+
+def synthetic_queries(count: int, seed: int = 1) -> List[str]:
+    rng = random.Random(seed)
+    return [
+        f"How do I {rng.choice(_ACTIONS)} my {rng.choice(_TOPICS)} {rng.choice(_DETAILS)}?"
+        for _ in range(count)
+    ]
+
+
+# ======================================================
+# Relational dataset
+# ======================================================
+
+def build_sqlite_dataset(path: str, customers: int = 100_000, tickets: int = 1_000_000) -> str:
+    """
+    Write a SQLite database with the db/schema.sql tables and indexes,
+    filled with `customers` customers and `tickets` tickets.
+
+    Reused when it already exists; returns the path.
+    """
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    partial = f"{path}.partial"
+    if os.path.exists(partial):
+        os.remove(partial)
+
+    # Schema through the backend so it matches what DB_BACKEND=sqlite serves
+    backend = SQLiteBackend(QUERY_CATALOG, partial)
+    backend.load_script(load_relational_config().schema_path)
+    backend.close()
+
+    connection = sqlite3.connect(partial)
+    try:
+        connection.executemany(
+            "INSERT INTO customers VALUES (?, ?, ?)",
+            ((i, f"Customer {i}", f"City {i % 500}") for i in range(1, customers + 1)),
+        )
+        connection.executemany(
+            "INSERT INTO tickets VALUES (?, ?, ?, ?)",
+            (
+                (i, 1 + i % customers, f"Issue {i}", "close" if i % 3 == 0 else "open")
+                for i in range(1, tickets + 1)
+            ),
+        )
+        connection.execute("ANALYZE")
+        connection.commit()
+    finally:
+        connection.close()
+
+    os.replace(partial, path)
+    return path
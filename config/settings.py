@@ -1,13 +1,20 @@
 """
 Centralized configuration loader.
 
-Only responsibility:
-- Load environment variables
-- Expose DB connection settings
+Responsibilities:
+- Load environment variables (and .env)
+- Expose one frozen settings object per concern, each built by a
+  load_*_config() function:
+  - Databases: connection, relational backend, pool, query cache
+  - Vector search: embedding model and cache, article index, knowledge
+    base, ingestion, retrieval backend, hybrid search, query batching
+  - Serving: executors, LLM, answer cache, fan-out, metrics, history,
+    router keywords, startup pre-warm, Hugging Face access
 """
 
 from dataclasses import dataclass
 import os
+from typing import Dict, Optional, Tuple
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -22,6 +29,158 @@ class PostgresConfig:
     password: str
 
 
+@dataclass(frozen=True)
+class PostgresPoolConfig:
+    enabled: bool
+    min_size: int
+    max_size: int
+    checkout_timeout: float
+    statement_timeout_ms: int
+    probe_idle_seconds: float
+
+
+@dataclass(frozen=True)
+class RelationalConfig:
+    backend: str
+    sqlite_path: str
+    schema_path: str
+    seed_path: str
+
+
+@dataclass(frozen=True)
+class QueryCacheConfig:
+    enabled: bool
+    max_size: int
+    ttl_seconds: float
+    channel: str
+
+
+@dataclass(frozen=True)
+class EmbeddingCacheConfig:
+    capacity: int
+    eviction: str
+    path: str | None
+
+
+@dataclass(frozen=True)
+class EmbeddingModelConfig:
+    backend: str
+    onnx_dir: str
+    quantize: bool
+    threads: int
+
+
+@dataclass(frozen=True)
+class ArticleIndexConfig:
+    directory: str
+
+
+@dataclass(frozen=True)
+class KnowledgeBaseConfig:
+    store_path: str
+    sync_interval_seconds: float
+
+
+@dataclass(frozen=True)
+class IngestConfig:
+    chunk_size: int
+    chunk_overlap: int
+    batch_size: int
+    workers: int
+
+
+@dataclass(frozen=True)
+class RetrievalConfig:
+    backend: str
+    hnsw_m: int
+    hnsw_ef_construction: int
+    hnsw_ef_search: int
+    ivf_nlist: int
+    ivf_nprobe: int
+    storage: str
+    rerank: int
+
+
+@dataclass(frozen=True)
+class SearchConfig:
+    mode: str
+    fusion: str
+    rrf_k: float
+    lexical_weight: float
+    min_coverage: float
+    fast_path: bool
+    fast_path_coverage: float
+    fast_path_margin: float
+
+
+@dataclass(frozen=True)
+class EmbeddingBatchConfig:
+    enabled: bool
+    window_ms: float
+    max_batch: int
+
+
+@dataclass(frozen=True)
+class RuntimeConfig:
+    cpu_workers: int
+    io_workers: int
+    route_limits: Dict[str, int]
+
+
+@dataclass(frozen=True)
+class LLMConfig:
+    model_dir: str
+    quantize: bool
+    max_new_tokens: int
+    deadline_ms: float
+    max_batch: int
+    batch_window_ms: float
+    threads: int
+
+
+@dataclass(frozen=True)
+class AnswerCacheConfig:
+    routes: Tuple[str, ...]
+    max_size: int
+    ttl_seconds: float
+
+
+@dataclass(frozen=True)
+class FanoutConfig:
+    enabled: bool
+    deadline_ms: float
+
+
+@dataclass(frozen=True)
+class MetricsConfig:
+    enabled: bool
+    server_timing: bool
+
+
+@dataclass(frozen=True)
+class HistoryConfig:
+    backend: str
+    max_messages: int
+    max_sessions: int
+    idle_seconds: float
+    sqlite_path: str
+    flush_interval_ms: float
+    flush_batch: int
+    # SQLite write-behind queue bound; oldest messages drop beyond it
+    max_pending: int
+
+
+@dataclass(frozen=True)
+class RouterConfig:
+    keywords_path: str
+
+
+@dataclass(frozen=True)
+class StartupConfig:
+    # None = every registered subsystem
+    prewarm: Optional[Tuple[str, ...]]
+
+
 @dataclass(frozen=True)
 class HFConfig:
     token: str | None
@@ -40,6 +199,256 @@ def load_postgres_config() -> PostgresConfig:
     )
 
 
+def load_relational_config() -> RelationalConfig:
+    """
+    Load which SQL engine serves PostgresTool.
+
+    DB_BACKEND is "postgres" (server, via psycopg2) or "sqlite"
+    (in-process, loaded from the schema and seed scripts).
+    """
+    db_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "db")
+    return RelationalConfig(
+        backend=os.getenv("DB_BACKEND", "postgres").strip().lower(),
+        sqlite_path=os.getenv("SQLITE_DB_PATH", ":memory:"),
+        schema_path=os.getenv("SQLITE_SCHEMA_PATH", os.path.join(db_dir, "schema.sql")),
+        seed_path=os.getenv("SQLITE_SEED_PATH", os.path.join(db_dir, "seed.sql")),
+    )
+
+
+def load_postgres_pool_config() -> PostgresPoolConfig:
+    """
+    Load PostgreSQL connection pool settings from environment variables.
+    """
+    return PostgresPoolConfig(
+        enabled=os.getenv("POSTGRES_POOL_ENABLED", "true") == "true",
+        min_size=int(os.getenv("POSTGRES_POOL_MIN", "1")),
+        max_size=int(os.getenv("POSTGRES_POOL_MAX", "10")),
+        checkout_timeout=float(os.getenv("POSTGRES_POOL_TIMEOUT", "5")),
+        statement_timeout_ms=int(os.getenv("POSTGRES_STATEMENT_TIMEOUT_MS", "5000")),
+        probe_idle_seconds=float(os.getenv("POSTGRES_POOL_PROBE_IDLE", "30")),
+    )
+
+
+def load_query_cache_config() -> QueryCacheConfig:
+    """
+    Load Postgres result cache settings from environment variables.
+    """
+    return QueryCacheConfig(
+        enabled=os.getenv("QUERY_CACHE_ENABLED", "false") == "true",
+        max_size=int(os.getenv("QUERY_CACHE_MAX_SIZE", "1024")),
+        ttl_seconds=float(os.getenv("QUERY_CACHE_TTL", "30")),
+        channel=os.getenv("QUERY_CACHE_CHANNEL", "support_desk_changes"),
+    )
+
+
+def load_embedding_cache_config() -> EmbeddingCacheConfig:
+    """
+    Load query-embedding cache settings from environment variables.
+    """
+    return EmbeddingCacheConfig(
+        capacity=int(os.getenv("EMBEDDING_CACHE_SIZE", "2048")),
+        eviction=os.getenv("EMBEDDING_CACHE_EVICTION", "lru"),
+        path=os.getenv("EMBEDDING_CACHE_PATH") or None,
+    )
+
+
+def load_embedding_model_config() -> EmbeddingModelConfig:
+    """
+    Load the sentence-embedding backend (torch or ONNX Runtime) from environment variables.
+    """
+    return EmbeddingModelConfig(
+        backend=os.getenv("EMBEDDING_BACKEND", "torch"),
+        onnx_dir=os.getenv("EMBEDDING_ONNX_DIR", ".cache/onnx"),
+        quantize=os.getenv("EMBEDDING_QUANTIZE", "false") == "true",
+        threads=int(os.getenv("EMBEDDING_THREADS", "0")),
+    )
+
+
+def load_article_index_config() -> ArticleIndexConfig:
+    """
+    Load on-disk article embedding index settings from environment variables.
+    """
+    return ArticleIndexConfig(
+        directory=os.getenv("ARTICLE_INDEX_DIR", ".cache/article_index"),
+    )
+
+
+def load_knowledge_base_config() -> KnowledgeBaseConfig:
+    """
+    Load knowledge-base article store settings from environment variables.
+    """
+    return KnowledgeBaseConfig(
+        store_path=os.getenv("KB_STORE_PATH", ":memory:"),
+        sync_interval_seconds=float(os.getenv("KB_SYNC_INTERVAL", "5")),
+    )
+
+
+def load_ingest_config() -> IngestConfig:
+    """
+    Load document chunking / bulk embedding settings from environment variables.
+
+    INGEST_WORKERS=0 uses min(4, CPUs) embedding processes (inline on one CPU).
+    """
+    return IngestConfig(
+        chunk_size=int(os.getenv("INGEST_CHUNK_SIZE", "1000")),
+        chunk_overlap=int(os.getenv("INGEST_CHUNK_OVERLAP", "200")),
+        batch_size=int(os.getenv("INGEST_BATCH_SIZE", "64")),
+        workers=int(os.getenv("INGEST_WORKERS", "0")),
+    )
+
+
+def load_retrieval_config() -> RetrievalConfig:
+    """
+    Load vector retrieval backend settings from environment variables.
+    """
+    return RetrievalConfig(
+        backend=os.getenv("VECTOR_BACKEND", "exact"),
+        hnsw_m=int(os.getenv("HNSW_M", "16")),
+        hnsw_ef_construction=int(os.getenv("HNSW_EF_CONSTRUCTION", "200")),
+        hnsw_ef_search=int(os.getenv("HNSW_EF_SEARCH", "64")),
+        ivf_nlist=int(os.getenv("IVF_NLIST", "1024")),
+        ivf_nprobe=int(os.getenv("IVF_NPROBE", "16")),
+        storage=os.getenv("VECTOR_STORAGE", "float32"),
+        rerank=int(os.getenv("VECTOR_RERANK", "4")),
+    )
+
+
+def load_search_config() -> SearchConfig:
+    """
+    Load hybrid (BM25 + vector) search settings from environment variables.
+    """
+    return SearchConfig(
+        mode=os.getenv("SEARCH_MODE", "vector"),
+        fusion=os.getenv("SEARCH_FUSION", "rrf"),
+        rrf_k=float(os.getenv("SEARCH_RRF_K", "60")),
+        lexical_weight=float(os.getenv("SEARCH_LEXICAL_WEIGHT", "0.3")),
+        min_coverage=float(os.getenv("LEXICAL_MIN_COVERAGE", "0.5")),
+        fast_path=os.getenv("LEXICAL_FAST_PATH", "true") == "true",
+        fast_path_coverage=float(os.getenv("LEXICAL_FAST_PATH_COVERAGE", "0.8")),
+        fast_path_margin=float(os.getenv("LEXICAL_FAST_PATH_MARGIN", "1.5")),
+    )
+
+
+def load_embedding_batch_config() -> EmbeddingBatchConfig:
+    """
+    Load micro-batching settings for query embedding from environment variables.
+    """
+    return EmbeddingBatchConfig(
+        enabled=os.getenv("EMBED_BATCHING_ENABLED", "true") == "true",
+        window_ms=float(os.getenv("EMBED_BATCH_WINDOW_MS", "3")),
+        max_batch=int(os.getenv("EMBED_BATCH_MAX", "32")),
+    )
+
+
+def load_runtime_config() -> RuntimeConfig:
+    """
+    Load async request path executor sizes and per-route concurrency limits.
+    """
+    return RuntimeConfig(
+        cpu_workers=int(os.getenv("CPU_EXECUTOR_WORKERS", str(os.cpu_count() or 2))),
+        io_workers=int(os.getenv("IO_EXECUTOR_WORKERS", "16")),
+        route_limits={
+            "postgres": int(os.getenv("ROUTE_LIMIT_POSTGRES", "32")),
+            "vector": int(os.getenv("ROUTE_LIMIT_VECTOR", "8")),
+            "external": int(os.getenv("ROUTE_LIMIT_EXTERNAL", "64")),
+            "llm": int(os.getenv("ROUTE_LIMIT_LLM", "4")),
+        },
+    )
+
+
+def load_llm_config() -> LLMConfig:
+    """
+    Load local LLM engine settings from environment variables.
+    """
+    return LLMConfig(
+        model_dir=os.getenv("LLM_MODEL_DIR", "models/qwen2.5-0.5b"),
+        quantize=os.getenv("LLM_QUANTIZE", "true") == "true",
+        max_new_tokens=int(os.getenv("LLM_MAX_NEW_TOKENS", "256")),
+        deadline_ms=float(os.getenv("LLM_DEADLINE_MS", "30000")),
+        max_batch=int(os.getenv("LLM_MAX_BATCH", "4")),
+        batch_window_ms=float(os.getenv("LLM_BATCH_WINDOW_MS", "10")),
+        threads=int(os.getenv("LLM_THREADS", "0")),
+    )
+
+
+def load_answer_cache_config() -> AnswerCacheConfig:
+    """
+    Load final-answer cache settings from environment variables.
+
+    ANSWER_CACHE_ROUTES lists the routes whose answers may be cached
+    (empty disables the cache).
+    """
+    routes = os.getenv("ANSWER_CACHE_ROUTES", "vector,external")
+    return AnswerCacheConfig(
+        routes=tuple(route.strip() for route in routes.split(",") if route.strip()),
+        max_size=int(os.getenv("ANSWER_CACHE_MAX_SIZE", "4096")),
+        ttl_seconds=float(os.getenv("ANSWER_CACHE_TTL", "300")),
+    )
+
+
+def load_fanout_config() -> FanoutConfig:
+    """
+    Load multi-route fan-out settings for ambiguous messages.
+    """
+    return FanoutConfig(
+        enabled=os.getenv("FANOUT_ENABLED", "false") == "true",
+        deadline_ms=float(os.getenv("FANOUT_DEADLINE_MS", "1500")),
+    )
+
+
+def load_metrics_config() -> MetricsConfig:
+    """
+    Load /metrics exposure and Server-Timing header settings.
+    """
+    return MetricsConfig(
+        enabled=os.getenv("METRICS_ENABLED", "true") == "true",
+        server_timing=os.getenv("SERVER_TIMING", "false") == "true",
+    )
+
+
+def load_history_config() -> HistoryConfig:
+    """
+    Load per-session conversation history settings from environment variables.
+    """
+    return HistoryConfig(
+        backend=os.getenv("HISTORY_BACKEND", "memory"),
+        max_messages=int(os.getenv("HISTORY_MAX_MESSAGES", "10")),
+        max_sessions=int(os.getenv("HISTORY_MAX_SESSIONS", "10000")),
+        idle_seconds=float(os.getenv("HISTORY_IDLE_SECONDS", "1800")),
+        sqlite_path=os.getenv("HISTORY_SQLITE_PATH", ".cache/history.sqlite3"),
+        flush_interval_ms=float(os.getenv("HISTORY_FLUSH_INTERVAL_MS", "200")),
+        flush_batch=int(os.getenv("HISTORY_FLUSH_BATCH", "256")),
+        max_pending=int(os.getenv("HISTORY_MAX_PENDING", "10000")),
+    )
+
+
+def load_router_config() -> RouterConfig:
+    """
+    Load the location of the router keyword tables from environment variables.
+    """
+    default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "router_keywords.json")
+    return RouterConfig(
+        keywords_path=os.getenv("ROUTER_KEYWORDS_PATH", default_path),
+    )
+
+
+def load_startup_config() -> StartupConfig:
+    """
+    Load which subsystems the API pre-warms at startup.
+
+    PREWARM is "all", "none", or a comma-separated list of registry names
+    (postgres, knowledge_base, vector, external, postgres_async, llm).
+    """
+    value = os.getenv("PREWARM", "all").strip().lower()
+    if value == "all":
+        prewarm = None
+    elif value in ("", "none"):
+        prewarm = ()
+    else:
+        prewarm = tuple(name.strip() for name in value.split(",") if name.strip())
+    return StartupConfig(prewarm=prewarm)
+
+
 def load_hf_config() -> HFConfig:
     """
     Load Hugging Face configuration from environment variables.
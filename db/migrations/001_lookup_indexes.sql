@@ -0,0 +1,11 @@
+-- Indexes backing the postgres_node lookups on existing databases.
+-- Fresh installs get these from schema.sql.
+-- CONCURRENTLY avoids locking writes; run outside a transaction block.
+
+-- Tickets by customer (JOIN side of tickets_by_customer_name)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tickets_customer_id
+    ON tickets (customer_id);
+
+-- Case-insensitive customer name lookup
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_customers_name_lower
+    ON customers (lower(name));
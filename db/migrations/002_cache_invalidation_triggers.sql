@@ -0,0 +1,27 @@
+-- Change notifications for the PostgresTool result cache.
+-- Every committed write to customers/tickets sends the table name on the
+-- channel named by the support_desk.cache_channel setting, or on
+-- support_desk_changes when it is unset. If QUERY_CACHE_CHANNEL is
+-- changed, set the same name for every writing session, e.g.:
+--   ALTER DATABASE "aiSupportDesk" SET support_desk.cache_channel = 'my_channel';
+
+CREATE OR REPLACE FUNCTION notify_support_desk_change() RETURNS trigger AS $$
+BEGIN
+    -- Channel from the support_desk.cache_channel setting (QUERY_CACHE_CHANNEL)
+    PERFORM pg_notify(
+        coalesce(nullif(current_setting('support_desk.cache_channel', true), ''), 'support_desk_changes'),
+        TG_TABLE_NAME
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS customers_notify_change ON customers;
+CREATE TRIGGER customers_notify_change
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON customers
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_support_desk_change();
+
+DROP TRIGGER IF EXISTS tickets_notify_change ON tickets;
+CREATE TRIGGER tickets_notify_change
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON tickets
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_support_desk_change();
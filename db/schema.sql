@@ -12,4 +12,29 @@ CREATE TABLE tickets (
     issue TEXT NOT NULL,
     status TEXT NOT NULL,
     FOREIGN KEY (customer_id) REFERENCES customers(id)
-);
\ No newline at end of file
+);
+
+-- Lookup indexes (see migrations/001_lookup_indexes.sql)
+CREATE INDEX idx_tickets_customer_id ON tickets (customer_id);
+CREATE INDEX idx_customers_name_lower ON customers (lower(name));
+
+
+-- Result cache invalidation (see migrations/002_cache_invalidation_triggers.sql)
+CREATE FUNCTION notify_support_desk_change() RETURNS trigger AS $$
+BEGIN
+    -- Channel from the support_desk.cache_channel setting (QUERY_CACHE_CHANNEL)
+    PERFORM pg_notify(
+        coalesce(nullif(current_setting('support_desk.cache_channel', true), ''), 'support_desk_changes'),
+        TG_TABLE_NAME
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER customers_notify_change
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON customers
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_support_desk_change();
+
+CREATE TRIGGER tickets_notify_change
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON tickets
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_support_desk_change();
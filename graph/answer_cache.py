@@ -0,0 +1,137 @@
+"""
+Final Answer Cache
+
+Responsibilities:
+- Answer repeated questions without running the graph
+- Key on route, normalized message and the route's data version
+- Per-route opt-in; a route with no known data version is never cached
+
+Data versions come from the tool serving the route:
+- vector: article index content hash
+- postgres: LISTEN/NOTIFY change counter (None while not listening)
+- external: fixed mock version
+"""
+
+from collections import OrderedDict
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+from config.settings import load_answer_cache_config
+from tools.embedding_cache import normalize_query
+from tools.registry import get_registry
+
+# Route -> registry tool whose data_version() stamps its answers
+_ROUTE_TOOLS = {
+    "vector": "vector",
+    "postgres": "postgres_async",
+    "external": "external",
+}
+
+AnswerKey = Tuple[str, str, Hashable]
+
+
+def data_version(route: str) -> Optional[Hashable]:
+    """
+    Current data version for a route, or None if it cannot be known yet
+    (tool not built, or changes are not being tracked).
+    """
+    name = _ROUTE_TOOLS.get(route)
+    if name is None:
+        return None
+    tool = get_registry().peek(name)
+    return tool.data_version() if tool is not None else None
+
+
+class AnswerCache:
+    """
+    Thread-safe LRU + TTL cache of final answers.
+
+    Entries for an old data version are never hit again once the
+    version moves; they age out through LRU / TTL.
+    """
+
+    def __init__(
+        self,
+        routes: Iterable[str],
+        max_size: int = 4096,
+        ttl_seconds: float = 300.0,
+        version: Callable[[str], Optional[Hashable]] = data_version,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._routes = frozenset(routes)
+        self._max_size = max_size
+        self._ttl = ttl_seconds
+        self._version = version
+        self._clock = clock
+
+        self._entries: "OrderedDict[AnswerKey, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "bypassed": 0, "evictions": 0, "stale_skips": 0}
+
+    @classmethod
+    def from_config(cls) -> "AnswerCache":
+        config = load_answer_cache_config()
+        return cls(config.routes, config.max_size, config.ttl_seconds)
+
+    def lookup(self, route: str, message: str) -> Tuple[Optional[str], Optional[AnswerKey]]:
+        """
+        Return (cached answer or None, key to store under after a miss).
+
+        The key is None when this route / data state must not be cached.
+        """
+        if route not in self._routes:
+            return None, None
+
+        version = self._version(route)
+        if version is None:
+            with self._lock:
+                self._stats["bypassed"] += 1
+            return None, None
+
+        key = (route, normalize_query(message), version)
+        now = self._clock()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[1], key
+            if entry is not None:
+                del self._entries[key]
+            self._stats["misses"] += 1
+
+        return None, key
+
+    def store(self, key: AnswerKey, answer: str) -> None:
+        """
+        Cache an answer computed after lookup() missed.
+
+        Skipped if the data changed while the graph was running.
+        """
+        if self._version(key[0]) != key[2]:
+            with self._lock:
+                self._stats["stale_skips"] += 1
+            return
+
+        with self._lock:
+            self._entries[key] = (self._clock() + self._ttl, answer)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+
+        lookups = stats["hits"] + stats["misses"]
+        stats["routes"] = sorted(self._routes)
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,181 @@
+"""
+Bulk execution for /chat/batch.
+
+Responsibilities:
+- Route every message first
+- Run each route's tool work in bulk per chunk:
+  - vector: one batched encode + one scoring call
+  - postgres: one ANY(...) query per lookup type
+  - external: one call per tool type
+- Format answers with llm_node and yield them in input order
+"""
+
+from collections import defaultdict
+import logging
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from graph.graph_builder import (
+    external_tool_type,
+    plan_postgres_lookup,
+    llm_node,
+)
+from router.router_node import Route, RouterNode, get_router
+from tools.registry import get_registry
+from tools.relational import DATABASE_ERRORS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 256
+
+# Single-row lookup -> (bulk catalog entry, key column)
+_BULK_LOOKUPS = {
+    "ticket_by_id": ("tickets_by_ids", "id"),
+    "customer_city_by_id": ("customers_by_ids", "id"),
+    "tickets_by_customer_name": ("tickets_by_customer_names", "customer_key"),
+}
+
+# Columns each single-row lookup returns (llm_node keys off these)
+_RESULT_COLUMNS = {
+    "ticket_by_id": ("id", "issue", "status"),
+    "customer_city_by_id": ("name", "city"),
+    "tickets_by_customer_name": ("id", "issue", "status"),
+}
+
+
+def _lookup_key(name: str, params: tuple) -> Any:
+    return params[0].lower() if name == "tickets_by_customer_name" else params[0]
+
+
+def _run_postgres(lookups: Dict[int, tuple]) -> Dict[int, Optional[Dict[str, Any]]]:
+    """
+    Resolve {message index: (catalog name, params)} with one query per type.
+    """
+    by_type: Dict[str, Dict[int, Any]] = defaultdict(dict)
+    for index, (name, params) in lookups.items():
+        by_type[name][index] = _lookup_key(name, params)
+
+    results: Dict[int, Optional[Dict[str, Any]]] = {}
+    tool = get_registry().postgres()
+
+    for name, keys in by_type.items():
+        bulk_name, key_column = _BULK_LOOKUPS[name]
+        columns = _RESULT_COLUMNS[name]
+
+        try:
+            rows = tool.run_named(bulk_name, (sorted(set(keys.values())),))["rows"]
+        except DATABASE_ERRORS:
+            logger.exception("Bulk lookup %s failed", bulk_name)
+            for index in keys:
+                results[index] = None
+            continue
+
+        grouped: Dict[Any, List[Dict[str, Any]]] = defaultdict(list)
+        for row in rows:
+            grouped[row[key_column]].append({column: row[column] for column in columns})
+
+        for index, key in keys.items():
+            matched = grouped.get(key, [])
+            results[index] = {"rows": matched, "row_count": len(matched)}
+
+    return results
+
+
+def _run_vector(messages: Dict[int, str]) -> Dict[int, Optional[Dict[str, Any]]]:
+    indices = list(messages)
+    found = get_registry().vector().search_many([messages[i] for i in indices])
+    return {
+        index: result if result["documents"] else None
+        for index, result in zip(indices, found)
+    }
+
+
+def _run_external(messages: Dict[int, str]) -> Dict[int, Optional[Dict[str, Any]]]:
+    tool = get_registry().external()
+
+    by_type: Dict[str, List[int]] = defaultdict(list)
+    for index, message in messages.items():
+        by_type[external_tool_type(message)].append(index)
+
+    results: Dict[int, Optional[Dict[str, Any]]] = {}
+    for tool_type, indices in by_type.items():
+        # Mock responses depend only on the tool type
+        result = tool.run(tool_type, messages[indices[0]])
+        for index in indices:
+            results[index] = result
+
+    return results
+
+
+def process_chunk(messages: List[str], router: RouterNode) -> List[Dict[str, Any]]:
+    """
+    Route and answer one chunk of messages; output order matches input.
+    """
+    routes = router.route_many(messages)
+
+    postgres: Dict[int, tuple] = {}
+    vector: Dict[int, str] = {}
+    external: Dict[int, str] = {}
+    tool_results: Dict[int, Optional[Dict[str, Any]]] = {}
+
+    for index, (message, route) in enumerate(zip(messages, routes)):
+        if route is Route.POSTGRES:
+            lookup = plan_postgres_lookup(message)
+            if lookup is None:
+                tool_results[index] = None
+            else:
+                postgres[index] = lookup
+        elif route is Route.VECTOR:
+            vector[index] = message
+        elif route is Route.EXTERNAL:
+            external[index] = message
+
+    if postgres:
+        tool_results.update(_run_postgres(postgres))
+    if vector:
+        tool_results.update(_run_vector(vector))
+    if external:
+        tool_results.update(_run_external(external))
+
+    answers = []
+    for index, (message, route) in enumerate(zip(messages, routes)):
+        state = llm_node(
+            {
+                "user_message": message,
+                "conversation_history": [],
+                "route": route.value,
+                "tool_result": tool_results.get(index),
+                "final_answer": None,
+            }
+        )
+        answers.append({"route": route.value, "answer": state["final_answer"]})
+
+    return answers
+
+
+def chunked(messages: Iterable[str], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[str]]:
+    chunk: List[str] = []
+    for message in messages:
+        chunk.append(message)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def run_batch(
+    messages: Iterable[str],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield {"index", "route", "answer"} per message, in input order.
+
+    Work is done chunk by chunk so memory stays flat for large batches.
+    """
+    router = get_router()
+    offset = 0
+
+    for chunk in chunked(messages, chunk_size):
+        for position, answer in enumerate(process_chunk(chunk, router)):
+            yield {"index": offset + position, **answer}
+        offset += len(chunk)
@@ -2,36 +2,79 @@
 LangGraph wiring for AI Support Desk.
 """
 
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+import logging
 import os
 import re
 import string
-from typing import Dict, Any, TypedDict, List
+import time
+from typing import Dict, Any, Optional, Tuple, TypedDict, List
 
-from transformers import AutoTokenizer, AutoModelForCausalLM
+from langchain_core.runnables import RunnableLambda
+from langgraph.config import get_stream_writer
 from langgraph.graph import StateGraph, END
 
-from router.router_node import RouterNode, Route
-from tools.postgres_tool import PostgresTool
-from tools.vector_tool import VectorSearchTool
-from tools.external_tool import ExternalMockTool
+from config.settings import load_fanout_config, load_llm_config
+from graph.runtime import get_runtime
+from router.router_node import Route, get_router
+from tools.metrics import observe_node
+from tools.registry import get_registry
+from tools.vector_tool import citation
+
+logger = logging.getLogger(__name__)
 
 # ======================================================
 # LLM setup (Hugging Face)
 # ======================================================
 
 LLM_AVAILABLE = os.getenv("LLM_AVAILABLE", "false") == "true"
-MODEL_DIR = "models/qwen2.5-0.5b"
 
-tokenizer = None
-model = None
+SYSTEM_PROMPT = (
+    "You are an AI Support Desk assistant. Answer general questions briefly. "
+    "Never invent customer, ticket or policy details."
+)
+
+
+def load_llm() -> Any:
+    """
+    Start the local generation engine. torch/transformers are imported
+    here, so processes that never answer with the LLM never pay for them.
+    """
+    from tools.llm_engine import LLMEngine
+
+    return LLMEngine.from_pretrained(load_llm_config(), SYSTEM_PROMPT)
+
 
 if LLM_AVAILABLE:
-    tokenizer = AutoTokenizer.from_pretrained(MODEL_DIR)
-    model = AutoModelForCausalLM.from_pretrained(
-        MODEL_DIR,
-        device_map="cpu",
-    )
-    model.eval()
+    # Built on first use or by an explicit warmup, like the tools
+    get_registry().register("llm", load_llm)
+
+
+def _token_writer():
+    """
+    Graph stream writer for token events; no-op outside a graph run.
+    """
+    try:
+        return get_stream_writer()
+    except RuntimeError:
+        return lambda _: None
+
+
+def generate_answer(message: str) -> str:
+    """
+    Generate with the local engine, emitting {"token": text} stream events
+    as text is decoded.
+    """
+    stream = get_registry().get("llm").submit(message)
+
+    write = _token_writer()
+    for text in stream:
+        write({"token": text})
+
+    return stream.result().text
 
 
 # ======================================================
@@ -42,7 +85,11 @@ class GraphState(TypedDict):
     user_message: str
     conversation_history: List[str]
     route: str | None
+    # Every route whose keywords matched, in priority order
+    routes: List[str]
     tool_result: Dict[str, Any] | None
+    # Fan-out only: route -> tool result, for sources that finished in time
+    tool_results: Dict[str, Any] | None
     final_answer: str | None
 
 
@@ -51,115 +98,205 @@ class GraphState(TypedDict):
 # ======================================================
 
 def router_node(state: GraphState) -> GraphState:
-    router = RouterNode()
-    state["route"] = router.route(
-        state["user_message"],
-        state["conversation_history"],
-    ).value
+    matches = get_router().matches(state["user_message"])
+    state["route"] = (matches[0] if matches else Route.LLM).value
+    state["routes"] = [route.value for route in matches]
     return state
 
 
-def postgres_node(state: GraphState) -> GraphState:
+async def arouter_node(state: GraphState) -> GraphState:
+    # A single regex pass: cheaper inline than on an executor
+    return router_node(state)
+
+
+def is_fanout(routes: List[str]) -> bool:
     """
-    Execute Postgres queries for ticket or customer requests.
+    Ambiguous messages (several matching routes) fan out when enabled.
+    """
+    return len(routes) > 1 and load_fanout_config().enabled
+
+
+BEST_EFFORT_LOOKUPS = {"tickets_by_customer_name"}
+
+
+def plan_postgres_lookup(message: str) -> Optional[Tuple[str, Tuple[Any, ...]]]:
+    """
+    Pick the QUERY_CATALOG entry and parameters for a message.
     Cleans punctuation from customer names to prevent query failures.
     """
-    tool = PostgresTool()
-    message = state["user_message"].lower()
+    message = message.lower()
 
     # 1. Ticket status by ID
     if "ticket" in message:
         match = re.search(r'ticket\s*#?(\d+)', message)
         if match:
-            ticket_id = match.group(1)
-            query = "SELECT id, issue, status FROM tickets WHERE id = %s"
-            state["tool_result"] = tool.run_query(query, (ticket_id,))
-            return state
+            return "ticket_by_id", (int(match.group(1)),)
 
     # 2. Customer city/location info
     if "city" in message or "from" in message:
         id_match = re.search(r'customer\s*(\d+)', message)
         if id_match:
-            cust_id = id_match.group(1)
-            query = "SELECT name, city FROM customers WHERE id = %s"
-            state["tool_result"] = tool.run_query(query, (cust_id,))
-            return state
+            return "customer_city_by_id", (int(id_match.group(1)),)
 
     # 3. Tickets by customer name (NOW WITH PUNCTUATION FIX)
     if "customer" in message:
+        raw_name = message.split("customer", 1)[1].strip()
+        # Remove full stops or other punctuation from the name
+        clean_name = raw_name.translate(str.maketrans('', '', string.punctuation)).title()
+        return "tickets_by_customer_name", (clean_name,)
+
+    return None
+
+
+def postgres_node(state: GraphState) -> GraphState:
+    """
+    Execute Postgres queries for ticket or customer requests.
+    """
+    lookup = plan_postgres_lookup(state["user_message"])
+    state["tool_result"] = None
+
+    if lookup is not None:
+        name, params = lookup
         try:
-            raw_name = message.split("customer", 1)[1].strip()
-            # Remove full stops or other punctuation from the name
-            clean_name = raw_name.translate(str.maketrans('', '', string.punctuation)).title()
-
-            query = """
-            SELECT t.id, t.issue, t.status
-            FROM tickets t
-            JOIN customers c ON t.customer_id = c.id
-            WHERE c.name = %s
-            """
-            state["tool_result"] = tool.run_query(query, (clean_name,))
-            return state
+            state["tool_result"] = get_registry().postgres().run_named(name, params)
         except Exception:
-            pass
+            # Name lookups parse free text and are best-effort
+            if name not in BEST_EFFORT_LOOKUPS:
+                raise
 
+    return state
+
+
+async def apostgres_node(state: GraphState) -> GraphState:
+    """
+    Async postgres_node: asyncpg (or the I/O executor), bounded per route.
+    """
+    lookup = plan_postgres_lookup(state["user_message"])
     state["tool_result"] = None
+
+    if lookup is not None:
+        name, params = lookup
+        async with get_runtime().route_limit(Route.POSTGRES.value):
+            try:
+                state["tool_result"] = await get_registry().async_postgres().run_named(
+                    name, params
+                )
+            except Exception:
+                if name not in BEST_EFFORT_LOOKUPS:
+                    raise
+
     return state
 
 
 def vector_node(state: GraphState) -> GraphState:
-    tool = VectorSearchTool()
+    tool = get_registry().vector()
     result = tool.search(state["user_message"])
     state["tool_result"] = result if result["documents"] else None
     return state
 
 
-def external_node(state: GraphState) -> GraphState:
+async def avector_node(state: GraphState) -> GraphState:
     """
-    Dynamically detects tool type for ExternalMockTool.
+    Async vector_node: encode + scoring run on the bounded CPU executor.
     """
-    tool = ExternalMockTool()
-    msg = state["user_message"].lower()
+    runtime = get_runtime()
+    async with runtime.route_limit(Route.VECTOR.value):
+        return await runtime.run_cpu(vector_node, state)
+
+
+def external_tool_type(message: str) -> str:
+    msg = message.lower()
 
     # Detect crypto vs weather based on keywords
-    tool_type = "crypto" if any(kw in msg for kw in ["bitcoin", "btc", "crypto", "price"]) else "weather"
+    return "crypto" if any(kw in msg for kw in ["bitcoin", "btc", "crypto", "price"]) else "weather"
+
+
+def external_node(state: GraphState) -> GraphState:
+    """
+    Dynamically detects tool type for ExternalMockTool.
+    """
+    tool = get_registry().external()
+    tool_type = external_tool_type(state["user_message"])
 
     state["tool_result"] = tool.run(tool_type, state["user_message"])
     return state
 
 
-def llm_node(state: GraphState) -> GraphState:
+def format_tool_result(tool_result: Dict[str, Any]) -> Optional[str]:
     """
-    Final response node with deterministic formatting.
+    Deterministic answer text for one tool result.
     """
-    tool_result = state.get("tool_result")
-    user_msg = state["user_message"].lower()
-
-    if tool_result and "rows" in tool_result:
+    if "rows" in tool_result:
         rows = tool_result["rows"]
         if not rows:
-            state["final_answer"] = "No tickets or customer data found."
-            return state
+            return "No tickets or customer data found."
 
         first_row = rows[0]
         if "issue" in first_row:
-            state["final_answer"] = "\n".join(
+            return "\n".join(
                 f"Ticket #{r['id']} — {r['issue']} (Status: {r['status']})"
                 for r in rows
             )
-        elif "city" in first_row:
-            state["final_answer"] = f"Customer {first_row['name']} is from {first_row['city']}."
-        return state
+        if "city" in first_row:
+            return f"Customer {first_row['name']} is from {first_row['city']}."
+        return None
 
-    if tool_result and "documents" in tool_result:
-        content = tool_result["documents"][0]["content"]
+    if "documents" in tool_result:
+        top = tool_result["documents"][0]
+        if "source" in top:
+            # A passage from an ingested document: quote it and cite it
+            return f"{top['content']}\n\nSource: {citation(top)}"
+
+        content = top["content"]
         if ":" in content:
             content = content.split(":", 1)[1].strip()
-        state["final_answer"] = content
-        return state
+        return content
+
+    if "result" in tool_result:
+        return tool_result["result"]
+
+    return None
+
+
+def _merge_tool_results(routes: List[str], tool_results: Dict[str, Any]) -> Optional[str]:
+    """
+    Join the answers of every fan-out source that found something,
+    in route priority order.
+    """
+    parts = []
+    empty_rows = False
+    for route in routes:
+        result = tool_results.get(route)
+        if not result:
+            continue
+        if "rows" in result and not result["rows"]:
+            empty_rows = True
+            continue
+        text = format_tool_result(result)
+        if text:
+            parts.append(text)
+
+    if parts:
+        return "\n\n".join(parts)
+    return "No tickets or customer data found." if empty_rows else None
+
+
+def llm_node(state: GraphState) -> GraphState:
+    """
+    Final response node with deterministic formatting.
+    """
+    tool_result = state.get("tool_result")
+    tool_results = state.get("tool_results")
+    user_msg = state["user_message"].lower()
 
-    if tool_result and "result" in tool_result:
-        state["final_answer"] = tool_result["result"]
+    if tool_results:
+        answer = _merge_tool_results(state.get("routes") or [], tool_results)
+        if answer:
+            state["final_answer"] = answer
+            return state
+
+    if tool_result and any(key in tool_result for key in ("rows", "documents", "result")):
+        state["final_answer"] = format_tool_result(tool_result)
         return state
 
     system_keywords = ["explain this system", "what can you do", "how do you work"]
@@ -171,29 +308,167 @@ def llm_node(state: GraphState) -> GraphState:
         )
         return state
 
+    # Open-ended questions go to the local model when it is loaded
+    if LLM_AVAILABLE and state.get("route") == Route.LLM.value:
+        answer = generate_answer(state["user_message"])
+        if answer:
+            state["final_answer"] = answer
+            return state
+
     state["final_answer"] = "I don't have enough information to answer that."
     return state
 
 
-def build_graph():
+async def aexternal_node(state: GraphState) -> GraphState:
+    async with get_runtime().route_limit(Route.EXTERNAL.value):
+        return external_node(state)
+
+
+async def allm_node(state: GraphState) -> GraphState:
+    """
+    Async llm_node. Generation runs on the LLM engine's own thread; the
+    blocking wait for its tokens sits on the I/O executor.
+    """
+    if not LLM_AVAILABLE:
+        return llm_node(state)
+
+    runtime = get_runtime()
+    async with runtime.route_limit(Route.LLM.value):
+        return await runtime.run_io(llm_node, state)
+
+
+# Route -> (sync node, async node) for fan-out
+_TOOL_NODES = {
+    Route.POSTGRES.value: (postgres_node, apostgres_node),
+    Route.VECTOR.value: (vector_node, avector_node),
+    Route.EXTERNAL.value: (external_node, aexternal_node),
+}
+
+
+def _fanout_results(routes: List[str], outcomes: Dict[str, Any]) -> Dict[str, Any]:
+    results = {}
+    for route in routes:
+        outcome = outcomes.get(route)
+        if outcome is None:
+            logger.info("Fan-out source %s missed the deadline", route)
+        elif isinstance(outcome, BaseException):
+            logger.warning("Fan-out source %s failed: %s", route, outcome)
+        else:
+            results[route] = outcome["tool_result"]
+    return results
+
+
+def fanout_node(state: GraphState) -> GraphState:
+    """
+    Run every matched tool node concurrently; keep what finishes by the
+    FANOUT_DEADLINE_MS deadline.
+    """
+    routes = state["routes"]
+    executor = get_runtime().io_executor
+    futures = {
+        executor.submit(contextvars.copy_context().run, _TOOL_NODES[route][0], dict(state)): route
+        for route in routes
+    }
+    done, _ = concurrent.futures.wait(
+        futures, timeout=load_fanout_config().deadline_ms / 1000.0
+    )
+
+    outcomes = {
+        futures[future]: future.exception() or future.result() for future in done
+    }
+    state["tool_result"] = None
+    state["tool_results"] = _fanout_results(routes, outcomes)
+    return state
+
+
+async def afanout_node(state: GraphState) -> GraphState:
+    """
+    Async fan-out: latency is the slowest source that made the deadline,
+    not the sum of all of them.
+    """
+    routes = state["routes"]
+    tasks = {
+        asyncio.ensure_future(_TOOL_NODES[route][1](dict(state))): route for route in routes
+    }
+    done, pending = await asyncio.wait(
+        tasks, timeout=load_fanout_config().deadline_ms / 1000.0
+    )
+    for task in pending:
+        task.cancel()
+
+    outcomes = {tasks[task]: task.exception() or task.result() for task in done}
+    state["tool_result"] = None
+    state["tool_results"] = _fanout_results(routes, outcomes)
+    return state
+
+
+def _timed(name: str, func):
+    """
+    Record the node's latency under the route it ran for.
+    """
+    @functools.wraps(func)
+    def wrapper(state: GraphState) -> GraphState:
+        started = time.perf_counter()
+        try:
+            return func(state)
+        finally:
+            observe_node(name, state.get("route"), time.perf_counter() - started)
+
+    return wrapper
+
+
+def _atimed(name: str, afunc):
+    @functools.wraps(afunc)
+    async def wrapper(state: GraphState) -> GraphState:
+        started = time.perf_counter()
+        try:
+            return await afunc(state)
+        finally:
+            observe_node(name, state.get("route"), time.perf_counter() - started)
+
+    return wrapper
+
+
+def _node(name: str, func, afunc) -> RunnableLambda:
+    # One timed node, usable from both graph.invoke and graph.ainvoke
+    return RunnableLambda(_timed(name, func), afunc=_atimed(name, afunc), name=func.__name__)
+
+
+def build_graph(warmup: bool = False):
+    """
+    Compile the support graph.
+
+    Tool nodes share the process-wide ToolRegistry, so tools are
+    built once and reused across invocations. Each tool node also has
+    an async variant used by graph.ainvoke.
+
+    Args:
+        warmup: Build every tool now instead of on first use.
+    """
+    if warmup:
+        get_registry().warmup()
+
     graph = StateGraph(GraphState)
-    graph.add_node("router", router_node)
-    graph.add_node("postgres", postgres_node)
-    graph.add_node("vector", vector_node)
-    graph.add_node("external", external_node)
-    graph.add_node("llm", llm_node)
+    graph.add_node("router", _node("router", router_node, arouter_node))
+    graph.add_node("postgres", _node("postgres", postgres_node, apostgres_node))
+    graph.add_node("vector", _node("vector", vector_node, avector_node))
+    graph.add_node("external", _node("external", external_node, aexternal_node))
+    graph.add_node("fanout", _node("fanout", fanout_node, afanout_node))
+    graph.add_node("llm", _node("llm", llm_node, allm_node))
 
     graph.set_entry_point("router")
     graph.add_conditional_edges(
         "router",
-        lambda s: s["route"],
+        lambda s: "fanout" if is_fanout(s.get("routes") or []) else s["route"],
         {
             Route.POSTGRES.value: "postgres",
             Route.VECTOR.value: "vector",
             Route.EXTERNAL.value: "external",
             Route.LLM.value: "llm",
+            "fanout": "fanout",
         },
     )
+    graph.add_edge("fanout", "llm")
     graph.add_edge("postgres", "llm")
     graph.add_edge("vector", "llm")
     graph.add_edge("external", "llm")
@@ -0,0 +1,99 @@
+"""
+Async runtime for the graph.
+
+Responsibilities:
+- Bounded CPU executor for embedding / generation work
+- Separate I/O executor for blocking database calls
+- Per-route concurrency limits so one route cannot starve another
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import threading
+from typing import Any, Callable, Dict, Optional, TypeVar
+import weakref
+
+from config.settings import load_runtime_config
+
+T = TypeVar("T")
+RouteSemaphores = Dict[str, asyncio.Semaphore]
+
+
+class Runtime:
+    """
+    Executors and per-route semaphores shared by the async nodes.
+    """
+
+    def __init__(self) -> None:
+        config = load_runtime_config()
+        self._route_limits = dict(config.route_limits)
+
+        self.cpu_executor = ThreadPoolExecutor(
+            max_workers=config.cpu_workers, thread_name_prefix="graph-cpu"
+        )
+        self.io_executor = ThreadPoolExecutor(
+            max_workers=config.io_workers, thread_name_prefix="graph-io"
+        )
+
+        # asyncio primitives belong to one loop; keep a set per loop
+        self._semaphores: "weakref.WeakKeyDictionary[Any, RouteSemaphores]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def route_limit(self, route: str) -> asyncio.Semaphore:
+        """
+        Semaphore bounding concurrent work for one route on the current loop.
+        """
+        loop = asyncio.get_running_loop()
+        semaphores = self._semaphores.setdefault(loop, {})
+        semaphore = semaphores.get(route)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self._route_limits.get(route, 16))
+            semaphores[route] = semaphore
+        return semaphore
+
+    async def run_cpu(self, func: Callable[..., T], *args: Any) -> T:
+        return await self._run(self.cpu_executor, func, *args)
+
+    async def run_io(self, func: Callable[..., T], *args: Any) -> T:
+        return await self._run(self.io_executor, func, *args)
+
+    @staticmethod
+    async def _run(executor: ThreadPoolExecutor, func: Callable[..., T], *args: Any) -> T:
+        # Copy context so graph config (e.g. the stream writer) follows the call
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(executor, context.run, func, *args)
+
+    def shutdown(self) -> None:
+        self.cpu_executor.shutdown(wait=False, cancel_futures=True)
+        self.io_executor.shutdown(wait=False, cancel_futures=True)
+
+
+_runtime: Optional[Runtime] = None
+_runtime_lock = threading.Lock()
+
+
+def get_runtime() -> Runtime:
+    global _runtime
+
+    if _runtime is None:
+        with _runtime_lock:
+            if _runtime is None:
+                _runtime = Runtime()
+
+    return _runtime
+
+
+def shutdown_runtime() -> None:
+    """
+    Stop the executors; the next get_runtime() builds fresh ones.
+    """
+    global _runtime
+
+    with _runtime_lock:
+        runtime, _runtime = _runtime, None
+
+    if runtime is not None:
+        runtime.shutdown()
@@ -1,5 +1,10 @@
 from enum import Enum
-from typing import List
+import json
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Pattern, Sequence, Tuple
+
+from config.settings import load_router_config
 
 
 class Route(Enum):
@@ -9,31 +14,140 @@ class Route(Enum):
     LLM = "llm"
 
 
+# Ordered (route, phrases); earlier tables win
+KeywordTables = Sequence[Tuple[Route, Sequence[str]]]
+
+
+def load_keyword_tables(path: Optional[str] = None) -> List[Tuple[Route, List[str]]]:
+    """
+    Read the ordered keyword tables from the router config file.
+    """
+    path = path or load_router_config().keywords_path
+    with open(path, encoding="utf-8") as handle:
+        config = json.load(handle)
+
+    return [
+        (Route(entry["route"]), [phrase.lower() for phrase in entry["keywords"]])
+        for entry in config["routes"]
+    ]
+
+
+def _trie_pattern(phrases: Iterable[str]) -> str:
+    """
+    Regex alternation shaped like a prefix trie.
+
+    Each position costs O(phrase length) instead of O(phrase count), and
+    greedy optionals make the longest phrase starting there win.
+    """
+    trie: Dict[str, dict] = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def serialize(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + serialize(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = "(?:" + "|".join(branches) + ")"
+        return body + "?" if "" in node else body
+
+    return serialize(trie)
+
+
 class RouterNode:
     """
     Deterministic rule-based router.
     Strictly follows priority to ensure knowledge base queries
     aren't trapped by database keywords.
+
+    All keyword tables are compiled into one regex and scanned in a
+    single pass. The result is exactly the first table (in config order)
+    with any phrase occurring as a substring, else LLM.
     """
 
+    def __init__(self, tables: Optional[KeywordTables] = None) -> None:
+        tables = load_keyword_tables() if tables is None else tables
+        self._routes = [route for route, _ in tables]
+
+        # Best (lowest) table index per phrase
+        priority: Dict[str, int] = {}
+        for rank, (_, phrases) in enumerate(tables):
+            for phrase in phrases:
+                if phrase:
+                    priority.setdefault(phrase, rank)
+
+        # The scan reports the longest phrase at each position; shorter
+        # phrases starting there are its prefixes, so fold them in
+        self._ranks = {
+            phrase: frozenset(
+                rank for other, rank in priority.items() if phrase.startswith(other)
+            )
+            for phrase in priority
+        }
+        self._priority = {phrase: min(ranks) for phrase, ranks in self._ranks.items()}
+
+        # Zero-width lookahead so overlapping phrases are all seen
+        self._pattern: Optional[Pattern[str]] = None
+        if priority:
+            self._pattern = re.compile(f"(?=({_trie_pattern(priority)}))")
+
     def route(self, message: str, history: List[str]) -> Route:
-        text = message.lower()
-
-        # 1. VECTOR DB PRIORITY (Policies/Guides/Escalation)
-        # Check this first so "Ticket Escalation Policy" goes to Vector, not Postgres.
-        if any(phrase in text for phrase in (
-                "how do i", "help", "policy", "guide", "explain",
-                "support", "password", "reset", "refund", "escalation"
-        )):
-            return Route.VECTOR
-
-        # 2. POSTGRES SIGNAL WORDS (Customer/Ticket Data)
-        if any(kw in text for kw in ["customer", "ticket", "issue", "status", "account", "id", "city"]):
-            return Route.POSTGRES
-
-        # 3. EXTERNAL TOOL SIGNAL WORDS (Weather/Crypto)
-        if any(kw in text for kw in ["weather", "temperature", "price", "crypto", "bitcoin"]):
-            return Route.EXTERNAL
-
-        # 4. LLM DEFAULT
-        return Route.LLM
+        if self._pattern is None:
+            return Route.LLM
+
+        best = len(self._routes)
+        for match in self._pattern.finditer(message.lower()):
+            rank = self._priority[match.group(1)]
+            if rank < best:
+                best = rank
+                if best == 0:
+                    break
+
+        # Fall through to the LLM when no table matched
+        return self._routes[best] if best < len(self._routes) else Route.LLM
+
+    def matches(self, message: str) -> List[Route]:
+        """
+        Every route whose table matches, in priority order (empty = LLM).
+
+        More than one entry means the message is ambiguous.
+        """
+        if self._pattern is None:
+            return []
+
+        ranks = set()
+        for match in self._pattern.finditer(message.lower()):
+            ranks |= self._ranks[match.group(1)]
+
+        routes: List[Route] = []
+        for rank in sorted(ranks):
+            if self._routes[rank] not in routes:
+                routes.append(self._routes[rank])
+        return routes
+
+    def route_many(self, messages: Iterable[str]) -> List[Route]:
+        """
+        Route a batch of messages (no history), preserving order.
+        """
+        route = self.route
+        return [route(message, []) for message in messages]
+
+
+_router: Optional[RouterNode] = None
+_router_lock = threading.Lock()
+
+
+def get_router() -> RouterNode:
+    """
+    Return the shared router; keyword tables are compiled once per process.
+    """
+    global _router
+
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = RouterNode()
+
+    return _router
@@ -0,0 +1,48 @@
+"""
+Final Answer Cache Tests
+
+Purpose:
+- Per-route opt-in and normalized-message keys
+- Data version changes invalidate automatically
+- Answers computed across a data change are not stored
+"""
+
+from graph.answer_cache import AnswerCache
+
+
+def run_answer_cache_tests() -> None:
+    versions = {"vector": "index-a", "external": "mock-1", "postgres": None}
+    cache = AnswerCache(["vector", "postgres"], max_size=8, version=versions.get)
+
+    # 1. Miss, store, then a hit for a differently punctuated message
+    answer, key = cache.lookup("vector", "What is the refund policy?")
+    assert answer is None and key is not None
+    cache.store(key, "Refunds within 30 days.")
+    answer, _ = cache.lookup("vector", "what is the  refund policy")
+    assert answer == "Refunds within 30 days."
+    print("✔ Normalized hit")
+
+    # 2. Routes that did not opt in, or without a data version, bypass
+    assert cache.lookup("external", "weather") == (None, None)
+    assert cache.lookup("postgres", "ticket 2") == (None, None)
+    print("✔ Per-route opt-in")
+
+    # 3. A new article index hash invalidates
+    versions["vector"] = "index-b"
+    answer, key = cache.lookup("vector", "What is the refund policy?")
+    assert answer is None
+    print("✔ Version change invalidates")
+
+    # 4. Data changed while the graph ran: do not store
+    versions["vector"] = "index-c"
+    cache.store(key, "stale")
+    versions["vector"] = "index-b"
+    assert cache.lookup("vector", "What is the refund policy?")[0] is None
+    assert cache.stats()["stale_skips"] == 1
+    print("✔ Stale answers not stored")
+
+
+if __name__ == "__main__":
+    print("=== ANSWER CACHE TESTS START ===")
+    run_answer_cache_tests()
+    print("\n=== ANSWER CACHE TESTS PASSED ===")
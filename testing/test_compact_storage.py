@@ -0,0 +1,120 @@
+"""
+Compact Vector Storage Tests
+
+Purpose:
+- float16 / int8 storage holds 1/2 / ~1/4 of the fp32 bytes
+- Blocked scoring on the compact copy finds the exact top-k
+- The fp32 re-rank returns exact cosine scores
+- The search tool answers the same with an int8 engine
+- create_backend passes VECTOR_RERANK to the IVF engine
+
+Runs offline with synthetic vectors and the hashing encoder.
+"""
+
+import dataclasses
+import tempfile
+
+import numpy as np
+
+from benchmarks.bench_retrieval import synthetic_corpus
+from benchmarks.standins import HashingEmbedder
+from tools.embedding_cache import EmbeddingCache
+from config.settings import load_retrieval_config
+from tools.retrieval import BLOCK_ROWS, ExactBackend, _widen_float16, create_backend
+from tools.vector_tool import VectorSearchTool
+
+
+def run_compact_storage_tests() -> None:
+    # 1. Storage size and float16 widening
+    embeddings = synthetic_corpus(2 * BLOCK_ROWS + 500, 64)
+    rng = np.random.default_rng(3)
+    queries = embeddings[rng.integers(0, embeddings.shape[0], 16)]
+    queries = queries + 0.2 * rng.standard_normal(queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    exact = ExactBackend()
+    exact.build(embeddings)
+    truth = exact.query_batch(queries, 10)
+    assert exact.memory_bytes() == embeddings.nbytes
+
+    half = embeddings[:100].astype(np.float16)
+    half[0, :3] = [0.0, -1e-6, 3e-5]  # zero and subnormals widen exactly too
+    widened = _widen_float16(half, np.empty(half.shape, dtype=np.int32)) * 2.0 ** 112
+    assert np.array_equal(widened, half.astype(np.float32))
+    print("✔ float16 widening is exact")
+
+    # 2. Compact scoring across blocks, with and without re-rank
+    for storage, ratio in (("float16", 2), ("int8", 3.5)):
+        approximate = ExactBackend(storage, rerank=0)
+        approximate.build(embeddings)
+        assert embeddings.nbytes / approximate.memory_bytes() >= ratio
+
+        reranked = ExactBackend(storage, rerank=4)
+        reranked.build(embeddings)
+        for query, (indices, scores) in zip(queries, truth):
+            rows, values = approximate.query(query, 10)
+            assert len(set(rows.tolist()) & set(indices.tolist())) >= 8
+            assert np.allclose(values, embeddings[rows] @ query, atol=1e-2)
+
+        for (rows, values), (indices, scores) in zip(reranked.query_batch(queries, 10), truth):
+            assert rows.tolist() == indices.tolist()
+            assert np.allclose(values, scores, atol=1e-6)
+    print("✔ float16 / int8 storage: blocked scoring and exact re-rank")
+
+    # 3. Edge cases
+    empty = ExactBackend("int8", rerank=4)
+    empty.build(np.empty((0, 64), dtype=np.float32))
+    assert empty.query(queries[0], 3)[0].size == 0
+    try:
+        ExactBackend("bfloat16")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("unknown storage must be rejected")
+    print("✔ Empty index and unknown storage")
+
+    # 4. Search tool on int8 storage
+    with tempfile.TemporaryDirectory() as index_dir:
+        results, sizes = [], []
+        for backend in (ExactBackend(), ExactBackend("int8", rerank=4)):
+            tool = VectorSearchTool(
+                query_cache=EmbeddingCache("test-hashing", capacity=0),
+                backend=backend,
+                model=HashingEmbedder(),
+                model_name="test-hashing",
+                index_dir=index_dir,
+            )
+            try:
+                results.append([
+                    tool.search(query)["documents"]
+                    for query in ("reset password link", "refund policy", "tickets after 48 hours")
+                ])
+                sizes.append(tool.index_stats()["vector_bytes"])
+            finally:
+                tool.close()
+        assert results[0] == results[1] and any(results[0])
+        assert sizes[0] > 3 * sizes[1] > 0
+    print("✔ Search tool results unchanged on int8 storage")
+
+    # 5. IVF int8 scoring honours the re-rank setting
+    config = dataclasses.replace(load_retrieval_config(), backend="ivf", ivf_nlist=8, ivf_nprobe=8)
+    indices, scores = truth[0]
+    for rerank in (0, 4):
+        ivf = create_backend(dataclasses.replace(config, rerank=rerank))
+        ivf.build(embeddings)
+        rows, values = ivf.query(queries[0], 10)
+        if rerank:
+            assert rows.tolist() == indices.tolist()
+            assert np.allclose(values, scores, atol=1e-6)
+        else:
+            assert len(set(rows.tolist()) & set(indices.tolist())) >= 8
+            exact_values = embeddings[rows] @ queries[0]
+            assert np.allclose(values, exact_values, atol=1e-2)
+            assert not np.allclose(values, exact_values, atol=1e-6)  # int8 scores, not re-ranked
+    print("✔ IVF re-rank follows VECTOR_RERANK")
+
+
+if __name__ == "__main__":
+    print("=== COMPACT STORAGE TESTS START ===")
+    run_compact_storage_tests()
+    print("\n=== COMPACT STORAGE TESTS PASSED ===")
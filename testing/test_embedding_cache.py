@@ -0,0 +1,61 @@
+"""
+Query Embedding Cache Tests
+
+Purpose:
+- Normalized queries share one entry
+- LRU evicts the least recently used entry
+- LFU keeps a hot entry, but counts age so new queries can replace
+  one that has gone cold
+"""
+
+import numpy as np
+
+from tools.embedding_cache import EmbeddingCache
+
+
+def _vector(value: float) -> np.ndarray:
+    return np.full(4, value, dtype=np.float32)
+
+
+def run_embedding_cache_tests() -> None:
+    # 1. Normalized keys, read-only copies
+    cache = EmbeddingCache("test", capacity=2)
+    stored = cache.put("How do I reset my password?", _vector(1.0))
+    assert not stored.flags.writeable
+    assert cache.get("how do i  reset my password") is stored
+    assert cache.stats()["hits"] == 1
+    print("✔ Normalized query keys")
+
+    # 2. LRU
+    cache = EmbeddingCache("test", capacity=2, eviction="lru")
+    cache.put("a", _vector(1.0))
+    cache.put("b", _vector(2.0))
+    cache.get("a")
+    cache.put("c", _vector(3.0))
+    assert cache.get("b") is None and cache.get("a") is not None
+    print("✔ LRU eviction")
+
+    # 3. LFU: least frequent goes first, the least recent among ties
+    cache = EmbeddingCache("test", capacity=3, eviction="lfu")
+    cache.put("hot", _vector(1.0))
+    for _ in range(3):
+        cache.get("hot")
+    cache.put("x", _vector(2.0))
+    cache.put("y", _vector(3.0))
+    cache.put("z", _vector(4.0))
+    assert cache.get("x") is None
+    print("✔ LFU keeps the frequently used entry")
+
+    # 4. LFU counts age: a query nobody asks again is eventually replaced
+    for query in ("q1", "q2"):
+        cache.put(query, _vector(5.0))
+    assert cache.get("hot") is None
+    assert cache.get("q2") is not None
+    assert cache.stats()["evictions"] == 3
+    print("✔ LFU counts age")
+
+
+if __name__ == "__main__":
+    print("=== EMBEDDING CACHE TESTS START ===")
+    run_embedding_cache_tests()
+    print("\n=== EMBEDDING CACHE TESTS PASSED ===")
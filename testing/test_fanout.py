@@ -0,0 +1,98 @@
+"""
+Fan-out Tests
+
+Purpose:
+- Ambiguous messages query every matched source concurrently
+- Answers merge in route priority order
+- Sources that miss the deadline or fail are dropped, not fatal
+
+Tool nodes are replaced with stubs, so no database or model is needed.
+"""
+
+import asyncio
+import os
+import time
+
+from graph import graph_builder
+from graph.graph_builder import afanout_node, fanout_node, llm_node
+
+
+def _stub(route: str, result, delay: float = 0.0, error: bool = False):
+    def finish(state):
+        if error:
+            raise RuntimeError(f"{route} down")
+        state["tool_result"] = result
+        return state
+
+    def node(state):
+        time.sleep(delay)
+        return finish(state)
+
+    async def anode(state):
+        await asyncio.sleep(delay)
+        return finish(state)
+
+    return node, anode
+
+
+def _state(routes):
+    return {
+        "user_message": "refund policy and bitcoin price for ticket 2",
+        "conversation_history": [],
+        "route": routes[0],
+        "routes": routes,
+        "tool_result": None,
+        "tool_results": None,
+        "final_answer": None,
+    }
+
+
+def run_fanout_tests() -> None:
+    os.environ["FANOUT_DEADLINE_MS"] = "300"
+    original = dict(graph_builder._TOOL_NODES)
+    graph_builder._TOOL_NODES.update({
+        "vector": _stub("vector", {"documents": [{"content": "Refunds: within 14 days."}]}, delay=0.1),
+        "external": _stub("external", {"result": "Bitcoin price is $30,000."}, delay=0.1),
+        "postgres": _stub("postgres", {"rows": []}, delay=0.1),
+    })
+
+    try:
+        # 1. Sources run concurrently and merge in priority order
+        started = time.perf_counter()
+        state = asyncio.run(afanout_node(_state(["vector", "external"])))
+        assert time.perf_counter() - started < 0.19
+        answer = llm_node(state)["final_answer"]
+        assert answer == "within 14 days.\n\nBitcoin price is $30,000.", answer
+        print("✔ Async fan-out runs sources concurrently")
+
+        state = fanout_node(_state(["vector", "external"]))
+        assert llm_node(state)["final_answer"] == answer
+        print("✔ Sync fan-out merges the same answer")
+
+        # 2. Empty rows only count when nothing else was found
+        state = fanout_node(_state(["vector", "postgres"]))
+        assert llm_node(state)["final_answer"] == "within 14 days."
+        state = fanout_node(_state(["postgres"]))
+        assert llm_node(state)["final_answer"] == "No tickets or customer data found."
+        print("✔ Empty results yield to sources with data")
+
+        # 3. Slow and failing sources are dropped by the deadline
+        graph_builder._TOOL_NODES["external"] = _stub("external", {"result": "late"}, delay=1.0)
+        graph_builder._TOOL_NODES["postgres"] = _stub("postgres", None, error=True)
+        for run in (fanout_node, lambda s: asyncio.run(afanout_node(s))):
+            started = time.perf_counter()
+            state = run(_state(["vector", "postgres", "external"]))
+            assert time.perf_counter() - started < 0.6
+            assert set(state["tool_results"]) == {"vector"}
+            assert llm_node(state)["final_answer"] == "within 14 days."
+        print("✔ Deadline and source failures handled")
+    finally:
+        graph_builder._TOOL_NODES.clear()
+        graph_builder._TOOL_NODES.update(original)
+        os.environ.pop("FANOUT_DEADLINE_MS", None)
+
+
+if __name__ == "__main__":
+    print("=== FAN-OUT TESTS START ===")
+    run_fanout_tests()
+    print("\n=== FAN-OUT TESTS PASSED ===")
@@ -0,0 +1,95 @@
+"""
+Conversation History Store Tests
+
+Purpose:
+- History is kept per session and bounded per session
+- Session cap and idle eviction bound total memory
+- SQLite write-behind is visible to the writer and, after flush, to others
+- The write-behind queue is bounded and drops its oldest messages
+"""
+
+import os
+import tempfile
+
+from api.history import InMemoryHistoryStore, SQLiteHistoryStore
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def run_history_tests() -> None:
+    clock = _Clock()
+    store = InMemoryHistoryStore(max_messages=3, max_sessions=2, idle_seconds=60, clock=clock)
+
+    # 1. Sessions are isolated and trimmed to max_messages
+    for i in range(5):
+        store.append("a", f"a{i}")
+    assert store.append("b", "b0") == ["b0"]
+    assert store.get("a") == ["a2", "a3", "a4"]
+    print("✔ Per-session bounded history")
+
+    # 2. Session cap evicts the least recently active session
+    store.append("a", "a5")
+    store.append("c", "c0")
+    assert store.get("b") == []
+    assert store.stats()["cap_evictions"] == 1
+    print("✔ Session cap")
+
+    # 3. Idle sessions are evicted
+    clock.now += 61
+    store.append("d", "d0")
+    assert store.get("a") == [] and store.get("c") == []
+    assert store.stats()["sessions"] == 1
+    print("✔ Idle eviction")
+
+    # 4. SQLite write-behind
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "history.sqlite3")
+        writer = SQLiteHistoryStore(path, max_messages=3, flush_interval_ms=60000)
+        other = SQLiteHistoryStore(path, max_messages=3, flush_interval_ms=60000)
+
+        for i in range(4):
+            history = writer.append("s", f"m{i}")
+        assert history == ["m1", "m2", "m3"]
+        assert other.get("s") == []
+        print("✔ Own writes visible before flush")
+
+        assert writer.flush() == 4
+        assert other.get("s") == ["m1", "m2", "m3"]
+        assert other.stats()["messages"] == 3
+        print("✔ Flushed writes shared across stores")
+
+        writer.clear("s")
+        assert other.get("s") == []
+
+        writer.close()
+        other.close()
+
+    # 5. Bounded write-behind queue
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "history.sqlite3")
+        store = SQLiteHistoryStore(path, max_messages=3, flush_interval_ms=60000, max_pending=4)
+
+        for i in range(3):
+            store.append("a", f"a{i}")
+        for i in range(3):
+            store.append("b", f"b{i}")
+        stats = store.stats()
+        assert stats["pending"] == 4 and stats["dropped"] == 2
+        assert store.get("a") == ["a2"] and store.get("b") == ["b0", "b1", "b2"]
+
+        assert store.flush() == 4
+        assert store.get("a") == ["a2"] and store.stats()["pending"] == 0
+        store.close()
+    print("✔ Full queue drops the oldest messages")
+
+
+if __name__ == "__main__":
+    print("=== HISTORY STORE TESTS START ===")
+    run_history_tests()
+    print("\n=== HISTORY STORE TESTS PASSED ===")
@@ -0,0 +1,110 @@
+"""
+Hybrid Search Tests
+
+Purpose:
+- BM25 ranks exact-term matches first and reports query coverage
+- Reciprocal rank fusion merges the lexical and vector rankings
+- Confident exact-term queries are answered without encoding
+- Ambiguous and paraphrased queries still go through the encoder
+- SEARCH_MODE=vector keeps the plain vector behaviour
+
+Runs offline with the hashing encoder from the benchmark stand-ins.
+"""
+
+from dataclasses import replace
+import tempfile
+
+import numpy as np
+
+from benchmarks.standins import HashingEmbedder
+from config.settings import load_search_config
+from tools.embedding_cache import EmbeddingCache
+from tools.lexical import BM25Index, reciprocal_rank_fusion, tokenize
+from tools.vector_tool import VectorSearchTool
+
+
+class CountingEmbedder(HashingEmbedder):
+    def __init__(self) -> None:
+        super().__init__()
+        self.encoded = 0
+
+    def encode(self, sentences, normalize_embeddings=False, **kwargs):
+        self.encoded += 1 if isinstance(sentences, str) else len(sentences)
+        return super().encode(sentences, normalize_embeddings=normalize_embeddings, **kwargs)
+
+
+def run_hybrid_search_tests() -> None:
+    # 1. Tokenizer and BM25 index
+    terms = tokenize("How do I fix ERR-1042 after 48 hours?")
+    assert terms == ["fix", "err-1042", "after", "48", "hour"], terms
+
+    index = BM25Index()
+    index.build([
+        "Escalation: tickets unresolved for 48 hours are escalated.",
+        "Refunds are available within 14 days.",
+        "Ticket tags and ticket priorities.",
+    ])
+    hits = index.search("tickets 48 hours", top_k=3)
+    assert hits.indices.tolist() == [0, 2]
+    assert hits.coverage[0] == 1.0 and 0 < hits.coverage[1] < 0.5
+    assert index.search("airplanes", top_k=3).indices.size == 0
+    coverage = index.coverage("tickets 48 hours", np.array([2, 1, 0]))
+    assert np.allclose(coverage, [hits.coverage[1], 0, 1])
+
+    rows, scores = reciprocal_rank_fusion([np.array([4, 1]), np.array([1, 7])], k=60)
+    assert rows.tolist() == [1, 4, 7] and scores[0] > scores[1] > scores[2]
+    print("✔ BM25 postings, coverage and rank fusion")
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        model = CountingEmbedder()
+
+        def make_tool(**overrides) -> VectorSearchTool:
+            return VectorSearchTool(
+                query_cache=EmbeddingCache("test-hashing", capacity=0),
+                model=model,
+                model_name="test-hashing",
+                index_dir=index_dir,
+                search_config=replace(load_search_config(), **overrides),
+            )
+
+        tool = make_tool(mode="hybrid", fusion="rrf", fast_path=True)
+        try:
+            # 2. Exact terms: answered from BM25, encoder not called
+            model.encoded = 0
+            top = tool.search("Forgot Password")["documents"][0]
+            assert "Forgot Password" in top["content"] and top["score"] == 1.0
+            refund = tool.search("What is your refund policy?")["documents"][0]
+            assert refund["content"].startswith("Refunds")
+            assert model.encoded == 0
+            print("✔ Exact-term queries skip the encoder")
+
+            # 3. Partial or no term overlap: encoded and fused
+            hits = tool.search("tickets unresolved after 48 hours")["documents"]
+            assert hits[0]["content"].startswith("Tickets are escalated")
+            assert tool.search("How do airplanes fly?")["documents"] == []
+            assert model.encoded == 2
+
+            results = tool.search_many(["Forgot Password", "airplanes", "reset password link"])
+            assert [len(result["documents"]) > 0 for result in results] == [True, False, True]
+            assert model.encoded == 3  # only "airplanes"
+            stats = tool.search_stats()
+            assert stats["queries"] == 7 and stats["fast_path"] == 4
+            print("✔ Other queries are encoded and fused")
+        finally:
+            tool.close()
+
+        # 4. Vector-only mode: every query encodes
+        tool = make_tool(mode="vector")
+        try:
+            model.encoded = 0
+            assert tool.search("Forgot Password")["documents"]
+            assert model.encoded == 1 and tool.search_stats()["fast_path"] == 0
+        finally:
+            tool.close()
+        print("✔ Vector-only mode unchanged")
+
+
+if __name__ == "__main__":
+    print("=== HYBRID SEARCH TESTS START ===")
+    run_hybrid_search_tests()
+    print("\n=== HYBRID SEARCH TESTS PASSED ===")
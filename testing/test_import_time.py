@@ -0,0 +1,68 @@
+"""
+Startup Import Budget Check
+
+Purpose:
+- Importing the API must not pull in torch / transformers /
+  sentence-transformers / chromadb (they load on first use)
+- Keep module import time under a budget, measured with -X importtime
+
+Usage:
+    python testing/test_import_time.py
+    IMPORT_BUDGET_MS=800 python testing/test_import_time.py
+"""
+
+import os
+import subprocess
+import sys
+from typing import Dict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ("torch", "transformers", "sentence_transformers", "chromadb")
+
+# Cumulative import budget per entry point (ms)
+BUDGETS_MS = {
+    "api.main": float(os.getenv("IMPORT_BUDGET_MS", "3000")),
+    "router.router_node": 300.0,
+}
+
+
+def import_times(module: str) -> Dict[str, float]:
+    """
+    Import a module in a fresh interpreter; return {module: cumulative ms}.
+    """
+    env = dict(os.environ, PYTHONPATH=ROOT, LLM_AVAILABLE="false")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    times: Dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative) / 1000.0
+    return times
+
+
+def run_import_time_tests() -> None:
+    for module, budget_ms in BUDGETS_MS.items():
+        times = import_times(module)
+
+        loaded = [name for name in HEAVY_MODULES if name in times]
+        assert not loaded, f"{module} imports {loaded} at startup"
+
+        elapsed = times[module]
+        assert elapsed <= budget_ms, f"{module} took {elapsed:.0f} ms (budget {budget_ms:.0f} ms)"
+        print(f"✔ {module}: {elapsed:.0f} ms (budget {budget_ms:.0f} ms)")
+
+
+if __name__ == "__main__":
+    print("=== IMPORT TIME TESTS START ===")
+    run_import_time_tests()
+    print("\n=== IMPORT TIME TESTS PASSED ===")
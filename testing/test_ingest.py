@@ -0,0 +1,139 @@
+"""
+Document Ingestion Tests
+
+Purpose:
+- Markdown and HTML are reduced to their visible text
+- Chunks overlap, end on word boundaries and carry exact offsets
+- The pipeline embeds each new chunk once, inline or in a process pool
+- Answers built from ingested chunks cite their source
+- Chunk ids are unique per source and never overwrite other articles
+
+Runs offline with the hashing encoder from the benchmark stand-ins.
+"""
+
+import os
+import tempfile
+
+from benchmarks.standins import HashingEmbedder
+from config.settings import IngestConfig
+from graph.graph_builder import format_tool_result
+from tools.embedding_cache import EmbeddingCache
+from tools.ingest import Chunk, TextBlock, chunk_blocks, extract, ingest
+from tools.knowledge_base import ArticleStore
+from tools.vector_tool import VectorSearchTool
+
+MARKDOWN = """# Shipping Guide
+
+Orders ship within **2 business days**. Track them in [the portal](https://example.com).
+
+![diagram](shipping.png)
+"""
+
+HTML = """<html><head><style>p { color: red; }</style><script>var x = 1;</script></head>
+<body><h1>Warranty FAQ</h1>
+<p>Hardware warranty claims need the   serial number &amp; proof of purchase.</p>
+</body></html>
+"""
+
+
+def run_ingest_tests() -> None:
+    with tempfile.TemporaryDirectory() as work_dir:
+        source_dir = os.path.join(work_dir, "manuals")
+        os.makedirs(source_dir)
+        for name, body in (("shipping.md", MARKDOWN), ("warranty.html", HTML)):
+            with open(os.path.join(source_dir, name), "w", encoding="utf-8") as handle:
+                handle.write(body)
+
+        # 1. Extraction keeps only visible text
+        markdown = "".join(block.text for block in extract(os.path.join(source_dir, "shipping.md")))
+        assert markdown.startswith("Shipping Guide\n")
+        assert "Orders ship within 2 business days. Track them in the portal." in markdown
+        assert "png" not in markdown and "**" not in markdown
+
+        html = "".join(block.text for block in extract(os.path.join(source_dir, "warranty.html")))
+        assert "serial number & proof of purchase" in html
+        assert "color" not in html and "var x" not in html
+        print("✔ Markdown and HTML extraction")
+
+        # 2. Overlapping windows with exact offsets, across block and page edges
+        words = [f"word{i}" for i in range(400)]
+        blocks = [
+            TextBlock(" ".join(words[:150]) + " ", page=1),
+            TextBlock(" ".join(words[150:]) + " ", page=2),
+        ]
+        text = "".join(block.text for block in blocks)
+        chunks = list(chunk_blocks("manual.pdf", iter(blocks), size=300, overlap=60))
+        assert len(chunks) > 5
+        for chunk, following in zip(chunks, chunks[1:]):
+            assert text[chunk.start:chunk.end] == chunk.text
+            assert 0 < chunk.end - following.start <= 60 + len("word399 ")
+            assert following.text.split()[0] in chunk.text.split()
+        assert chunks[-1].text.endswith("word399")
+        assert chunks[0].page == 1 and chunks[-1].page == 2
+        assert all(len(chunk.text) <= 300 for chunk in chunks)
+        print("✔ Chunk overlap and offsets")
+
+        # 3. Pipeline: embed once, then reuse by content hash
+        store = ArticleStore(os.path.join(work_dir, "kb.sqlite3"))
+        index_dir = os.path.join(work_dir, "index")
+        options = dict(model_factory=HashingEmbedder, model_name="hashing", index_dir=index_dir)
+
+        first = ingest([source_dir], store, config=IngestConfig(200, 40, 4, 1), **options)
+        assert first.files == 2 and first.chunks >= 2
+        assert first.embedded == first.chunks and first.reused == 0
+
+        second = ingest([source_dir], store, config=IngestConfig(200, 40, 4, 2), **options)
+        assert second.embedded == 0 and second.reused == first.chunks
+        assert second.index_id == first.index_id
+
+        revision, articles = store.snapshot()
+        chunk_rows = [article for article in articles if "source" in article]
+        assert revision == second.revision and len(chunk_rows) == first.chunks
+        assert len(articles) == 3 + first.chunks
+        print("✔ Pipeline embeds new chunks once (inline and process pool)")
+
+        # 4. Served from the index with a citation
+        tool = VectorSearchTool(
+            query_cache=EmbeddingCache("hashing", capacity=0),
+            model=HashingEmbedder(),
+            model_name="hashing",
+            articles=articles,
+            index_dir=index_dir,
+        )
+        try:
+            assert tool.index_stats()["embedded"] == 3  # only the seed articles
+            result = tool.search("hardware warranty claims serial number proof of purchase")
+            top = result["documents"][0]
+            assert top["source"].endswith("warranty.html")
+            answer = format_tool_result(result)
+            assert "serial number" in answer
+            assert answer.endswith(f"Source: {top['source']} (chars {top['start']}-{top['end']})")
+        finally:
+            tool.close()
+            store.close()
+        print("✔ Answers cite the ingested passage")
+
+        # 5. Chunk ids do not collide across sources or with other articles
+        ids = {Chunk(source, 0, 0, 4, None, "text").article()["id"] for source in ("a/b.md", "a-b.md")}
+        assert len(ids) == 2
+
+        store = ArticleStore(os.path.join(work_dir, "kb.sqlite3"))
+        try:
+            before = store.snapshot()
+            clash = {"id": "refund-policy", "title": "x.md", "content": "x", "source": "x.md"}
+            try:
+                store.replace_sources(["x.md"], [clash])
+            except ValueError:
+                pass
+            else:
+                raise AssertionError("a hand-written article must not be overwritten")
+            assert store.snapshot() == before
+        finally:
+            store.close()
+        print("✔ Chunk ids are namespaced and collisions rejected")
+
+
+if __name__ == "__main__":
+    print("=== INGEST TESTS START ===")
+    run_ingest_tests()
+    print("\n=== INGEST TESTS PASSED ===")
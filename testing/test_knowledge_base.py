@@ -0,0 +1,130 @@
+"""
+Knowledge Base Ingestion Tests
+
+Purpose:
+- The article store seeds once, diffs by content hash and counts revisions
+- Re-indexing encodes only new or changed articles
+- Index swaps never disturb a search already running on the old version
+- Old versions (and their matrix files) are released once readers drain
+- The background indexer brings the live tool up to date
+
+Runs offline with the hashing encoder from the benchmark stand-ins.
+"""
+
+import os
+import tempfile
+
+from benchmarks.standins import HashingEmbedder
+from tools.embedding_cache import EmbeddingCache
+from tools.knowledge_base import CREATED, UNCHANGED, UPDATED, ArticleStore, KnowledgeBase
+from tools.vector_tool import VectorSearchTool
+
+
+class CountingEmbedder(HashingEmbedder):
+    def __init__(self) -> None:
+        super().__init__()
+        self.encoded = 0
+
+    def encode(self, sentences, normalize_embeddings=False, **kwargs):
+        self.encoded += 1 if isinstance(sentences, str) else len(sentences)
+        return super().encode(sentences, normalize_embeddings=normalize_embeddings, **kwargs)
+
+
+def _matrix_files(index_dir: str):
+    return sorted(
+        name
+        for _, _, names in os.walk(index_dir)
+        for name in names
+        if name.startswith("embeddings-")
+    )
+
+
+def run_knowledge_base_tests() -> None:
+    # 1. Store: seed, hash diff, revisions
+    store = ArticleStore()
+    revision, articles = store.snapshot()
+    assert revision == 0
+    assert [article["id"] for article in articles] == [
+        "password-reset-guide", "ticket-escalation-policy", "refund-policy",
+    ]
+
+    refund = store.get("refund-policy")
+    assert store.put("refund-policy", refund["title"], refund["content"]) == (UNCHANGED, 0)
+    assert store.put("refund-policy", refund["title"], "Refunds within 30 days.") == (UPDATED, 1)
+    assert store.put("shipping", "Shipping", "Orders ship in 2 days.") == (CREATED, 2)
+    assert store.create("shipping", "Shipping", "Duplicate") is None
+    assert store.delete("shipping") == 3
+    assert store.delete("shipping") is None
+    assert store.snapshot()[1][2]["content"] == "Refunds within 30 days."
+    store.close()
+    print("✔ Article store diffs by content hash")
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        model = CountingEmbedder()
+        store = ArticleStore()
+        tool = None
+
+        def tool_factory() -> VectorSearchTool:
+            return tool
+
+        knowledge_base = KnowledgeBase(store, tool_factory)
+        tool = VectorSearchTool(
+            query_cache=EmbeddingCache("test-hashing", capacity=0),
+            model=model,
+            model_name="test-hashing",
+            articles=knowledge_base.load(),
+            index_dir=index_dir,
+        )
+        try:
+            # 2. Only the new article is encoded
+            first_index = tool.index_id
+            model.encoded = 0
+            store.put("warranty", "Warranty", "Hardware warranty claims need the serial number.")
+            revision, articles = store.snapshot()
+            tool.replace_articles(articles)
+            assert model.encoded == 1, model.encoded
+            assert tool.index_stats()["embedded"] == 1
+            assert tool.index_id != first_index
+            assert tool.replace_articles(articles) == tool.index_id
+            print("✔ Re-index encodes only changed articles")
+
+            # 3. An in-flight search keeps its version across a swap
+            before = tool.index_stats()["version"]
+            with tool._pinned() as pinned:
+                store.delete("warranty")
+                tool.replace_articles(store.snapshot()[1])
+                stats = tool.index_stats()
+                assert stats["version"] > before
+                assert stats["draining"] == [
+                    {"version": pinned.number, "index_id": pinned.index.index_id, "readers": 1}
+                ]
+                assert len(_matrix_files(index_dir)) == 2
+                assert "Warranty" in [article["title"] for article in pinned.articles]
+                hits = tool.search("warranty serial number claims")["documents"]
+                assert all("serial" not in hit["content"] for hit in hits)
+            print("✔ Swap does not disturb in-flight searches")
+
+            # 4. The drained version is released, and its matrix file with it
+            assert tool.index_stats()["draining"] == []
+            assert len(_matrix_files(index_dir)) == 1
+            print("✔ Old versions collected after readers drain")
+
+            # 5. Background indexer applies writes
+            revision = store.put("export", "Data Export", "Export your data as CSV from settings.")[1]
+            knowledge_base.schedule()
+            assert knowledge_base.wait_indexed(revision, timeout=10)
+            top = tool.search("export your data as csv")["documents"][0]
+            assert top["content"].startswith("Export your data"), top
+            status = knowledge_base.status()
+            assert status["indexed_revision"] == status["revision"] == revision
+            assert not status["building"] and status["last_error"] is None
+            print("✔ Background indexer swaps in writes")
+        finally:
+            knowledge_base.close()
+            tool.close()
+
+
+if __name__ == "__main__":
+    print("=== KNOWLEDGE BASE TESTS START ===")
+    run_knowledge_base_tests()
+    print("\n=== KNOWLEDGE BASE TESTS PASSED ===")
@@ -0,0 +1,62 @@
+"""
+Latency Metrics Tests
+
+Purpose:
+- Histogram buckets, sums and counts in Prometheus text format
+- Per-thread shards add up under concurrent observation
+- Request spans feed the Server-Timing header
+"""
+
+import threading
+
+from tools.metrics import Histogram, add_span, collect_spans, server_timing, tool_span
+
+
+def run_metrics_tests() -> None:
+    histogram = Histogram("test_seconds", "Test latency.", ("route",), buckets=(0.01, 0.1))
+
+    # 1. Buckets are cumulative, +Inf equals the count
+    for seconds in (0.005, 0.05, 0.5):
+        histogram.observe(("vector",), seconds)
+    lines = histogram.render()
+    assert "# TYPE test_seconds histogram" in lines
+    assert 'test_seconds_bucket{route="vector",le="0.01"} 1' in lines
+    assert 'test_seconds_bucket{route="vector",le="0.1"} 2' in lines
+    assert 'test_seconds_bucket{route="vector",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{route="vector"} 3' in lines
+    assert 'test_seconds_sum{route="vector"} 0.555' in lines
+    print("✔ Prometheus histogram format")
+
+    # 2. Concurrent observers each write their own shard
+    def observe() -> None:
+        for _ in range(10_000):
+            histogram.observe(("postgres",), 0.001)
+
+    threads = [threading.Thread(target=observe) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert histogram.snapshot()[("postgres",)][0] == 80_000
+    print("✔ Lock-free shards merge exactly")
+
+    # 3. Spans only collect inside a request, and repeated names are summed
+    add_span("ignored", 1.0)
+    with collect_spans() as spans:
+        add_span("node.router", 0.001)
+        add_span("vector.score", 0.002)
+        add_span("vector.score", 0.003)
+        with tool_span("external", "run"):
+            pass
+    assert [name for name, _ in spans] == [
+        "node.router", "vector.score", "vector.score", "external.run",
+    ]
+    header = server_timing(spans[:3], total=0.01)
+    assert header == "node.router;dur=1.00, vector.score;dur=5.00, total;dur=10.00", header
+    print("✔ Server-Timing spans")
+
+
+if __name__ == "__main__":
+    print("=== METRICS TESTS START ===")
+    run_metrics_tests()
+    print("\n=== METRICS TESTS PASSED ===")
@@ -0,0 +1,103 @@
+"""
+ONNX Embedding Backend Tests
+
+Purpose:
+- The ONNX export reproduces the torch encoder (cosine agreement) on
+  the knowledge-base articles and the test queries
+- The int8 model stays close and ranks articles the same way
+- EMBEDDING_BACKEND=onnx serves VectorSearchTool without importing torch
+
+Uses a tiny randomly initialized BERT SentenceTransformer (no download
+needed); torch is only used to build and export it.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+from benchmarks.standins import build_tiny_sentence_transformer
+from config.settings import EmbeddingModelConfig
+from data.vector_articles import ARTICLES
+from tools.embedding_model import load_embedding_model, model_key
+
+QUERIES = [
+    "How do I reset my password?",
+    "What is your refund policy?",
+    "Explain ticket escalation.",
+    "How do airplanes fly?",
+]
+
+# Serving path in a fresh interpreter: encode + search, then check torch stayed out
+_NO_TORCH = """
+import sys
+from tools.embedding_cache import EmbeddingCache
+from tools.vector_tool import VectorSearchTool
+tool = VectorSearchTool(query_cache=EmbeddingCache("x", capacity=0), model_name=sys.argv[1])
+assert tool.search("reset password link", top_k=1)["documents"] is not None
+assert "torch" not in sys.modules, "torch was imported"
+print(tool._model_name)
+tool.close()
+"""
+
+
+def run_onnx_embedding_tests() -> None:
+    with tempfile.TemporaryDirectory() as work_dir:
+        texts = [article["content"] for article in ARTICLES] + QUERIES
+        model_dir = build_tiny_sentence_transformer(
+            os.path.join(work_dir, "tiny-minilm"),
+            [f"{article['title']} {article['content']}" for article in ARTICLES] + QUERIES,
+        )
+        onnx_dir = os.path.join(work_dir, "onnx")
+
+        def encode(backend: str, quantize: bool = False) -> np.ndarray:
+            config = EmbeddingModelConfig(backend, onnx_dir, quantize, threads=1)
+            return load_embedding_model(model_dir, config).encode(texts, normalize_embeddings=True)
+
+        reference = encode("torch")
+
+        # 1. fp32 export matches torch
+        fp32 = encode("onnx")
+        agreement = (fp32 * reference).sum(axis=1)
+        assert agreement.min() > 0.9999, agreement
+        print(f"✔ fp32 ONNX vs torch: min cosine {agreement.min():.6f}")
+
+        # 2. int8 stays close and picks the same nearest article per query
+        int8 = encode("onnx", quantize=True)
+        agreement = (int8 * reference).sum(axis=1)
+        assert agreement.min() > 0.99, agreement
+        articles, queries = slice(0, len(ARTICLES)), slice(len(ARTICLES), None)
+        assert np.array_equal(
+            (int8[queries] @ int8[articles].T).argmax(axis=1),
+            (reference[queries] @ reference[articles].T).argmax(axis=1),
+        )
+        print(f"✔ int8 ONNX vs torch: min cosine {agreement.min():.6f}, same nearest articles")
+
+        # 3. Serving with EMBEDDING_BACKEND=onnx keeps torch out of the process
+        assert model_key("m", EmbeddingModelConfig("onnx", onnx_dir, True, 0)) == "m@int8"
+        assert model_key("m", EmbeddingModelConfig("onnx", onnx_dir, False, 0)) == "m"
+        environment = dict(
+            os.environ,
+            EMBEDDING_BACKEND="onnx",
+            EMBEDDING_ONNX_DIR=onnx_dir,
+            EMBEDDING_QUANTIZE="true",
+            ARTICLE_INDEX_DIR=os.path.join(work_dir, "index"),
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", _NO_TORCH, model_dir],
+            env=environment,
+            capture_output=True,
+            text=True,
+            timeout=120,
+        )
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip().endswith("@int8"), result.stdout
+        print("✔ ONNX backend serves searches without importing torch")
+
+
+if __name__ == "__main__":
+    print("=== ONNX EMBEDDING TESTS START ===")
+    run_onnx_embedding_tests()
+    print("\n=== ONNX EMBEDDING TESTS PASSED ===")
@@ -0,0 +1,83 @@
+"""
+Query Result Cache Tests
+
+Purpose:
+- Read-through hits and misses
+- TTL expiry and LRU eviction
+- Table-level invalidation
+"""
+
+from tools.query_cache import QueryCache, referenced_tables
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def run_query_cache_tests() -> None:
+    clock = _Clock()
+    cache = QueryCache(max_size=2, ttl_seconds=10, clock=clock)
+    calls = []
+
+    def loader(value):
+        return lambda: calls.append(value) or value
+
+    ticket_sql = "SELECT id, issue, status FROM tickets WHERE id = %s"
+    city_sql = "SELECT name, city FROM customers WHERE id = %s"
+
+    # 1. Whitespace-insensitive key, second lookup is a hit
+    assert cache.get_or_load(ticket_sql, (1,), loader("t1")) == "t1"
+    assert cache.get_or_load("  SELECT id, issue,  status\nFROM tickets WHERE id = %s;", (1,), loader("x")) == "t1"
+    assert calls == ["t1"]
+    print("✔ Read-through hit")
+
+    # 2. TTL expiry
+    clock.now = 11
+    assert cache.get_or_load(ticket_sql, (1,), loader("t1b")) == "t1b"
+    print("✔ TTL expiry")
+
+    # 3. LRU eviction beyond max_size
+    cache.get_or_load(city_sql, (1,), loader("c1"))
+    cache.get_or_load(city_sql, (2,), loader("c2"))
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["size"] == 2
+    print("✔ LRU eviction")
+
+    # 4. Invalidation only touches dependent entries
+    cache.get_or_load(ticket_sql, (1,), loader("t1c"))
+    assert cache.invalidate_table("customers") == 1
+    assert cache.get_or_load(ticket_sql, (1,), loader("unused")) == "t1c"
+    print("✔ Table-level invalidation")
+
+    # 5. Writes during a load prevent storing a stale result
+    def racing_load():
+        cache.invalidate_table("tickets")
+        return "stale"
+
+    cache.get_or_load(ticket_sql, (2,), racing_load)
+    assert cache.get_or_load(ticket_sql, (2,), loader("fresh")) == "fresh"
+    print("✔ In-flight write not cached")
+
+    # 6. Array parameters (bulk ANY(%s) lookups) are part of the key
+    bulk_sql = "SELECT id, issue, status FROM tickets WHERE id = ANY(%s)"
+    assert cache.get_or_load(bulk_sql, ([1, 3],), loader("b13")) == "b13"
+    assert cache.get_or_load(bulk_sql, ([1, 3],), loader("x")) == "b13"
+    assert cache.get_or_load(bulk_sql, ([1, 2],), loader("b12")) == "b12"
+    print("✔ Array parameters")
+
+    assert referenced_tables(
+        "SELECT t.id FROM tickets t JOIN public.customers c ON t.customer_id = c.id"
+    ) == {"tickets", "customers"}
+
+    stats = cache.stats()
+    assert stats["hits"] >= 2 and stats["misses"] >= 5
+
+
+if __name__ == "__main__":
+    print("=== QUERY CACHE TESTS START ===")
+    run_query_cache_tests()
+    print("\n=== QUERY CACHE TESTS PASSED ===")
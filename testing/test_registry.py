@@ -0,0 +1,93 @@
+"""
+Tool Registry Tests
+
+Purpose:
+- Tools are built once and shared
+- Warmup / shutdown lifecycle behaves as expected
+- Blocking lookups can share the event loop's async pool
+"""
+
+import asyncio
+import threading
+
+from tools.async_postgres_tool import BlockingPostgresTool
+from tools.registry import ToolRegistry
+
+
+class _FakeTool:
+    instances = 0
+
+    def __init__(self) -> None:
+        _FakeTool.instances += 1
+        self.closed = False
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def run_registry_tests() -> None:
+    _FakeTool.instances = 0
+    registry = ToolRegistry({"fake": _FakeTool})
+
+    # 1. Not ready before warmup
+    assert not registry.is_ready()
+
+    # 2. Concurrent first use builds a single instance
+    threads = [threading.Thread(target=registry.get, args=("fake",)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert _FakeTool.instances == 1
+    print("✔ Single shared instance")
+
+    # 3. Warmup flips readiness
+    registry.warmup()
+    assert registry.is_ready()
+    print("✔ Ready after warmup")
+
+    # 4. Shutdown closes tools and clears readiness
+    tool = registry.get("fake")
+    registry.shutdown()
+    assert tool.closed
+    assert not registry.is_ready()
+    print("✔ Shutdown closes tools")
+
+    # 5. Explicit pre-warm builds only the selected subsystems
+    built = []
+    registry = ToolRegistry({"fake": _FakeTool})
+    registry.register("llm", lambda: built.append("llm") or "model")
+    registry.warmup([])
+    assert registry.is_ready() and built == []
+    registry.warmup(["llm"])
+    assert built == ["llm"] and registry.get("llm") == "model"
+    print("✔ Selective pre-warm")
+
+    # 6. Blocking facade runs queries on the loop that owns the pool
+    class _AsyncTool:
+        async def run_named(self, name, params, timeout_ms=None):
+            return {"loop": asyncio.get_running_loop(), "rows": [name, *params]}
+
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        result = BlockingPostgresTool(_AsyncTool(), loop).run_named("ticket_by_id", (7,))
+        assert result == {"loop": loop, "rows": ["ticket_by_id", 7]}
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+    try:
+        BlockingPostgresTool(_AsyncTool(), loop).run_named("ticket_by_id", (7,))
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("a closed loop must be rejected")
+    print("✔ Blocking lookups share the async pool")
+
+
+if __name__ == "__main__":
+    print("=== REGISTRY TESTS START ===")
+    run_registry_tests()
+    print("\n=== REGISTRY TESTS PASSED ===")
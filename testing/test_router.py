@@ -2,9 +2,20 @@
 Phase 2 Router Tests
 """
 
+import random
+
 from router.router_node import RouterNode, Route
 
 
+def _reference_route(tables, message: str) -> Route:
+    # Substring scan in table order: the behavior the compiled matcher must keep
+    text = message.lower()
+    for route, phrases in tables:
+        if any(phrase in text for phrase in phrases):
+            return route
+    return Route.LLM
+
+
 def run_router_tests() -> None:
     router = RouterNode()
     history = []
@@ -25,6 +36,30 @@ def run_router_tests() -> None:
     assert router.route("Hello, how are you?", history) == Route.LLM
     assert router.route("Explain this system", history) == Route.LLM
 
+    # Batch API keeps input order
+    assert router.route_many(["Bitcoin price", "refund policy", "hi"]) == [
+        Route.EXTERNAL, Route.VECTOR, Route.LLM,
+    ]
+
+    # Compiled matcher == ordered substring scan, including overlapping
+    # and prefix-sharing phrases across tables
+    tables = [
+        (Route.VECTOR, ["abc", "cd"]),
+        (Route.POSTGRES, ["ab", "bcd", "x"]),
+        (Route.EXTERNAL, ["a", "dx"]),
+    ]
+    custom = RouterNode(tables)
+    rng = random.Random(0)
+    for _ in range(2000):
+        message = "".join(rng.choice("abcdxY ") for _ in range(rng.randint(0, 12)))
+        assert custom.route(message, history) == _reference_route(tables, message), message
+        expected = [route for route, phrases in tables if any(p in message.lower() for p in phrases)]
+        assert custom.matches(message) == expected, message
+
+    # Ambiguous messages report every matching route, in priority order
+    assert router.matches("support ticket 3 refund status") == [Route.VECTOR, Route.POSTGRES]
+    assert router.matches("Hello, how are you?") == []
+
     print("=== ALL ROUTER TESTS PASSED ===")
 
 
@@ -0,0 +1,144 @@
+"""
+SQLite Backend Tests
+
+Purpose:
+- PostgresTool on DB_BACKEND=sqlite answers from db/schema.sql + db/seed.sql
+- Both parameter styles and every QUERY_CATALOG entry work on SQLite
+- Postgres-only DDL is skipped, slow statements time out
+- Threads query in parallel on their own connections
+
+Runs offline: no PostgreSQL server needed.
+"""
+
+import threading
+
+from config.settings import load_relational_config
+from tools.postgres_tool import QUERY_CATALOG, PostgresTool
+from tools.query_cache import QueryCache
+from tools.relational import SQLiteBackend, split_sql, translate_parameters
+
+
+def run_sqlite_backend_tests() -> None:
+    config = load_relational_config()
+    backend = SQLiteBackend(QUERY_CATALOG, ":memory:", config.schema_path, config.seed_path)
+    tool = PostgresTool(backend=backend)
+
+    try:
+        # 1. Seed data through the ad-hoc path, both parameter styles
+        result = tool.run_query("SELECT * FROM customers ORDER BY id")
+        assert result["row_count"] == 3
+        assert result["rows"][0] == {"id": 1, "name": "John Doe", "city": "New York"}
+
+        result = tool.run_query("SELECT * FROM tickets WHERE customer_id = %(cid)s", {"cid": 1})
+        assert result["row_count"] == 2
+
+        result = tool.run_query(
+            "SELECT t.id, t.issue, c.name FROM tickets t "
+            "JOIN customers c ON c.id = t.customer_id WHERE t.id = %s",
+            (1,),
+        )
+        assert result["rows"] == [{"id": 1, "issue": "Login not working", "name": "John Doe"}]
+
+        result = tool.run_query("SELECT * FROM tickets WHERE customer_id = %s", (999,))
+        assert result == {"rows": [], "row_count": 0}
+        assert translate_parameters("SELECT '100%%' WHERE a = %s") == "SELECT '100%' WHERE a = ?"
+        print("✔ Ad-hoc queries on seed data")
+
+        # 2. Every catalog statement, ANY() arrays included
+        expected = {
+            "ticket_by_id": ((2,), [{"id": 2, "issue": "Password reset", "status": "close"}]),
+            "customer_city_by_id": ((3,), [{"name": "Alex Brown", "city": "Toronto"}]),
+            "tickets_by_customer_name": (("JOHN doe",), [1, 2]),
+            "tickets_by_ids": (([1, 3],), [1, 3]),
+            "customers_by_ids": (([2, 3, 99],), [2, 3]),
+            "tickets_by_customer_names": ((["john doe", "alex brown"],), [1, 2, 3]),
+        }
+        assert set(expected) == set(QUERY_CATALOG)
+        for name, (params, rows) in expected.items():
+            result = tool.run_named(name, params)
+            if rows and isinstance(rows[0], int):
+                assert sorted(row["id"] for row in result["rows"]) == rows, name
+            else:
+                assert result["rows"] == rows, name
+        assert tool.run_named("tickets_by_ids", ([],))["row_count"] == 0
+        print("✔ Catalog statements translated")
+
+        # 3. Writes move the data version; no LISTEN cache on SQLite
+        assert tool.cache_stats() == {"enabled": False}
+        version = tool.data_version()
+        other = backend._connect()
+        other.execute("UPDATE tickets SET status = 'close' WHERE id = 1")
+        other.commit()
+        assert tool.data_version() != version
+        assert tool.run_named("ticket_by_id", (1,))["rows"][0]["status"] == "close"
+        print("✔ data_version follows commits")
+
+        # 4. Statement timeout aborts a runaway query
+        slow = (
+            "SELECT count(*) FROM (WITH RECURSIVE n(i) AS "
+            "(SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT i FROM n)"
+        )
+        try:
+            tool.run_query(slow, timeout_ms=50)
+        except TimeoutError:
+            pass
+        else:
+            raise AssertionError("expected TimeoutError")
+        assert tool.run_named("ticket_by_id", (3,))["row_count"] == 1
+        print("✔ Statement timeout")
+
+        # 5. Parallel readers, one connection per thread
+        errors = []
+
+        def read() -> None:
+            try:
+                for i in range(200):
+                    assert tool.run_named("customer_city_by_id", (1 + i % 3,))["row_count"] == 1
+            except Exception as exc:  # noqa: BLE001 - reported below
+                errors.append(exc)
+
+        threads = [threading.Thread(target=read) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors, errors
+        assert tool.pool_stats()["connections"] >= 5
+        print("✔ Concurrent readers")
+    finally:
+        tool.close()
+
+    # 6. Bulk (array parameter) lookups through the query cache
+    tool = PostgresTool(backend=SQLiteBackend(
+        QUERY_CATALOG, ":memory:", config.schema_path, config.seed_path
+    ))
+    # SQLite has no LISTEN, so the tool never enables its cache itself
+    tool._cache = QueryCache()
+    try:
+        for _ in range(2):
+            result = tool.run_named("tickets_by_ids", ([1, 3],))
+            assert sorted(row["id"] for row in result["rows"]) == [1, 3]
+        names = tool.run_named("tickets_by_customer_names", (["john doe"],))
+        assert names["row_count"] == 2
+        stats = tool.cache_stats()
+        assert stats["hits"] == 1 and stats["misses"] == 2, stats
+    finally:
+        tool.close()
+    print("✔ Cached bulk lookups")
+
+    # 7. Script splitting keeps $$ bodies whole
+    statements = split_sql(
+        "CREATE TABLE a (x TEXT DEFAULT ';');\n"
+        "-- comment; with a semicolon\n"
+        "CREATE FUNCTION f() RETURNS trigger AS $$ BEGIN; END; $$ LANGUAGE plpgsql;\n"
+        "CREATE TRIGGER t AFTER INSERT ON a FOR EACH STATEMENT EXECUTE FUNCTION f();"
+    )
+    assert len(statements) == 3, statements
+    assert statements[1].endswith("LANGUAGE plpgsql")
+    print("✔ SQL script splitting")
+
+
+if __name__ == "__main__":
+    print("=== SQLITE BACKEND TESTS START ===")
+    run_sqlite_backend_tests()
+    print("\n=== SQLITE BACKEND TESTS PASSED ===")
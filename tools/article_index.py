@@ -0,0 +1,327 @@
+"""
+Article Embedding Index
+
+Responsibilities:
+- Persist the article embedding matrix and metadata to disk
+- Key rows by article content hash and the index by model name
+- Re-embed only articles whose content changed
+- Load the matrix memory-mapped so workers share OS page cache
+- Keep superseded matrices until their last reader is done
+- Append rows in bulk without loading the whole matrix (IndexWriter)
+
+Build step:
+    python -m tools.article_index
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from config.settings import load_article_index_config
+
+METADATA_FILE = "metadata.json"
+
+
+def article_hash(article: Dict[str, str]) -> str:
+    """
+    Stable content hash for one article.
+    """
+    payload = json.dumps(
+        {"title": article.get("title", ""), "content": article["content"]},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _index_id(model_name: str, hashes: Sequence[str]) -> str:
+    digest = hashlib.sha256(model_name.encode("utf-8"))
+    for value in hashes:
+        digest.update(value.encode("ascii"))
+    return digest.hexdigest()[:16]
+
+
+def _model_dir(directory: str, model_name: str) -> str:
+    return os.path.join(directory, model_name.replace("/", "__"))
+
+
+@dataclass(frozen=True)
+class ArticleIndex:
+    """
+    Loaded index: row i of embeddings belongs to hashes[i].
+    """
+
+    index_id: str
+    model_name: str
+    hashes: List[str]
+    embeddings: np.ndarray
+    reused: int
+    embedded: int
+
+
+def _read_metadata(model_dir: str) -> Dict:
+    path = os.path.join(model_dir, METADATA_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def _write_index(
+    model_dir: str,
+    model_name: str,
+    hashes: List[str],
+    matrix: np.ndarray,
+    prune: bool = True,
+) -> str:
+    os.makedirs(model_dir, exist_ok=True)
+    index_id = _index_id(model_name, hashes)
+    matrix_file = f"embeddings-{index_id}.npy"
+    suffix = f".tmp-{os.getpid()}"
+
+    matrix_path = os.path.join(model_dir, matrix_file)
+    with open(matrix_path + suffix, "wb") as handle:
+        np.save(handle, np.ascontiguousarray(matrix, dtype=np.float32))
+    os.replace(matrix_path + suffix, matrix_path)
+
+    # Metadata is swapped last so readers never see a half-written matrix
+    metadata_path = os.path.join(model_dir, METADATA_FILE)
+    with open(metadata_path + suffix, "w", encoding="utf-8") as handle:
+        json.dump(
+            {
+                "index_id": index_id,
+                "model_name": model_name,
+                "dimension": int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+                "matrix_file": matrix_file,
+                "hashes": hashes,
+            },
+            handle,
+        )
+    os.replace(metadata_path + suffix, metadata_path)
+
+    if not prune:
+        return index_id
+
+    # Older matrices stay readable by processes that already mapped them
+    for name in os.listdir(model_dir):
+        if name.startswith("embeddings-") and name != matrix_file and ".tmp-" not in name:
+            os.remove(os.path.join(model_dir, name))
+
+    return index_id
+
+
+class IndexWriter:
+    """
+    Appends rows to the index without holding the matrix in memory.
+
+    Starts from the current index's rows, so committing yields the old
+    index plus the appended rows. Rows are spooled to disk and the new
+    .npy file and metadata are written on commit(), metadata last.
+    """
+
+    COPY_ROWS = 65536
+
+    def __init__(self, directory: str, model_name: str, dimension: int) -> None:
+        self._model_dir = _model_dir(directory, model_name)
+        self._model_name = model_name
+        self._dimension = dimension
+        os.makedirs(self._model_dir, exist_ok=True)
+
+        suffix = f".tmp-{os.getpid()}-{id(self)}"
+        self._rows_path = os.path.join(self._model_dir, f"rows{suffix}")
+        self._hashes_path = os.path.join(self._model_dir, f"hashes{suffix}")
+        self._rows = open(self._rows_path, "wb")
+        self._hashes = open(self._hashes_path, "w", encoding="ascii")
+        self._digest = hashlib.sha256(model_name.encode("utf-8"))
+        self._count = 0
+        self._known: set = set()
+
+        metadata = _read_metadata(self._model_dir)
+        if metadata.get("model_name") == model_name and metadata.get("dimension") == dimension:
+            matrix_path = os.path.join(self._model_dir, metadata["matrix_file"])
+            if os.path.exists(matrix_path):
+                stored = np.load(matrix_path, mmap_mode="r")
+                hashes = metadata["hashes"]
+                for start in range(0, len(hashes), self.COPY_ROWS):
+                    end = start + self.COPY_ROWS
+                    self._write(hashes[start:end], stored[start:end])
+
+    def __contains__(self, content_hash: str) -> bool:
+        return content_hash in self._known
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _write(self, hashes: Sequence[str], matrix: np.ndarray) -> None:
+        self._rows.write(np.ascontiguousarray(matrix, dtype=np.float32).tobytes())
+        for value in hashes:
+            self._hashes.write(value + "\n")
+            self._digest.update(value.encode("ascii"))
+        self._known.update(hashes)
+        self._count += len(hashes)
+
+    def append(self, hashes: Sequence[str], matrix: np.ndarray) -> None:
+        """
+        Add rows; hashes[i] names matrix[i].
+        """
+        if matrix.shape != (len(hashes), self._dimension):
+            raise ValueError(f"Expected {len(hashes)} x {self._dimension} rows, got {matrix.shape}")
+        self._write(hashes, matrix)
+
+    def commit(self, prune: bool = False) -> str:
+        """
+        Publish the new index version. Returns its index id.
+        """
+        self._rows.close()
+        self._hashes.close()
+        index_id = self._digest.hexdigest()[:16]
+        matrix_file = f"embeddings-{index_id}.npy"
+        matrix_path = os.path.join(self._model_dir, matrix_file)
+        suffix = f".tmp-{os.getpid()}"
+
+        # Header for the final shape, then the spooled rows block by block
+        with open(matrix_path + suffix, "wb") as target, open(self._rows_path, "rb") as rows:
+            np.lib.format.write_array_header_1_0(
+                target,
+                {"descr": "<f4", "fortran_order": False, "shape": (self._count, self._dimension)},
+            )
+            block = self.COPY_ROWS * self._dimension * 4
+            while chunk := rows.read(block):
+                target.write(chunk)
+        os.replace(matrix_path + suffix, matrix_path)
+
+        metadata_path = os.path.join(self._model_dir, METADATA_FILE)
+        with open(metadata_path + suffix, "w", encoding="utf-8") as target:
+            target.write(json.dumps({
+                "index_id": index_id,
+                "model_name": self._model_name,
+                "dimension": self._dimension,
+                "matrix_file": matrix_file,
+            })[:-1])
+            # Hashes streamed from the spool file, not held as one list
+            target.write(', "hashes": [')
+            with open(self._hashes_path, "r", encoding="ascii") as hashes:
+                for row, line in enumerate(hashes):
+                    target.write(("," if row else "") + json.dumps(line.rstrip("\n")))
+            target.write("]}")
+        os.replace(metadata_path + suffix, metadata_path)
+
+        self._cleanup()
+        if prune:
+            for name in os.listdir(self._model_dir):
+                if name.startswith("embeddings-") and name != matrix_file and ".tmp-" not in name:
+                    os.remove(os.path.join(self._model_dir, name))
+        return index_id
+
+    def abort(self) -> None:
+        self._rows.close()
+        self._hashes.close()
+        self._cleanup()
+
+    def _cleanup(self) -> None:
+        for path in (self._rows_path, self._hashes_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def remove_matrix(directory: str, model_name: str, index_id: str) -> None:
+    """
+    Delete a superseded matrix file. The current index is never removed.
+    """
+    model_dir = _model_dir(directory, model_name)
+    if not index_id or _read_metadata(model_dir).get("index_id") == index_id:
+        return
+
+    path = os.path.join(model_dir, f"embeddings-{index_id}.npy")
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def load_or_build(
+    model,
+    model_name: str,
+    articles: Sequence[Dict[str, str]],
+    directory: str,
+    prune: bool = True,
+) -> ArticleIndex:
+    """
+    Return a memory-mapped embedding matrix aligned with `articles`.
+
+    Rows whose content hash is already on disk are reused; only new or
+    changed articles are encoded. The index is rewritten when anything
+    changed.
+
+    Args:
+        prune: Delete older matrix files right away. Pass False while
+            an older version may still be searched; see remove_matrix().
+    """
+    model_dir = _model_dir(directory, model_name)
+    hashes = [article_hash(article) for article in articles]
+
+    metadata = _read_metadata(model_dir)
+    stored: np.ndarray | None = None
+    if metadata.get("model_name") == model_name:
+        matrix_path = os.path.join(model_dir, metadata["matrix_file"])
+        if os.path.exists(matrix_path):
+            stored = np.load(matrix_path, mmap_mode="r")
+
+    if stored is not None and metadata["hashes"] == hashes:
+        return ArticleIndex(
+            metadata["index_id"], model_name, hashes, stored, reused=len(hashes), embedded=0
+        )
+
+    known: Dict[str, int] = {}
+    if stored is not None:
+        known = {value: row for row, value in enumerate(metadata["hashes"])}
+    missing = [i for i, value in enumerate(hashes) if value not in known]
+
+    fresh = None
+    if missing:
+        fresh = model.encode(
+            [articles[i]["content"] for i in missing],
+            normalize_embeddings=True,
+        ).astype(np.float32)
+
+    dimension = model.get_sentence_embedding_dimension()
+    matrix = np.empty((len(hashes), dimension), dtype=np.float32)
+    for i, value in enumerate(hashes):
+        if value in known:
+            matrix[i] = stored[known[value]]
+    if fresh is not None:
+        matrix[missing] = fresh
+
+    if not hashes:
+        # Zero-length files cannot be memory-mapped
+        return ArticleIndex("", model_name, hashes, matrix, reused=0, embedded=0)
+
+    index_id = _write_index(model_dir, model_name, hashes, matrix, prune)
+    mapped = np.load(
+        os.path.join(model_dir, f"embeddings-{index_id}.npy"), mmap_mode="r"
+    )
+
+    return ArticleIndex(
+        index_id,
+        model_name,
+        hashes,
+        mapped,
+        reused=len(hashes) - len(missing),
+        embedded=len(missing),
+    )
+
+
+if __name__ == "__main__":
+    from data.vector_articles import ARTICLES
+    from tools.embedding_model import load_embedding_model, model_key
+    from tools.vector_tool import MODEL_NAME
+
+    config = load_article_index_config()
+    index = load_or_build(
+        load_embedding_model(MODEL_NAME), model_key(MODEL_NAME), ARTICLES, config.directory
+    )
+    print(
+        f"✔ Index {index.index_id}: {len(index.hashes)} articles "
+        f"({index.reused} reused, {index.embedded} embedded) in {config.directory}"
+    )
@@ -0,0 +1,316 @@
+"""
+Async Postgres Tool
+
+Responsibilities:
+- Serve the QUERY_CATALOG lookups without blocking the event loop
+- Use asyncpg (pooled, statements prepared and cached per connection)
+- Fall back to PostgresTool on a dedicated I/O executor without asyncpg
+  or on a non-PostgreSQL backend
+- Let blocking callers share the asyncpg pool instead of opening a
+  second one
+"""
+
+import asyncio
+from concurrent.futures import Executor
+import contextvars
+import logging
+from typing import Any, Callable, Dict, Optional, Sequence, Union
+
+from config.settings import (
+    load_postgres_config,
+    load_postgres_pool_config,
+    load_query_cache_config,
+    load_relational_config,
+)
+from tools.metrics import tool_span
+from tools.postgres_tool import QUERY_CATALOG, PostgresTool
+from tools.query_cache import QueryCache
+
+try:
+    import asyncpg
+except ImportError:  # pragma: no cover - optional dependency
+    asyncpg = None
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncPostgresTool:
+    """
+    asyncpg-backed variant of PostgresTool.run_named.
+
+    The pool is created on first use inside the running event loop.
+    asyncpg prepares and caches each catalog statement per connection.
+    """
+
+    def __init__(self, retry_delay: float = 2.0, max_retry_delay: float = 30.0) -> None:
+        if asyncpg is None:
+            raise ImportError("AsyncPostgresTool requires asyncpg: pip install asyncpg")
+
+        self._config = load_postgres_config()
+        self._pool_config = load_postgres_pool_config()
+        self._pool = None
+        self._pool_lock: Optional[asyncio.Lock] = None
+
+        self._cache: Optional[QueryCache] = None
+        self._cache_config = load_query_cache_config()
+        self._listener = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._retry_delay = retry_delay
+        self._max_retry_delay = max_retry_delay
+        self._closed = False
+        if self._cache_config.enabled:
+            self._cache = QueryCache(
+                self._cache_config.max_size, self._cache_config.ttl_seconds
+            )
+            # Nothing is trustworthy until LISTEN is active
+            self._cache.suspend()
+
+    async def _get_pool(self):
+        if self._pool is not None:
+            return self._pool
+
+        if self._pool_lock is None:
+            self._pool_lock = asyncio.Lock()
+
+        async with self._pool_lock:
+            if self._pool is None:
+                pool = await asyncpg.create_pool(
+                    host=self._config.host,
+                    port=self._config.port,
+                    database=self._config.database,
+                    user=self._config.user,
+                    password=self._config.password,
+                    min_size=self._pool_config.min_size,
+                    max_size=self._pool_config.max_size,
+                    server_settings={
+                        "statement_timeout": str(self._pool_config.statement_timeout_ms),
+                    },
+                )
+                try:
+                    if self._cache is not None:
+                        await self._connect_listener()
+                finally:
+                    # Even if this call is cancelled, publish the pool and
+                    # keep retrying LISTEN so the cache is not left suspended
+                    self._pool = pool
+                    if self._cache is not None and self._listener is None:
+                        self._schedule_reconnect()
+
+        return self._pool
+
+    async def _connect_listener(self) -> bool:
+        connection = None
+        try:
+            connection = await asyncpg.connect(
+                host=self._config.host,
+                port=self._config.port,
+                database=self._config.database,
+                user=self._config.user,
+                password=self._config.password,
+            )
+            await connection.add_listener(self._cache_config.channel, self._on_notify)
+        except (OSError, asyncio.TimeoutError, asyncpg.PostgresError):
+            logger.warning("Async query cache listener unavailable", exc_info=True)
+            if connection is not None:
+                connection.terminate()
+            return False
+        except asyncio.CancelledError:
+            if connection is not None:
+                connection.terminate()
+            raise
+
+        connection.add_termination_listener(self._on_listener_lost)
+        self._listener = connection
+        self._cache.resume()
+        return True
+
+    def _schedule_reconnect(self) -> None:
+        if self._closed or (self._reconnect_task is not None and not self._reconnect_task.done()):
+            return
+        self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        # Same idea as CacheInvalidationListener, with capped exponential backoff
+        delay = self._retry_delay
+        while not self._closed:
+            await asyncio.sleep(delay)
+            if self._closed or await self._connect_listener():
+                return
+            delay = min(delay * 2, self._max_retry_delay)
+
+    def _on_notify(self, _connection: Any, _pid: int, _channel: str, payload: str) -> None:
+        self._cache.invalidate_table(payload)
+
+    def _on_listener_lost(self, _connection: Any) -> None:
+        # Notifications may have been missed: stop trusting the cache until
+        # LISTEN is back
+        self._cache.suspend()
+        self._listener = None
+        self._schedule_reconnect()
+
+    async def run_named(
+        self,
+        name: str,
+        params: Sequence[Any],
+        timeout_ms: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Execute a QUERY_CATALOG statement.
+
+        Returns:
+            Same shape as PostgresTool.run_query.
+        """
+        if name not in QUERY_CATALOG:
+            raise ValueError(f"Unknown catalog query: {name}")
+
+        params = tuple(params)
+        body = QUERY_CATALOG[name][1]
+
+        async def load() -> Dict[str, Any]:
+            pool = await self._get_pool()
+            timeout = timeout_ms / 1000.0 if timeout_ms is not None else None
+            records = await pool.fetch(body, *params, timeout=timeout)
+            rows = [dict(record) for record in records]
+            return {"rows": rows, "row_count": len(rows)}
+
+        with tool_span("postgres", "run_named"):
+            if self._cache is None:
+                return await load()
+            return await self._cache.aget_or_load(body, params, load)
+
+    def pool_stats(self) -> Dict[str, Any]:
+        if self._pool is None:
+            return {"pooled": True, "max_size": self._pool_config.max_size, "in_use": 0}
+
+        size = self._pool.get_size()
+        in_use = size - self._pool.get_idle_size()
+        max_size = self._pool.get_max_size()
+        return {
+            "pooled": True,
+            "max_size": max_size,
+            "size": size,
+            "in_use": in_use,
+            "available": max_size - in_use,
+            "saturation": in_use / max_size,
+        }
+
+    def data_version(self) -> Optional[int]:
+        if self._cache is None:
+            return None
+        return self._cache.change_counter()
+
+    def cache_stats(self) -> Dict[str, Any]:
+        if self._cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self._cache.stats()}
+
+    async def aclose(self) -> None:
+        self._closed = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+        if self._listener is not None:
+            await self._listener.close()
+        if self._pool is not None:
+            await self._pool.close()
+
+
+class BlockingPostgresTool:
+    """
+    Blocking facade over AsyncPostgresTool.
+
+    Sync callers running on worker threads (e.g. /chat/batch) submit
+    queries to the event loop that owns the asyncpg pool, so the
+    process keeps a single pool.
+    """
+
+    def __init__(self, tool: AsyncPostgresTool, loop: asyncio.AbstractEventLoop) -> None:
+        self._tool = tool
+        self._loop = loop
+
+    def run_named(
+        self,
+        name: str,
+        params: Sequence[Any],
+        timeout_ms: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        if self._loop.is_closed():
+            raise RuntimeError("The event loop serving the asyncpg pool is closed")
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            # Waiting here would block the loop the query needs
+            raise RuntimeError("BlockingPostgresTool called from its own event loop")
+
+        # The task copies this thread's context, so spans follow the request
+        future = asyncio.run_coroutine_threadsafe(
+            self._tool.run_named(name, params, timeout_ms), self._loop
+        )
+        return future.result()
+
+    def pool_stats(self) -> Dict[str, Any]:
+        return self._tool.pool_stats()
+
+    def data_version(self) -> Optional[int]:
+        return self._tool.data_version()
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return self._tool.cache_stats()
+
+    def close(self) -> None:
+        # The pool is closed by AsyncPostgresTool.aclose
+        return None
+
+
+class ExecutorPostgresTool:
+    """
+    Async facade over the blocking PostgresTool.
+
+    Queries run on a dedicated I/O executor so they never occupy the
+    CPU executor or the event loop.
+    """
+
+    def __init__(self, tool_factory: Callable[[], PostgresTool], executor: Executor) -> None:
+        self._tool_factory = tool_factory
+        self._executor = executor
+
+    async def run_named(
+        self,
+        name: str,
+        params: Sequence[Any],
+        timeout_ms: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        tool = self._tool_factory()
+        # Copy context so the query's timing is credited to this request
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            self._executor, context.run, tool.run_named, name, params, timeout_ms
+        )
+
+    def pool_stats(self) -> Dict[str, Any]:
+        return self._tool_factory().pool_stats()
+
+    def data_version(self) -> Optional[int]:
+        return self._tool_factory().data_version()
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return self._tool_factory().cache_stats()
+
+    async def aclose(self) -> None:
+        # The wrapped PostgresTool is closed by the registry
+        return None
+
+
+def create_async_postgres_tool(
+    tool_factory: Callable[[], PostgresTool],
+    executor: Executor,
+) -> Union[AsyncPostgresTool, ExecutorPostgresTool]:
+    """
+    asyncpg when installed and DB_BACKEND is postgres, otherwise
+    PostgresTool on the I/O executor.
+    """
+    if asyncpg is not None and load_relational_config().backend == "postgres":
+        return AsyncPostgresTool()
+    return ExecutorPostgresTool(tool_factory, executor)
@@ -0,0 +1,222 @@
+"""
+Query Embedding Cache
+
+Responsibilities:
+- Map normalized query text to its embedding
+- Bounded capacity with LRU or LFU eviction (LFU counts age, ties go
+  to the least recently used entry)
+- Optional persistence to disk between restarts
+- Hit-rate metrics
+"""
+
+from collections import OrderedDict
+import logging
+import os
+import re
+import string
+import threading
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+from config.settings import load_embedding_cache_config
+
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION = re.compile(f"[{re.escape(string.punctuation)}]+")
+_WHITESPACE = re.compile(r"\s+")
+
+EVICTION_POLICIES = ("lru", "lfu")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Case-fold and collapse punctuation / whitespace runs.
+
+    "How do I reset my password?" and "how do i  reset my password"
+    share one cache entry.
+    """
+    text = _PUNCTUATION.sub(" ", query.casefold())
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class EmbeddingCache:
+    """
+    Thread-safe bounded cache of query embeddings.
+
+    Entries are kept in recency order under both policies. LFU evicts
+    the least frequently used entry, the least recent one among ties,
+    and halves every count once `capacity` uses have been recorded, so
+    formerly popular queries do not stay forever and new entries get a
+    chance to build up hits.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        capacity: int = 2048,
+        eviction: str = "lru",
+        path: Optional[str] = None,
+    ) -> None:
+        if eviction not in EVICTION_POLICIES:
+            raise ValueError(f"Unsupported eviction policy: {eviction}")
+
+        self._model_name = model_name
+        self._capacity = capacity
+        self._eviction = eviction
+        self._path = path
+
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._frequency: Dict[str, int] = {}
+        self._uses = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+        if path:
+            self._load()
+
+    @classmethod
+    def from_config(cls, model_name: str) -> "EmbeddingCache":
+        config = load_embedding_cache_config()
+        return cls(
+            model_name,
+            capacity=config.capacity,
+            eviction=config.eviction,
+            path=config.path,
+        )
+
+    def get(self, query: str) -> Optional[np.ndarray]:
+        """
+        Return the cached embedding for a query, or None on a miss.
+        """
+        key = normalize_query(query)
+
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is None:
+                self._stats["misses"] += 1
+                return None
+            self._touch(key)
+            self._stats["hits"] += 1
+            return embedding
+
+    def put(self, query: str, embedding: np.ndarray) -> np.ndarray:
+        """
+        Store an embedding and return the read-only cached copy.
+        """
+        # Copy so a row view never pins its whole batch matrix
+        embedding = np.array(embedding, dtype=np.float32)
+        embedding.setflags(write=False)
+
+        with self._lock:
+            self._store(normalize_query(query), embedding)
+
+        return embedding
+
+    def get_or_compute(
+        self,
+        query: str,
+        compute: Callable[[], np.ndarray],
+    ) -> np.ndarray:
+        """
+        Return the cached embedding for a query, computing it on a miss.
+        """
+        embedding = self.get(query)
+        if embedding is not None:
+            return embedding
+        return self.put(query, compute())
+
+    def _touch(self, key: str) -> None:
+        self._entries.move_to_end(key)
+        if self._eviction == "lfu":
+            self._frequency[key] += 1
+            self._age()
+
+    def _age(self) -> None:
+        self._uses += 1
+        if self._uses >= self._capacity:
+            self._uses = 0
+            for key in self._frequency:
+                self._frequency[key] //= 2
+
+    def _store(self, key: str, embedding: np.ndarray) -> None:
+        if self._capacity <= 0:
+            return
+
+        if key not in self._entries and len(self._entries) >= self._capacity:
+            if self._eviction == "lru":
+                victim = next(iter(self._entries))
+            else:
+                # min() keeps the first of equal counts: the least recent
+                victim = min(self._entries, key=self._frequency.__getitem__)
+            del self._entries[victim]
+            self._frequency.pop(victim, None)
+            self._stats["evictions"] += 1
+
+        self._entries[key] = embedding
+        self._entries.move_to_end(key)
+        if self._eviction == "lfu":
+            self._frequency[key] = self._frequency.get(key, 0) + 1
+            self._age()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+
+        lookups = stats["hits"] + stats["misses"]
+        stats["capacity"] = self._capacity
+        stats["eviction"] = self._eviction
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    # -------------------------
+    # Persistence
+    # -------------------------
+
+    def save(self) -> None:
+        """
+        Write entries to disk (atomic replace). No-op without a path.
+        """
+        if not self._path:
+            return
+
+        with self._lock:
+            keys = list(self._entries)
+            vectors = [self._entries[key] for key in keys]
+
+        if not keys:
+            return
+
+        directory = os.path.dirname(os.path.abspath(self._path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self._path}.tmp"
+
+        with open(tmp_path, "wb") as handle:
+            np.savez(
+                handle,
+                model=np.array(self._model_name),
+                keys=np.array(keys),
+                vectors=np.stack(vectors),
+            )
+        os.replace(tmp_path, self._path)
+
+    def _load(self) -> None:
+        if not os.path.exists(self._path):
+            return
+
+        try:
+            with np.load(self._path, allow_pickle=False) as data:
+                if str(data["model"]) != self._model_name:
+                    logger.info("Ignoring embedding cache built for another model")
+                    return
+                keys = data["keys"].tolist()
+                vectors = data["vectors"].astype(np.float32)
+        except (OSError, KeyError, ValueError):
+            logger.warning("Could not read embedding cache %s", self._path, exc_info=True)
+            return
+
+        # Keep the most recently saved entries if capacity shrank
+        for key, vector in list(zip(keys, vectors))[-self._capacity:]:
+            vector.setflags(write=False)
+            self._store(key, vector)
@@ -0,0 +1,283 @@
+"""
+Sentence Embedding Backends
+
+Responsibilities:
+- Load the sentence encoder selected by EMBEDDING_BACKEND:
+  PyTorch SentenceTransformer ("torch") or ONNX Runtime ("onnx")
+- Export a SentenceTransformer to ONNX once (optionally int8-quantized)
+  and reuse the exported files on later starts
+- Run the ONNX graph with a Rust fast tokenizer and NumPy pooling, so
+  serving workers never import torch
+- Keep the SentenceTransformer encode() API for both backends
+
+Export step (needs torch once; serving then only needs onnxruntime):
+    python -m tools.embedding_model --quantize
+"""
+
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from config.settings import EmbeddingModelConfig, load_embedding_model_config
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "onnx")
+EXPORT_FILE = "embedding.json"
+MODEL_FILE = "model.onnx"
+QUANTIZED_FILE = "model-int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+
+
+def model_key(model_name: str, config: Optional[EmbeddingModelConfig] = None) -> str:
+    """
+    Name the article index and query cache use for this model.
+
+    fp32 ONNX reproduces torch to ~1e-6 and shares its vectors; int8
+    vectors differ slightly, so they are kept apart.
+    """
+    config = config or load_embedding_model_config()
+    if config.backend == "onnx" and config.quantize:
+        return f"{model_name}@int8"
+    return model_name
+
+
+def load_embedding_model(
+    model_name: str,
+    config: Optional[EmbeddingModelConfig] = None,
+) -> Any:
+    """
+    Encoder for `model_name` (hub name or local SentenceTransformer
+    directory) on the configured backend. ONNX files are exported on
+    first use if the export step has not been run.
+    """
+    config = config or load_embedding_model_config()
+    if config.backend == "torch":
+        from sentence_transformers import SentenceTransformer
+
+        return SentenceTransformer(model_name)
+
+    if config.backend == "onnx":
+        export_dir = _export_dir(config.onnx_dir, model_name)
+        if not os.path.exists(os.path.join(export_dir, EXPORT_FILE)):
+            logger.info("No ONNX export of %s in %s; exporting now", model_name, export_dir)
+            export_onnx(model_name, config.onnx_dir)
+        if config.quantize and not os.path.exists(os.path.join(export_dir, QUANTIZED_FILE)):
+            quantize_onnx(export_dir)
+        return OnnxEmbedder(export_dir, quantize=config.quantize, threads=config.threads)
+
+    raise ValueError(f"Unsupported embedding backend: {config.backend} (expected one of {BACKENDS})")
+
+
+def _export_dir(directory: str, model_name: str) -> str:
+    name = os.path.normpath(model_name).strip(os.sep).replace(os.sep, "__")
+    return os.path.join(directory, name)
+
+
+# ======================================================
+# Export (torch)
+# ======================================================
+
+def export_onnx(model_name: str, directory: str, opset: int = 17) -> str:
+    """
+    Export the transformer of a SentenceTransformer to ONNX, next to its
+    fast tokenizer and pooling settings. Returns the export directory.
+
+    Supports the mean-pooling (+ optional Normalize) pipelines used by
+    all-MiniLM-L6-v2 and most sentence-transformers checkpoints.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer, *rest = list(model)
+    kinds = [type(module).__name__ for module in rest]
+    pooling = rest[0].get_config_dict() if kinds and kinds[0] == "Pooling" else {}
+    mean = pooling.get("pooling_mode") == "mean" or pooling.get("pooling_mode_mean_tokens")
+    if not mean or kinds[1:] not in ([], ["Normalize"]):
+        raise ValueError(f"Only mean pooling (+ Normalize) can be exported, got {kinds}")
+
+    tokenizer = transformer.tokenizer
+    if not getattr(tokenizer, "is_fast", False):
+        raise ValueError(f"{model_name} has no fast tokenizer")
+    input_names = list(tokenizer.model_input_names)
+
+    class _Encoder(torch.nn.Module):
+        def __init__(self, inner: torch.nn.Module) -> None:
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, *inputs: torch.Tensor) -> torch.Tensor:
+            return self.inner(**dict(zip(input_names, inputs))).last_hidden_state
+
+    target = _export_dir(directory, model_name)
+    os.makedirs(target, exist_ok=True)
+    suffix = f".tmp-{os.getpid()}"
+
+    # eval() on the wrapper: export restores its train/eval mode afterwards
+    encoder = _Encoder(transformer.auto_model).eval()
+    sample = tokenizer(
+        ["an example sentence for tracing", "short"], padding=True, return_tensors="pt"
+    )
+    torch.onnx.export(
+        encoder,
+        tuple(sample[name] for name in input_names),
+        os.path.join(target, MODEL_FILE + suffix),
+        input_names=input_names,
+        output_names=["last_hidden_state"],
+        dynamic_axes={
+            name: {0: "batch", 1: "sequence"} for name in input_names + ["last_hidden_state"]
+        },
+        opset_version=opset,
+        # TorchScript exporter: the dynamo one needs onnxscript
+        dynamo=False,
+    )
+    os.replace(os.path.join(target, MODEL_FILE + suffix), os.path.join(target, MODEL_FILE))
+    tokenizer.backend_tokenizer.save(os.path.join(target, TOKENIZER_FILE))
+
+    # Written last: its presence marks a complete export
+    with open(os.path.join(target, EXPORT_FILE + suffix), "w", encoding="utf-8") as handle:
+        json.dump(
+            {
+                "model_name": model_name,
+                "dimension": model.get_sentence_embedding_dimension(),
+                "max_length": model.max_seq_length,
+                "normalize": kinds[1:] == ["Normalize"],
+                "input_names": input_names,
+                "pad_token": tokenizer.pad_token,
+                "pad_token_id": tokenizer.pad_token_id,
+            },
+            handle,
+        )
+    os.replace(os.path.join(target, EXPORT_FILE + suffix), os.path.join(target, EXPORT_FILE))
+    return target
+
+
+def quantize_onnx(export_dir: str) -> str:
+    """
+    Dynamic int8 weight quantization of an exported model (no torch).
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    path = os.path.join(export_dir, QUANTIZED_FILE)
+    quantize_dynamic(
+        os.path.join(export_dir, MODEL_FILE),
+        path + f".tmp-{os.getpid()}",
+        weight_type=QuantType.QInt8,
+    )
+    os.replace(path + f".tmp-{os.getpid()}", path)
+    return path
+
+
+# ======================================================
+# Inference (onnxruntime + tokenizers)
+# ======================================================
+
+class OnnxEmbedder:
+    """
+    SentenceTransformer-compatible encoder on ONNX Runtime.
+
+    Texts are sorted by length and encoded in batches, so short queries
+    are not padded to the longest article. Mean pooling and
+    normalization run in NumPy.
+    """
+
+    def __init__(
+        self,
+        export_dir: str,
+        quantize: bool = False,
+        threads: int = 0,
+        batch_size: int = 32,
+    ) -> None:
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(export_dir, EXPORT_FILE), "r", encoding="utf-8") as handle:
+            self._export: Dict[str, Any] = json.load(handle)
+        self._batch_size = batch_size
+
+        self._tokenizer = Tokenizer.from_file(os.path.join(export_dir, TOKENIZER_FILE))
+        self._tokenizer.enable_truncation(self._export["max_length"])
+        self._tokenizer.enable_padding(
+            pad_id=self._export["pad_token_id"], pad_token=self._export["pad_token"]
+        )
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        self._session = onnxruntime.InferenceSession(
+            os.path.join(export_dir, QUANTIZED_FILE if quantize else MODEL_FILE),
+            options,
+            providers=["CPUExecutionProvider"],
+        )
+        self._inputs = {node.name for node in self._session.get_inputs()}
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self._export["dimension"]
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self._tokenizer.encode_batch(texts)
+        mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        feeds = {
+            "input_ids": np.array([encoding.ids for encoding in encodings], dtype=np.int64),
+            "attention_mask": mask,
+            "token_type_ids": np.array(
+                [encoding.type_ids for encoding in encodings], dtype=np.int64
+            ),
+        }
+        hidden = self._session.run(
+            None, {name: value for name, value in feeds.items() if name in self._inputs}
+        )[0]
+
+        weights = mask[:, :, None].astype(np.float32)
+        return (hidden * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1e-9)
+
+    def encode(
+        self,
+        sentences: Any,
+        batch_size: Optional[int] = None,
+        normalize_embeddings: bool = False,
+        **_: Any,
+    ) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        batch_size = batch_size or self._batch_size
+
+        vectors = np.empty((len(texts), self.get_sentence_embedding_dimension()), dtype=np.float32)
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+        for start in range(0, len(order), batch_size):
+            rows = order[start:start + batch_size]
+            vectors[rows] = self._encode_batch([texts[i] for i in rows])
+
+        if normalize_embeddings or self._export["normalize"]:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors /= np.maximum(norms, 1e-12)
+
+        return vectors[0] if single else vectors
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from tools.vector_tool import MODEL_NAME
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX")
+    parser.add_argument("--model", default=MODEL_NAME, help="SentenceTransformer name or path")
+    parser.add_argument("--quantize", action="store_true", help="Also write the int8 model")
+    args = parser.parse_args()
+
+    config = load_embedding_model_config()
+    export_dir = export_onnx(args.model, config.onnx_dir)
+    if args.quantize:
+        quantize_onnx(export_dir)
+    sizes = ", ".join(
+        f"{name} {os.path.getsize(os.path.join(export_dir, name)) / 2**20:.1f} MB"
+        for name in (MODEL_FILE, QUANTIZED_FILE)
+        if os.path.exists(os.path.join(export_dir, name))
+    )
+    print(f"✔ Exported {args.model} to {export_dir} ({sizes})")
@@ -8,12 +8,20 @@ Responsibilities:
 
 from typing import Dict, Optional
 
+from tools.metrics import tool_span
+
 
 class ExternalMockTool:
     """
     Simulates external APIs like weather or crypto.
     """
 
+    # Responses are fixed; bump when they change
+    VERSION = "mock-1"
+
+    def data_version(self) -> str:
+        return self.VERSION
+
     def run(self, tool_type: str, query: str) -> Optional[Dict[str, str]]:
         """
         Execute mock external request.
@@ -25,8 +33,11 @@ class ExternalMockTool:
         Returns:
             dict with result and source, or None if unsupported
         """
-        tool_type = tool_type.lower()
+        with tool_span("external", "run"):
+            return self._respond(tool_type.lower())
 
+    @staticmethod
+    def _respond(tool_type: str) -> Optional[Dict[str, str]]:
         if tool_type == "weather":
             return {
                 "result": "The weather today is sunny with a temperature of 25°C.",
@@ -0,0 +1,546 @@
+"""
+Document Ingestion Pipeline
+
+Responsibilities:
+- Feed PDF, Markdown, HTML and plain-text files into the knowledge base
+- Run as chained generators: read -> extract -> chunk -> batch-embed -> append
+- Keep memory flat: one page or text block, one chunk window and a
+  bounded number of embedding batches are held at a time
+- Spread embedding over a process pool on multi-core machines
+- Record each chunk's source, character offsets and page for citations
+- Skip encoding chunks whose content hash is already in the article index
+
+Build step (KB_STORE_PATH must be a file the API workers also use):
+    python -m tools.ingest docs/ exports/
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from html.parser import HTMLParser
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import re
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config.settings import IngestConfig, load_article_index_config, load_ingest_config
+from tools.article_index import IndexWriter, article_hash
+from tools.embedding_model import load_embedding_model, model_key
+from tools.knowledge_base import ArticleStore, slugify
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+# Characters read per step from text-like files
+READ_BLOCK = 64 * 1024
+
+# Embedding processes when INGEST_WORKERS=0; each one holds its own model
+DEFAULT_WORKERS = 4
+
+
+@dataclass(frozen=True)
+class TextBlock:
+    """
+    A run of extracted text, and the PDF page it came from.
+    """
+
+    text: str
+    page: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class Chunk:
+    """
+    One embedded passage. start / end are offsets into the document's
+    extracted text; page is the page the passage starts on.
+    """
+
+    source: str
+    number: int
+    start: int
+    end: int
+    page: Optional[int]
+    text: str
+
+    def article(self) -> Dict[str, Any]:
+        title = os.path.basename(self.source)
+        if self.page is not None:
+            title = f"{title} p. {self.page}"
+        # The hash keeps sources that slugify alike (a/b.md, a-b.md) apart
+        digest = hashlib.sha1(self.source.encode("utf-8")).hexdigest()[:8]
+        return {
+            "id": f"{slugify(self.source)}-{digest}-{self.number:05d}",
+            "title": title,
+            "content": self.text,
+            "source": self.source,
+            "start": self.start,
+            "end": self.end,
+            "page": self.page,
+        }
+
+
+# ======================================================
+# Read + extract
+# ======================================================
+
+def iter_files(paths: Iterable[str]) -> Iterator[str]:
+    """
+    Supported files under `paths` (directories are walked in name order).
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            for root, directories, names in os.walk(path):
+                directories.sort()
+                for name in sorted(names):
+                    candidate = os.path.join(root, name)
+                    if _kind(candidate):
+                        yield candidate
+        elif _kind(path):
+            yield path
+        else:
+            logger.warning("Skipping unsupported file: %s", path)
+
+
+_EXTENSIONS = {
+    ".pdf": "pdf",
+    ".md": "markdown",
+    ".markdown": "markdown",
+    ".html": "html",
+    ".htm": "html",
+    ".txt": "text",
+}
+
+
+def _kind(path: str) -> Optional[str]:
+    return _EXTENSIONS.get(os.path.splitext(path)[1].lower())
+
+
+def extract(path: str) -> Iterator[TextBlock]:
+    """
+    Plain text of one file, block by block.
+    """
+    kind = _kind(path)
+    if kind == "pdf":
+        return _extract_pdf(path)
+    if kind == "markdown":
+        return _extract_markdown(path)
+    if kind == "html":
+        return _extract_html(path)
+    if kind == "text":
+        return _extract_text(path)
+    raise ValueError(f"Unsupported file type: {path}")
+
+
+def _extract_pdf(path: str) -> Iterator[TextBlock]:
+    try:
+        from pypdf import PdfReader
+    except ImportError as exc:  # pragma: no cover - optional dependency
+        raise ImportError("PDF ingestion requires pypdf: pip install pypdf") from exc
+
+    # Pages are parsed on access, so only one page's text is held at a time
+    for number, page in enumerate(PdfReader(path).pages, start=1):
+        # Line breaks in PDF text are layout, not structure
+        text = " ".join((page.extract_text() or "").split())
+        if text:
+            yield TextBlock(text + "\n\n", number)
+
+
+def _extract_text(path: str) -> Iterator[TextBlock]:
+    with open(path, "r", encoding="utf-8", errors="replace") as handle:
+        while block := handle.read(READ_BLOCK):
+            yield TextBlock(block)
+
+
+_MARKDOWN_RULES = [
+    (re.compile(r"!\[[^\]]*\]\([^)]*\)"), ""),          # images
+    (re.compile(r"\[([^\]]+)\]\([^)]*\)"), r"\1"),      # links -> their text
+    (re.compile(r"^\s{0,3}(#{1,6}|>)\s?"), ""),         # heading / quote markers
+    (re.compile(r"\*\*|__|`|<[^>]+>"), ""),             # bold, code, inline HTML
+]
+
+
+def _extract_markdown(path: str) -> Iterator[TextBlock]:
+    lines: List[str] = []
+    size = 0
+    with open(path, "r", encoding="utf-8", errors="replace") as handle:
+        for line in handle:
+            if line.lstrip().startswith(("```", "~~~")):
+                continue
+            for pattern, replacement in _MARKDOWN_RULES:
+                line = pattern.sub(replacement, line)
+            lines.append(line)
+            size += len(line)
+            if size >= READ_BLOCK:
+                yield TextBlock("".join(lines))
+                lines, size = [], 0
+    if lines:
+        yield TextBlock("".join(lines))
+
+
+class _HTMLText(HTMLParser):
+    """
+    Visible text of an HTML document, fed in blocks.
+    """
+
+    SKIP = {"script", "style", "noscript", "template", "svg"}
+    BREAK = {
+        "p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6",
+        "section", "article", "header", "footer", "pre", "blockquote", "table",
+    }
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self._parts: List[str] = []
+        self._skipping = 0
+
+    def handle_starttag(self, tag: str, _attrs: Any) -> None:
+        if tag in self.SKIP:
+            self._skipping += 1
+        elif tag in self.BREAK:
+            self._parts.append("\n")
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in self.SKIP:
+            self._skipping = max(0, self._skipping - 1)
+        elif tag in self.BREAK:
+            self._parts.append("\n")
+
+    def handle_data(self, data: str) -> None:
+        if not self._skipping:
+            self._parts.append(data)
+
+    def drain(self) -> str:
+        text = "".join(self._parts)
+        self._parts.clear()
+        # Collapse markup indentation; keep paragraph breaks
+        text = re.sub(r"[ \t\r\f\v]+", " ", text)
+        text = re.sub(r" *\n *", "\n", text)
+        return re.sub(r"\n{3,}", "\n\n", text)
+
+
+def _extract_html(path: str) -> Iterator[TextBlock]:
+    parser = _HTMLText()
+    with open(path, "r", encoding="utf-8", errors="replace") as handle:
+        while block := handle.read(READ_BLOCK):
+            parser.feed(block)
+            text = parser.drain()
+            if text.strip():
+                yield TextBlock(text)
+    parser.close()
+    text = parser.drain()
+    if text.strip():
+        yield TextBlock(text)
+
+
+# ======================================================
+# Chunk
+# ======================================================
+
+_WHITESPACE = re.compile(r"\s")
+
+
+def _boundary(text: str, start: int, limit: int) -> int:
+    """
+    End of a window: just after the last whitespace in its second half,
+    or `limit` for one long word.
+    """
+    for position in range(limit - 1, start + (limit - start) // 2, -1):
+        if text[position].isspace():
+            return position + 1
+    return limit
+
+
+def chunk_blocks(
+    source: str,
+    blocks: Iterable[TextBlock],
+    size: int,
+    overlap: int,
+) -> Iterator[Chunk]:
+    """
+    Sliding window over one document's text.
+
+    Windows are about `size` characters, end on whitespace when they
+    can, and the next window starts about `overlap` characters earlier
+    at a word start. Only the unconsumed tail of the text is kept.
+    """
+    if size <= 0 or not 0 <= overlap < size:
+        raise ValueError("Need 0 <= overlap < size")
+
+    text = ""
+    position = 0          # start of the next window within text
+    base = 0              # document offset of text[0]
+    shared = 0            # characters the last window shares with the next one
+    number = 0
+    pages: List[Tuple[int, Optional[int]]] = []  # (document offset, page) per block
+
+    def make(lo: int, hi: int) -> Optional[Chunk]:
+        window = text[lo:hi]
+        body = window.strip()
+        if not body:
+            return None
+        start = base + lo + (len(window) - len(window.lstrip()))
+        page = None
+        for offset, block_page in pages:
+            if offset > start:
+                break
+            page = block_page
+        return Chunk(source, number, start, start + len(body), page, body)
+
+    for block in blocks:
+        pages.append((base + len(text), block.page))
+        # Drop consumed text once per block, not per window
+        text = text[position:] + block.text
+        base += position
+        position = 0
+        while len(pages) > 1 and pages[1][0] <= base:
+            pages.pop(0)
+
+        while len(text) - position > size:
+            end = _boundary(text, position, position + size)
+            chunk = make(position, end)
+            if chunk is not None:
+                yield chunk
+                number += 1
+
+            restart = max(end - overlap, position + 1)
+            match = _WHITESPACE.search(text, restart, end)
+            restart = match.end() if match else restart
+            shared = end - restart
+            position = restart
+
+    # The tail is only new if it reaches past the previous window
+    if len(text) - position > shared or number == 0:
+        chunk = make(position, len(text))
+        if chunk is not None:
+            yield chunk
+
+
+# ======================================================
+# Batch-embed
+# ======================================================
+
+def load_model(model_name: str = MODEL_NAME) -> Any:
+    return load_embedding_model(model_name)
+
+
+_worker_model: Any = None
+
+
+def _init_worker(model_factory: Callable[[], Any]) -> None:
+    global _worker_model
+
+    # Processes share the CPUs: one intra-op thread each
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(1)
+    os.environ["EMBEDDING_THREADS"] = "1"
+    _worker_model = model_factory()
+
+
+def _encode_in_worker(texts: List[str]) -> np.ndarray:
+    return _encode(_worker_model, texts)
+
+
+def _encode(model: Any, texts: List[str]) -> np.ndarray:
+    return np.asarray(model.encode(texts, normalize_embeddings=True), dtype=np.float32)
+
+
+class BatchEmbedder:
+    """
+    Encodes chunk batches inline, or across `workers` processes.
+
+    At most two batches per worker are in flight, so a fast reader
+    never queues the whole corpus in memory. Results keep input order.
+    """
+
+    def __init__(self, model_factory: Callable[[], Any], workers: int = 1) -> None:
+        self._workers = workers
+        self._model = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+        if workers > 1:
+            # spawn: forking a process with torch threads running can deadlock
+            self._pool = ProcessPoolExecutor(
+                workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(model_factory,),
+            )
+            probe = self._pool.submit(_encode_in_worker, ["dimension probe"]).result()
+        else:
+            self._model = model_factory()
+            probe = _encode(self._model, ["dimension probe"])
+        self.dimension = int(probe.shape[1])
+
+    def map(self, batches: Iterable[List[Chunk]]) -> Iterator[Tuple[List[Chunk], np.ndarray]]:
+        if self._pool is None:
+            for batch in batches:
+                yield batch, _encode(self._model, [chunk.text for chunk in batch])
+            return
+
+        pending: Deque = deque()
+        for batch in batches:
+            pending.append((batch, self._pool.submit(_encode_in_worker, [c.text for c in batch])))
+            if len(pending) >= 2 * self._workers:
+                done, future = pending.popleft()
+                yield done, future.result()
+        while pending:
+            done, future = pending.popleft()
+            yield done, future.result()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+
+
+# ======================================================
+# Pipeline
+# ======================================================
+
+@dataclass(frozen=True)
+class IngestStats:
+    files: int
+    chunks: int
+    embedded: int
+    reused: int
+    seconds: float
+    index_id: str
+    revision: int
+
+
+def _batches(
+    chunks: Iterable[Chunk],
+    known: IndexWriter,
+    batch_size: int,
+    spool: Any,
+    counts: Dict[str, int],
+) -> Iterator[List[Chunk]]:
+    """
+    Spool every chunk for the store; batch only those not yet embedded.
+    """
+    batch: List[Chunk] = []
+    for chunk in chunks:
+        article = chunk.article()
+        spool.write(json.dumps(article) + "\n")
+        counts["chunks"] += 1
+        if article_hash(article) in known:
+            counts["reused"] += 1
+            continue
+        batch.append(chunk)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _source_name(path: str) -> str:
+    # Relative to the working directory (e.g. docs/Manual.pdf) when inside it
+    relative = os.path.relpath(path)
+    return os.path.abspath(path) if relative.startswith("..") else relative
+
+
+def ingest(
+    paths: Sequence[str],
+    store: ArticleStore,
+    model_factory: Callable[[], Any] = partial(load_model, MODEL_NAME),
+    model_name: Optional[str] = None,
+    index_dir: Optional[str] = None,
+    config: Optional[IngestConfig] = None,
+) -> IngestStats:
+    """
+    Chunk, embed and index every supported file under `paths`.
+
+    Embeddings are appended to the on-disk article index first, then the
+    chunks replace any earlier chunks of the same files in `store` in one
+    revision. The API's indexer then finds every row already encoded.
+
+    Args:
+        model_name: Names the index rows; defaults to MODEL_NAME on the
+            configured embedding backend, as the search tool uses it.
+    """
+    model_name = model_name or model_key(MODEL_NAME)
+    config = config or load_ingest_config()
+    index_dir = index_dir or load_article_index_config().directory
+    workers = config.workers or min(DEFAULT_WORKERS, os.cpu_count() or 1)
+    started = time.perf_counter()
+
+    files = list(iter_files(paths))
+    sources = [_source_name(path) for path in files]
+    counts = {"chunks": 0, "reused": 0, "embedded": 0}
+
+    def chunks() -> Iterator[Chunk]:
+        for path, source in zip(files, sources):
+            logger.info("Ingesting %s", source)
+            yield from chunk_blocks(
+                source, extract(path), config.chunk_size, config.chunk_overlap
+            )
+
+    embedder = BatchEmbedder(model_factory, workers)
+    writer = IndexWriter(index_dir, model_name, embedder.dimension)
+    try:
+        with tempfile.TemporaryFile("w+", encoding="utf-8") as spool:
+            batches = _batches(chunks(), writer, config.batch_size, spool, counts)
+            for batch, vectors in embedder.map(batches):
+                writer.append([article_hash(chunk.article()) for chunk in batch], vectors)
+                counts["embedded"] += len(batch)
+
+            index_id = writer.commit()
+
+            spool.seek(0)
+            revision = store.replace_sources(sources, (json.loads(line) for line in spool))
+    except BaseException:
+        writer.abort()
+        raise
+    finally:
+        embedder.close()
+
+    return IngestStats(
+        files=len(files),
+        chunks=counts["chunks"],
+        embedded=counts["embedded"],
+        reused=counts["reused"],
+        seconds=time.perf_counter() - started,
+        index_id=index_id,
+        revision=revision,
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+    import resource
+
+    from config.settings import load_knowledge_base_config
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description="Ingest documents into the knowledge base")
+    parser.add_argument("paths", nargs="+", help="Files or directories (PDF, Markdown, HTML, text)")
+    parser.add_argument("--model", default=MODEL_NAME, help="SentenceTransformer name or path")
+    args = parser.parse_args()
+
+    store_path = load_knowledge_base_config().store_path
+    if store_path == ":memory:":
+        parser.error("Set KB_STORE_PATH to the store file the API uses")
+
+    result = ingest(
+        args.paths,
+        ArticleStore(store_path),
+        model_factory=partial(load_model, args.model),
+        model_name=model_key(os.path.basename(os.path.normpath(args.model))),
+    )
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(
+        f"✔ {result.files} files -> {result.chunks} chunks "
+        f"({result.embedded} embedded, {result.reused} reused) in {result.seconds:.1f}s, "
+        f"{result.chunks / max(result.seconds, 1e-9):.0f} chunks/s, peak RSS {peak_mb:.0f} MB; "
+        f"index {result.index_id}, revision {result.revision}"
+    )
@@ -0,0 +1,395 @@
+"""
+Knowledge Base
+
+Responsibilities:
+- Store support articles by id (SQLite; in memory or a shared file)
+- Keep the source and offsets of ingested document chunks
+- Seed an empty store from the static ARTICLES list
+- Detect real changes by content hash and count them in a revision
+- Re-index changed articles in the background and swap the new index
+  into the live VectorSearchTool
+- Pick up changes made by other workers sharing the store file
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from config.settings import load_knowledge_base_config
+from data.vector_articles import ARTICLES
+from tools.article_index import article_hash
+
+logger = logging.getLogger(__name__)
+
+CREATED = "created"
+UPDATED = "updated"
+UNCHANGED = "unchanged"
+
+_SCHEMA = (
+    # position keeps index rows in insertion order; updates keep their slot
+    "CREATE TABLE IF NOT EXISTS articles ("
+    "position INTEGER PRIMARY KEY AUTOINCREMENT, "
+    "id TEXT NOT NULL UNIQUE, "
+    "title TEXT NOT NULL, "
+    "content TEXT NOT NULL, "
+    "content_hash TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS kb_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+)
+
+# Where an ingested chunk came from (NULL for hand-written articles)
+_CITATION_COLUMNS = {
+    "source": "TEXT",
+    "start": "INTEGER",
+    "end": "INTEGER",
+    "page": "INTEGER",
+}
+_COLUMNS = "id, title, content, " + ", ".join(f'"{name}"' for name in _CITATION_COLUMNS)
+
+
+def slugify(title: str) -> str:
+    """
+    Article id derived from its title ("Refund Policy" -> "refund-policy").
+    """
+    return re.sub(r"[^a-z0-9]+", "-", title.lower()).strip("-")
+
+
+class ArticleStore:
+    """
+    Articles keyed by id, plus a revision counter bumped by every change.
+
+    ":memory:" is private to the process. A file path is shared by every
+    worker pointing at it; writes are serialized by SQLite.
+    """
+
+    def __init__(
+        self,
+        path: str = ":memory:",
+        seed: Sequence[Dict[str, str]] = ARTICLES,
+    ) -> None:
+        self._path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        # Article writes are rare: one connection behind a lock is enough
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._connection.execute("PRAGMA journal_mode=WAL")
+
+        with self._lock, self._connection:
+            for statement in _SCHEMA:
+                self._connection.execute(statement)
+            existing = {
+                row["name"] for row in self._connection.execute("PRAGMA table_info(articles)")
+            }
+            for name, kind in _CITATION_COLUMNS.items():
+                if name not in existing:
+                    self._connection.execute(f'ALTER TABLE articles ADD COLUMN "{name}" {kind}')
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS idx_articles_source ON articles (source)"
+            )
+            # Seed once; a store emptied through the API stays empty
+            seeded = self._connection.execute(
+                "SELECT 1 FROM kb_meta WHERE key = 'revision'"
+            ).fetchone()
+            if not seeded:
+                for article in seed:
+                    self._insert(slugify(article["title"]), article["title"], article["content"])
+                self._connection.execute(
+                    "INSERT INTO kb_meta (key, value) VALUES ('revision', 0)"
+                )
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def _insert(self, article_id: str, title: str, content: str) -> None:
+        self._connection.execute(
+            "INSERT INTO articles (id, title, content, content_hash) VALUES (?, ?, ?, ?)",
+            (article_id, title, content, article_hash({"title": title, "content": content})),
+        )
+
+    def _bump(self) -> int:
+        self._connection.execute("UPDATE kb_meta SET value = value + 1 WHERE key = 'revision'")
+        return self._revision()
+
+    def _revision(self) -> int:
+        return self._connection.execute(
+            "SELECT value FROM kb_meta WHERE key = 'revision'"
+        ).fetchone()[0]
+
+    # -------------------------
+    # Reads
+    # -------------------------
+
+    def revision(self) -> int:
+        with self._lock:
+            return self._revision()
+
+    def get(self, article_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT {_COLUMNS} FROM articles WHERE id = ?", (article_id,)
+            ).fetchone()
+        return _article(row) if row is not None else None
+
+    def snapshot(self) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Revision and every article in index order, read consistently.
+        """
+        with self._lock, self._connection:
+            # One read transaction so the revision matches the rows
+            self._connection.execute("BEGIN")
+            rows = self._connection.execute(
+                f"SELECT {_COLUMNS} FROM articles ORDER BY position"
+            ).fetchall()
+            return self._revision(), [_article(row) for row in rows]
+
+    # -------------------------
+    # Writes (each returns the new revision)
+    # -------------------------
+
+    def create(self, article_id: str, title: str, content: str) -> Optional[int]:
+        """
+        Add an article. Returns None if the id is already taken.
+        """
+        with self._lock, self._connection:
+            try:
+                self._insert(article_id, title, content)
+            except sqlite3.IntegrityError:
+                return None
+            return self._bump()
+
+    def put(self, article_id: str, title: str, content: str) -> Tuple[str, int]:
+        """
+        Create or replace an article. Identical content is not a change.
+
+        Returns:
+            (CREATED | UPDATED | UNCHANGED, revision)
+        """
+        content_hash = article_hash({"title": title, "content": content})
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT content_hash FROM articles WHERE id = ?", (article_id,)
+            ).fetchone()
+            if row is None:
+                self._insert(article_id, title, content)
+                return CREATED, self._bump()
+            if row["content_hash"] == content_hash:
+                return UNCHANGED, self._revision()
+
+            self._connection.execute(
+                "UPDATE articles SET title = ?, content = ?, content_hash = ? WHERE id = ?",
+                (title, content, content_hash, article_id),
+            )
+            return UPDATED, self._bump()
+
+    def delete(self, article_id: str) -> Optional[int]:
+        """
+        Remove an article. Returns None if it did not exist.
+        """
+        with self._lock, self._connection:
+            cursor = self._connection.execute("DELETE FROM articles WHERE id = ?", (article_id,))
+            if cursor.rowcount == 0:
+                return None
+            return self._bump()
+
+    def replace_sources(
+        self,
+        sources: Sequence[str],
+        articles: Iterable[Dict[str, Any]],
+    ) -> int:
+        """
+        Swap every chunk of `sources` for `articles` in one transaction
+        (one revision). `articles` may be a generator; rows are inserted
+        in batches as it yields.
+
+        Raises:
+            ValueError: An id is taken by an article outside `sources`
+                (or repeated); nothing is changed.
+        """
+        columns = ["id", "title", "content", "content_hash", *_CITATION_COLUMNS]
+        statement = (
+            "INSERT INTO articles ("
+            + ", ".join(f'"{name}"' for name in columns)
+            + ") VALUES (" + ", ".join("?" * len(columns)) + ")"
+        )
+
+        current: Optional[str] = None
+
+        def rows() -> Iterator[Tuple[Any, ...]]:
+            nonlocal current
+            for article in articles:
+                current = article["id"]
+                yield (
+                    article["id"],
+                    article["title"],
+                    article["content"],
+                    article_hash(article),
+                    *(article.get(name) for name in _CITATION_COLUMNS),
+                )
+
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "DELETE FROM articles WHERE source = ?", ((source,) for source in sources)
+            )
+            try:
+                self._connection.executemany(statement, rows())
+            except sqlite3.IntegrityError:
+                raise ValueError(
+                    f"Article id {current!r} is already used by another article"
+                ) from None
+            return self._bump()
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+def _article(row: sqlite3.Row) -> Dict[str, Any]:
+    # Citation fields only for chunks that have them
+    return {key: row[key] for key in row.keys() if row[key] is not None}
+
+
+class KnowledgeBase:
+    """
+    Keeps the search index in step with the ArticleStore.
+
+    Writes only touch the store and wake the indexer thread. The thread
+    hands the full article list to VectorSearchTool.replace_articles(),
+    which encodes just the new or changed articles and swaps the index.
+    Several writes during one build are picked up by a single next build.
+    """
+
+    def __init__(
+        self,
+        store: ArticleStore,
+        tool_factory: Callable[[], Any],
+        sync_interval_seconds: Optional[float] = None,
+    ) -> None:
+        """
+        Args:
+            tool_factory: Returns the live VectorSearchTool.
+            sync_interval_seconds: How often to look for changes made by
+                other workers; None only reacts to local writes.
+        """
+        self._store = store
+        self._tool_factory = tool_factory
+        self._sync_interval = sync_interval_seconds
+
+        # Revision the live search tool was built from; None until it exists
+        self._indexed_revision: Optional[int] = None
+        self._building = False
+        self._last_error: Optional[str] = None
+        self._condition = threading.Condition()
+
+        self._wakeup = threading.Event()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(
+            target=self._index_loop, name="kb-indexer", daemon=True
+        )
+        self._thread.start()
+
+    @classmethod
+    def from_config(cls, tool_factory: Callable[[], Any]) -> "KnowledgeBase":
+        config = load_knowledge_base_config()
+        store = ArticleStore(config.store_path)
+        # Only a shared file can change behind this worker's back
+        interval = None if config.store_path == ":memory:" else config.sync_interval_seconds
+        return cls(store, tool_factory, interval)
+
+    @property
+    def store(self) -> ArticleStore:
+        return self._store
+
+    def load(self) -> List[Dict[str, str]]:
+        """
+        Articles for building the search tool; later changes are applied
+        by the indexer.
+        """
+        revision, articles = self._store.snapshot()
+        with self._condition:
+            self._indexed_revision = revision
+        return articles
+
+    def schedule(self) -> None:
+        """
+        Ask the indexer to bring the search index up to date.
+        """
+        self._wakeup.set()
+
+    def wait_indexed(self, revision: int, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the live index includes `revision` (or a later one).
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: self._indexed_revision is None or self._indexed_revision >= revision,
+                timeout,
+            )
+
+    def status(self) -> Dict[str, Any]:
+        with self._condition:
+            status = {
+                "revision": self._store.revision(),
+                "indexed_revision": self._indexed_revision,
+                "building": self._building,
+                "last_error": self._last_error,
+            }
+        return status
+
+    # -------------------------
+    # Indexer
+    # -------------------------
+
+    def _index_loop(self) -> None:
+        while not self._closed.is_set():
+            self._wakeup.wait(self._sync_interval)
+            self._wakeup.clear()
+            if self._closed.is_set():
+                return
+            try:
+                self.sync()
+            except Exception as exc:
+                # The store keeps the change; the next wakeup retries it
+                logger.exception("Knowledge base re-index failed")
+                with self._condition:
+                    self._last_error = str(exc)
+
+    def sync(self) -> bool:
+        """
+        Re-index if the store moved past the live index. Returns True
+        when a new index went live.
+        """
+        with self._condition:
+            if self._indexed_revision is None:
+                # No search tool yet: it will load the current articles itself
+                return False
+
+        revision, articles = self._store.snapshot()
+        with self._condition:
+            if revision <= self._indexed_revision:
+                return False
+            self._building = True
+
+        try:
+            self._tool_factory().replace_articles(articles)
+        finally:
+            with self._condition:
+                self._building = False
+
+        with self._condition:
+            self._indexed_revision = max(self._indexed_revision, revision)
+            self._last_error = None
+            self._condition.notify_all()
+        return True
+
+    def close(self) -> None:
+        self._closed.set()
+        self._wakeup.set()
+        self._thread.join(timeout=30)
+        self._store.close()
@@ -0,0 +1,242 @@
+"""
+Lexical Retrieval (BM25)
+
+Responsibilities:
+- Tokenize articles and queries the same way (lowercase words, codes
+  such as "err-1042" kept whole, plural "s" folded, stopwords dropped)
+- Inverted index with array-backed postings (CSR offsets, rows, weights)
+- Score a query with BM25 by touching only the postings of its terms
+- Report how much of the query each hit covers (idf-weighted)
+- Decide when a lexical hit is confident enough to skip the encoder
+- Fuse lexical and semantic rankings (reciprocal rank or weighted)
+"""
+
+from array import array
+from collections import Counter
+from dataclasses import dataclass
+import math
+import re
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from tools.retrieval import top_k_desc
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-_][a-z0-9]+)*")
+
+STOPWORDS = frozenset(
+    "a about an and any are as at be been by can could do does for from has have "
+    "how i if in is it its me my no not of on or our should so that the their them "
+    "there this to was we were what when where which who why will with would you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Index terms of `text`, in order, repeats kept.
+    """
+    terms = []
+    for token in _TOKEN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        # Fold simple plurals so "refunds" matches "refund"
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        terms.append(token)
+    return terms
+
+
+@dataclass(frozen=True)
+class LexicalHits:
+    """
+    Matching rows, best BM25 score first.
+
+    coverage[i] is the share of the query's idf weight that row
+    indices[i] contains (1.0 = every query term occurs in it).
+    """
+
+    indices: np.ndarray
+    scores: np.ndarray
+    coverage: np.ndarray
+
+
+_NO_HITS = LexicalHits(
+    np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32), np.empty(0, dtype=np.float32)
+)
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a fixed list of texts.
+
+    Postings are stored term-major in flat arrays: the rows containing
+    term t are rows[offsets[t]:offsets[t + 1]] (ascending), each with
+    its precomputed BM25 weight. A query sums the weights of its terms'
+    postings, so cost grows with how common the terms are, not with the
+    number of articles.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75) -> None:
+        self._k1 = k1
+        self._b = b
+        self._size = 0
+        self._vocabulary: Dict[str, int] = {}
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._rows = np.empty(0, dtype=np.int32)
+        self._weights = np.empty(0, dtype=np.float32)
+        self._idf = np.empty(0, dtype=np.float32)
+        self._unseen_idf = 0.0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def build(self, texts: Iterable[str]) -> None:
+        """
+        Index `texts`; row i of every result refers to the i-th text.
+        """
+        vocabulary: Dict[str, int] = {}
+        terms, rows, frequencies, lengths = array("i"), array("i"), array("f"), array("f")
+
+        for row, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            lengths.append(sum(counts.values()))
+            for term, count in counts.items():
+                terms.append(vocabulary.setdefault(term, len(vocabulary)))
+                rows.append(row)
+                frequencies.append(count)
+
+        size = len(lengths)
+        terms_np = np.frombuffer(terms, dtype=np.int32)
+        # Stable, so each term's rows stay ascending
+        order = np.argsort(terms_np, kind="stable")
+        posting_terms = terms_np[order]
+        posting_rows = np.frombuffer(rows, dtype=np.int32)[order]
+        tf = np.frombuffer(frequencies, dtype=np.float32)[order]
+
+        df = np.bincount(terms_np, minlength=len(vocabulary))
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(df, out=offsets[1:])
+        idf = np.log1p((size - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+        doc_lengths = np.frombuffer(lengths, dtype=np.float32)
+        average = float(doc_lengths.mean()) if size else 1.0
+        norm = self._k1 * (1 - self._b + self._b * doc_lengths[posting_rows] / max(average, 1e-9))
+        weights = idf[posting_terms] * tf * (self._k1 + 1) / (tf + norm)
+
+        self._size = size
+        self._vocabulary = vocabulary
+        self._offsets = offsets
+        self._rows = posting_rows
+        self._weights = weights.astype(np.float32)
+        self._idf = idf
+        # Query terms no article contains still count against coverage
+        self._unseen_idf = math.log1p((size + 0.5) / 0.5)
+
+    def _query_terms(self, query: str) -> Tuple[List[int], float]:
+        term_ids, total = [], 0.0
+        for term in set(tokenize(query)):
+            term_id = self._vocabulary.get(term)
+            if term_id is None:
+                total += self._unseen_idf
+            else:
+                term_ids.append(term_id)
+                total += float(self._idf[term_id])
+        return term_ids, total
+
+    def search(self, query: str, top_k: int) -> LexicalHits:
+        """
+        The top_k rows by BM25 score; rows sharing no term are left out.
+        """
+        term_ids, total = self._query_terms(query)
+        if not term_ids:
+            return _NO_HITS
+
+        spans = [(self._offsets[t], self._offsets[t + 1]) for t in term_ids]
+        rows = np.concatenate([self._rows[start:end] for start, end in spans])
+        weights = np.concatenate([self._weights[start:end] for start, end in spans])
+        matched = np.concatenate([
+            np.full(end - start, self._idf[t], dtype=np.float32)
+            for t, (start, end) in zip(term_ids, spans)
+        ])
+
+        if len(rows) * 8 < self._size:
+            # Rare terms: accumulate over the matched rows only
+            candidates, slots = np.unique(rows, return_inverse=True)
+        else:
+            # Common terms: a dense accumulator beats sorting the postings
+            candidates, slots = None, rows
+        scores = np.bincount(slots, weights=weights)
+        best = top_k_desc(scores, top_k)
+        best = best[scores[best] > 0]
+        coverage = np.bincount(slots, weights=matched)[best] / total
+
+        return LexicalHits(
+            (best if candidates is None else candidates[best]).astype(np.int64),
+            scores[best].astype(np.float32),
+            coverage.astype(np.float32),
+        )
+
+    def coverage(self, query: str, rows: np.ndarray) -> np.ndarray:
+        """
+        Query coverage of arbitrary rows (0.0 for rows matching nothing).
+        """
+        term_ids, total = self._query_terms(query)
+        covered = np.zeros(len(rows), dtype=np.float32)
+        if not term_ids or not len(rows):
+            return covered
+
+        for t in term_ids:
+            posting = self._rows[self._offsets[t]:self._offsets[t + 1]]
+            position = np.minimum(np.searchsorted(posting, rows), len(posting) - 1)
+            covered += np.where(posting[position] == rows, self._idf[t], 0.0).astype(np.float32)
+        return covered / np.float32(total)
+
+
+def is_confident(hits: LexicalHits, min_coverage: float, margin: float) -> bool:
+    """
+    True when the best lexical hit contains (nearly) every query term and
+    clearly outscores the runner-up, so the encoder can be skipped.
+    """
+    if not len(hits.indices) or hits.coverage[0] < min_coverage:
+        return False
+    return len(hits.indices) == 1 or hits.scores[0] >= margin * hits.scores[1]
+
+
+# -------------------------
+# Fusion
+# -------------------------
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[np.ndarray],
+    k: float = 60.0,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Merge best-first row lists: score(row) = sum of 1 / (k + rank).
+
+    Ties keep the order in which rows were first seen, so list the
+    preferred ranking first.
+    """
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking.tolist(), start=1):
+            fused[row] = fused.get(row, 0.0) + 1.0 / (k + rank)
+
+    order = sorted(fused, key=fused.__getitem__, reverse=True)
+    return (
+        np.asarray(order, dtype=np.int64),
+        np.asarray([fused[row] for row in order], dtype=np.float32),
+    )
+
+
+def weighted_fusion(
+    rows: np.ndarray,
+    lexical: np.ndarray,
+    semantic: np.ndarray,
+    lexical_weight: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rank rows by lexical_weight * coverage + (1 - lexical_weight) * cosine.
+    """
+    scores = (lexical_weight * lexical + (1.0 - lexical_weight) * semantic).astype(np.float32)
+    order = np.argsort(-scores, kind="stable")
+    return rows[order], scores[order]
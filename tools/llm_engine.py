@@ -0,0 +1,444 @@
+"""
+Local LLM Engine
+
+Responsibilities:
+- Load a causal LM on CPU, optionally with int8 dynamic quantization
+- Prefill the fixed system prompt once and reuse its KV cache
+- Batch concurrent requests on a single worker thread
+- Enforce max-new-token and deadline limits per request
+- Stream decoded text; record time-to-first-token and tokens/second
+
+Importing this module imports torch, so callers load it lazily.
+"""
+
+from collections import deque
+from concurrent.futures import Future
+import copy
+from dataclasses import dataclass, field
+import logging
+import math
+import queue
+import statistics
+import threading
+import time
+from typing import Any, Deque, Dict, Iterator, List, Optional, Set
+
+import torch
+
+from config.settings import LLMConfig
+
+logger = logging.getLogger(__name__)
+
+_END = object()
+
+
+@dataclass
+class GenerationResult:
+    text: str
+    tokens: int
+    # "eos" | "length" | "deadline"
+    finish_reason: str
+    ttft_ms: Optional[float]
+    tokens_per_second: float
+
+
+@dataclass
+class _Request:
+    suffix_ids: List[int]
+    max_new_tokens: int
+    deadline: float
+    submitted: float
+    chunks: "queue.SimpleQueue[Any]" = field(default_factory=queue.SimpleQueue)
+    future: Future = field(default_factory=Future)
+    generated: List[int] = field(default_factory=list)
+    emitted: str = ""
+    first_token_at: Optional[float] = None
+
+
+class GenerationStream:
+    """
+    Handle for one queued request.
+
+    Iterating yields text chunks as they are decoded (on the caller's
+    thread); result() blocks until generation has finished.
+    """
+
+    def __init__(self, request: _Request) -> None:
+        self._request = request
+
+    def __iter__(self) -> Iterator[str]:
+        while True:
+            chunk = self._request.chunks.get()
+            if chunk is _END:
+                return
+            yield chunk
+
+    def result(self, timeout: Optional[float] = None) -> GenerationResult:
+        return self._request.future.result(timeout)
+
+
+class LLMEngine:
+    """
+    Greedy generation server for one model.
+
+    Requests are collected for up to batch_window_ms (or max_batch
+    requests) and decoded together: the cached system-prompt KV is
+    expanded to the batch, user turns are left-padded after it, and rows
+    leave the batch as soon as they hit EOS, their token limit or their
+    deadline.
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        tokenizer: Any,
+        system_prompt: str,
+        max_new_tokens: int = 256,
+        deadline_ms: float = 30000.0,
+        max_batch: int = 4,
+        batch_window_ms: float = 10.0,
+    ) -> None:
+        self._model = model
+        self._tokenizer = tokenizer
+        self._system_prompt = system_prompt
+        self._max_new_tokens = max_new_tokens
+        self._deadline = deadline_ms / 1000.0
+        self._max_batch = max(1, max_batch)
+        self._window = batch_window_ms / 1000.0
+
+        self._stop_ids = self._eos_ids()
+        self._pad_id = next(iter(self._stop_ids), 0)
+
+        self._prefix_text = ""
+        self._prefix_ids: List[int] = []
+        self._prefix_cache = None
+        self._prefill_system_prompt()
+
+        self._queue: "queue.SimpleQueue[Optional[_Request]]" = queue.SimpleQueue()
+        self._stats = {
+            "requests": 0,
+            "batches": 0,
+            "tokens": 0,
+            "decode_seconds": 0.0,
+            "deadline_exceeded": 0,
+            "errors": 0,
+            "max_batch_seen": 0,
+        }
+        self._ttft_ms: Deque[float] = deque(maxlen=1000)
+        self._stats_lock = threading.Lock()
+
+        self._thread = threading.Thread(target=self._run, name="llm-engine", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_pretrained(cls, config: LLMConfig, system_prompt: str) -> "LLMEngine":
+        """
+        Load tokenizer and model from config.model_dir (int8 when config.quantize).
+        """
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+
+        if config.threads > 0:
+            torch.set_num_threads(config.threads)
+
+        tokenizer = AutoTokenizer.from_pretrained(config.model_dir)
+        model = AutoModelForCausalLM.from_pretrained(config.model_dir, dtype=torch.float32)
+        model.eval()
+
+        if config.quantize:
+            model = quantize_int8(model)
+
+        return cls(
+            model,
+            tokenizer,
+            system_prompt,
+            max_new_tokens=config.max_new_tokens,
+            deadline_ms=config.deadline_ms,
+            max_batch=config.max_batch,
+            batch_window_ms=config.batch_window_ms,
+        )
+
+    # -------------------------
+    # Prompting
+    # -------------------------
+
+    def _eos_ids(self) -> Set[int]:
+        ids: Set[int] = set()
+        for value in (
+            getattr(getattr(self._model, "generation_config", None), "eos_token_id", None),
+            getattr(self._tokenizer, "eos_token_id", None),
+        ):
+            if isinstance(value, int):
+                ids.add(value)
+            elif value:
+                ids.update(value)
+        return ids
+
+    def _encode(self, text: str) -> List[int]:
+        return list(self._tokenizer.encode(text, add_special_tokens=False))
+
+    def _prefill_system_prompt(self) -> None:
+        system = [{"role": "system", "content": self._system_prompt}]
+        prefix = self._tokenizer.apply_chat_template(system, tokenize=False)
+        probe = self._tokenizer.apply_chat_template(
+            system + [{"role": "user", "content": "?"}],
+            tokenize=False,
+            add_generation_prompt=True,
+        )
+
+        # Only cache when every prompt starts with the rendered system turn
+        if not prefix or not probe.startswith(prefix):
+            logger.info("Chat template has no reusable system prefix; caching disabled")
+            return
+
+        self._prefix_text = prefix
+        self._prefix_ids = self._encode(prefix)
+        with torch.inference_mode():
+            output = self._model(input_ids=torch.tensor([self._prefix_ids]), use_cache=True)
+        self._prefix_cache = output.past_key_values
+
+    def _suffix_ids(self, message: str) -> List[int]:
+        prompt = self._tokenizer.apply_chat_template(
+            [
+                {"role": "system", "content": self._system_prompt},
+                {"role": "user", "content": message},
+            ],
+            tokenize=False,
+            add_generation_prompt=True,
+        )
+        return self._encode(prompt[len(self._prefix_text):])
+
+    # -------------------------
+    # Public API
+    # -------------------------
+
+    def submit(
+        self,
+        message: str,
+        max_new_tokens: Optional[int] = None,
+        deadline_ms: Optional[float] = None,
+    ) -> GenerationStream:
+        """
+        Queue a user message for generation and return its stream handle.
+        """
+        now = time.perf_counter()
+        deadline = self._deadline if deadline_ms is None else deadline_ms / 1000.0
+        request = _Request(
+            suffix_ids=self._suffix_ids(message),
+            max_new_tokens=min(max_new_tokens or self._max_new_tokens, self._max_new_tokens),
+            deadline=now + deadline,
+            submitted=now,
+        )
+        self._queue.put(request)
+        return GenerationStream(request)
+
+    def generate(
+        self,
+        message: str,
+        max_new_tokens: Optional[int] = None,
+        deadline_ms: Optional[float] = None,
+    ) -> GenerationResult:
+        """
+        Blocking generation without streaming.
+        """
+        return self.submit(message, max_new_tokens, deadline_ms).result()
+
+    # -------------------------
+    # Worker
+    # -------------------------
+
+    def _collect(self, first: _Request) -> List[_Request]:
+        batch = [first]
+        deadline = time.perf_counter() + self._window
+
+        while len(batch) < self._max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._collect(first)
+            try:
+                with torch.inference_mode():
+                    self._decode(batch)
+            except Exception as exc:
+                logger.exception("LLM batch failed")
+                with self._stats_lock:
+                    self._stats["errors"] += len(batch)
+                for request in batch:
+                    if not request.future.done():
+                        request.chunks.put(_END)
+                        request.future.set_exception(exc)
+
+    def _decode(self, batch: List[_Request]) -> None:
+        now = time.perf_counter()
+        active = []
+        for request in batch:
+            if now >= request.deadline:
+                self._finish(request, "deadline", now)
+            else:
+                active.append(request)
+        if not active:
+            return
+
+        with self._stats_lock:
+            self._stats["batches"] += 1
+            self._stats["requests"] += len(active)
+            self._stats["max_batch_seen"] = max(self._stats["max_batch_seen"], len(active))
+
+        started = time.perf_counter()
+        size = len(active)
+        prefix_length = len(self._prefix_ids)
+        width = max(len(request.suffix_ids) for request in active)
+
+        # [prefix][pad...][user turn]; padded positions are masked out
+        input_ids = torch.full((size, width), self._pad_id, dtype=torch.long)
+        mask = torch.zeros((size, prefix_length + width), dtype=torch.long)
+        mask[:, :prefix_length] = 1
+        for row, request in enumerate(active):
+            length = len(request.suffix_ids)
+            input_ids[row, width - length:] = torch.tensor(request.suffix_ids)
+            mask[row, prefix_length + width - length:] = 1
+        positions = (mask.cumsum(dim=1) - 1).clamp(min=0)[:, prefix_length:]
+
+        cache = None
+        if self._prefix_cache is not None:
+            cache = copy.deepcopy(self._prefix_cache)
+            cache.batch_repeat_interleave(size)
+
+        output = self._model(
+            input_ids=input_ids,
+            attention_mask=mask,
+            position_ids=positions,
+            past_key_values=cache,
+            use_cache=True,
+        )
+
+        while active:
+            next_ids = output.logits[:, -1, :].argmax(dim=-1)
+            now = time.perf_counter()
+
+            keep = []
+            for row, request in enumerate(active):
+                token = int(next_ids[row])
+                if token in self._stop_ids:
+                    self._finish(request, "eos", now)
+                    continue
+
+                request.generated.append(token)
+                if request.first_token_at is None:
+                    request.first_token_at = now
+                self._emit(request)
+
+                if len(request.generated) >= request.max_new_tokens:
+                    self._finish(request, "length", now)
+                elif now >= request.deadline:
+                    self._finish(request, "deadline", now)
+                else:
+                    keep.append(row)
+
+            if not keep:
+                break
+
+            cache = output.past_key_values
+            if len(keep) < len(active):
+                index = torch.tensor(keep)
+                cache.batch_select_indices(index)
+                next_ids, mask, positions = next_ids[index], mask[index], positions[index]
+                active = [active[row] for row in keep]
+
+            mask = torch.cat([mask, torch.ones((len(active), 1), dtype=torch.long)], dim=1)
+            positions = positions[:, -1:] + 1
+            output = self._model(
+                input_ids=next_ids[:, None],
+                attention_mask=mask,
+                position_ids=positions,
+                past_key_values=cache,
+                use_cache=True,
+            )
+
+        with self._stats_lock:
+            self._stats["decode_seconds"] += time.perf_counter() - started
+
+    def _emit(self, request: _Request) -> None:
+        text = self._tokenizer.decode(request.generated, skip_special_tokens=True)
+        # Hold back incomplete multi-byte characters until the next token
+        if text.endswith("\ufffd"):
+            return
+        if len(text) > len(request.emitted):
+            request.chunks.put(text[len(request.emitted):])
+        request.emitted = text
+
+    def _finish(self, request: _Request, reason: str, now: float) -> None:
+        text = self._tokenizer.decode(request.generated, skip_special_tokens=True)
+        if len(text) > len(request.emitted):
+            request.chunks.put(text[len(request.emitted):])
+        request.chunks.put(_END)
+
+        tokens = len(request.generated)
+        ttft_ms = None
+        tokens_per_second = 0.0
+        if request.first_token_at is not None:
+            ttft_ms = (request.first_token_at - request.submitted) * 1000
+            # Decode rate after the first token (prefill is covered by TTFT)
+            elapsed = now - request.first_token_at
+            if tokens > 1 and elapsed > 0:
+                tokens_per_second = (tokens - 1) / elapsed
+
+        with self._stats_lock:
+            self._stats["tokens"] += tokens
+            if reason == "deadline":
+                self._stats["deadline_exceeded"] += 1
+            if ttft_ms is not None:
+                self._ttft_ms.append(ttft_ms)
+
+        request.future.set_result(
+            GenerationResult(text.strip(), tokens, reason, ttft_ms, tokens_per_second)
+        )
+
+    # -------------------------
+    # Metrics / lifecycle
+    # -------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+            ttft = list(self._ttft_ms)
+
+        stats["mean_batch"] = stats["requests"] / stats["batches"] if stats["batches"] else 0.0
+        stats["tokens_per_second"] = (
+            stats["tokens"] / stats["decode_seconds"] if stats["decode_seconds"] else 0.0
+        )
+        if ttft:
+            stats["ttft_ms_p50"] = statistics.median(ttft)
+            stats["ttft_ms_p95"] = sorted(ttft)[math.ceil(0.95 * len(ttft)) - 1]
+        stats["prefix_tokens"] = len(self._prefix_ids)
+        stats["queued"] = self._queue.qsize()
+        return stats
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+
+def quantize_int8(model: Any) -> Any:
+    """
+    Replace nn.Linear layers with int8 dynamically quantized versions.
+
+    Weights are stored as int8 (about 4x smaller than fp32), and
+    activations are quantized per batch at run time. Embeddings stay fp32.
+    """
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
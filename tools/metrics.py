@@ -0,0 +1,214 @@
+"""
+Latency Metrics
+
+Responsibilities:
+- Fixed-bucket latency histograms, labelled by route
+- Lock-free recording on the hot path (one shard per thread)
+- Render every histogram in Prometheus text format
+- Collect per-request spans for the Server-Timing header
+"""
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Seconds; 0.5 ms .. 10 s covers cache hits through slow generations
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_float(value: float) -> str:
+    return repr(float(value))
+
+
+class Histogram:
+    """
+    Prometheus-style histogram.
+
+    Each thread writes only to its own shard, so observe() takes no
+    lock; render() sums the shards. A scrape can miss an observation
+    that is in progress, which is fine for monitoring.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str],
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._buckets = tuple(sorted(buckets))
+
+        # Per-thread {labels: [count per bucket..., +Inf count, sum]}
+        self._shards: List[Dict[Labels, List[float]]] = []
+        self._shards_lock = threading.Lock()
+        self._local = threading.local()
+
+    def _shard(self) -> Dict[Labels, List[float]]:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def observe(self, labels: Labels, seconds: float) -> None:
+        shard = self._shard()
+        series = shard.get(labels)
+        if series is None:
+            series = shard[labels] = [0] * (len(self._buckets) + 1) + [0.0]
+        series[bisect_left(self._buckets, seconds)] += 1
+        series[-1] += seconds
+
+    def snapshot(self) -> Dict[Labels, List[float]]:
+        """
+        Labels -> merged [count per bucket..., +Inf count, sum].
+        """
+        with self._shards_lock:
+            shards = list(self._shards)
+
+        merged: Dict[Labels, List[float]] = {}
+        for shard in shards:
+            for labels, series in list(shard.items()):
+                total = merged.setdefault(labels, [0] * len(series))
+                for i, value in enumerate(list(series)):
+                    total[i] += value
+        return merged
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        bounds = [_format_float(b) for b in self._buckets] + ["+Inf"]
+
+        for labels, series in sorted(self.snapshot().items()):
+            pairs = ",".join(
+                f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, labels)
+            )
+            prefix = pairs + "," if pairs else ""
+
+            cumulative = 0
+            for bound, count in zip(bounds, series[:-1]):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{pairs}}} {_format_float(series[-1])}")
+            lines.append(f"{self.name}_count{{{pairs}}} {cumulative}")
+
+        return lines
+
+    def reset(self) -> None:
+        with self._shards_lock:
+            for shard in self._shards:
+                shard.clear()
+
+
+NODE_SECONDS = Histogram(
+    "supportdesk_node_seconds",
+    "Graph node latency in seconds.",
+    ("node", "route"),
+)
+TOOL_SECONDS = Histogram(
+    "supportdesk_tool_seconds",
+    "Tool call latency in seconds.",
+    ("route", "op"),
+)
+
+HISTOGRAMS = (NODE_SECONDS, TOOL_SECONDS)
+
+
+def render_metrics() -> str:
+    """
+    Every histogram in Prometheus text exposition format.
+    """
+    lines: List[str] = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    return "\n".join(lines) + "\n"
+
+
+# -------------------------
+# Per-request spans (Server-Timing)
+# -------------------------
+
+# Set for the duration of one request; graph tasks and executor calls
+# inherit the same list through their copied context
+_request_spans: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar(
+    "request_spans", default=None
+)
+
+
+@contextmanager
+def collect_spans() -> Iterator[List[Tuple[str, float]]]:
+    """
+    Gather (name, seconds) spans recorded while the block runs.
+    """
+    spans: List[Tuple[str, float]] = []
+    token = _request_spans.set(spans)
+    try:
+        yield spans
+    finally:
+        _request_spans.reset(token)
+
+
+def add_span(name: str, seconds: float) -> None:
+    """
+    Attribute time to the current request, if one is collecting.
+    """
+    spans = _request_spans.get()
+    if spans is not None:
+        # list.append is atomic; fan-out children append concurrently
+        spans.append((name, seconds))
+
+
+def observe_node(node: str, route: Optional[str], seconds: float) -> None:
+    NODE_SECONDS.observe((node, route or "none"), seconds)
+    add_span(f"node.{node}", seconds)
+
+
+@contextmanager
+def tool_span(route: str, op: str, request: bool = True) -> Iterator[None]:
+    """
+    Time a tool call into TOOL_SECONDS{route, op}.
+
+    Args:
+        request: Also add the span to the current request's timings.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        TOOL_SECONDS.observe((route, op), seconds)
+        if request:
+            add_span(f"{route}.{op}", seconds)
+
+
+def server_timing(spans: Sequence[Tuple[str, float]], total: Optional[float] = None) -> str:
+    """
+    Server-Timing header value; repeated span names are summed.
+    """
+    durations: Dict[str, float] = {}
+    for name, seconds in spans:
+        durations[name] = durations.get(name, 0.0) + seconds
+    if total is not None:
+        durations["total"] = total
+
+    return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in durations.items())
@@ -5,34 +5,202 @@ Responsibilities:
 - Execute SELECT-only SQL queries
 - Return rows and row count
 - Never raise on empty results
+- Run on a pluggable relational backend (PostgreSQL pool or in-process SQLite)
+- Serve fixed lookups from a prepared query catalog
+- Optionally cache results, invalidated by LISTEN/NOTIFY
+- Time every query, cache hits included
 """
 
-from typing import Any, Dict, List, Optional
+import logging
+import select
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2 import extensions, sql
+
+from config.settings import load_query_cache_config, load_relational_config
+from tools.metrics import tool_span
+from tools.query_cache import QueryCache
+from tools.relational import RelationalBackend, create_relational_backend
+
+logger = logging.getLogger(__name__)
+
+
+# name -> (parameter types, statement body)
+QUERY_CATALOG: Dict[str, Tuple[Tuple[str, ...], str]] = {
+    "ticket_by_id": (
+        ("integer",),
+        "SELECT id, issue, status FROM tickets WHERE id = $1",
+    ),
+    "customer_city_by_id": (
+        ("integer",),
+        "SELECT name, city FROM customers WHERE id = $1",
+    ),
+    "tickets_by_customer_name": (
+        ("text",),
+        "SELECT t.id, t.issue, t.status "
+        "FROM tickets t "
+        "JOIN customers c ON t.customer_id = c.id "
+        "WHERE lower(c.name) = lower($1)",
+    ),
+    # Bulk variants used by /chat/batch (one round trip per lookup type)
+    "tickets_by_ids": (
+        ("integer[]",),
+        "SELECT id, issue, status FROM tickets WHERE id = ANY($1)",
+    ),
+    "customers_by_ids": (
+        ("integer[]",),
+        "SELECT id, name, city FROM customers WHERE id = ANY($1)",
+    ),
+    "tickets_by_customer_names": (
+        ("text[]",),
+        "SELECT lower(c.name) AS customer_key, t.id, t.issue, t.status "
+        "FROM tickets t "
+        "JOIN customers c ON t.customer_id = c.id "
+        "WHERE lower(c.name) = ANY($1)",
+    ),
+}
+
+
+class CacheInvalidationListener:
+    """
+    Background LISTEN loop that invalidates QueryCache entries.
+
+    Payloads are table names sent by the notify_support_desk_change()
+    trigger. While the listening connection is down the cache is
+    suspended, because notifications may have been missed.
+    """
+
+    def __init__(
+        self,
+        cache: QueryCache,
+        channel: str,
+        connect: Callable[[], extensions.connection],
+        poll_interval: float = 1.0,
+        retry_delay: float = 2.0,
+    ) -> None:
+        self._cache = cache
+        self._channel = channel
+        self._connect = connect
+        self._poll_interval = poll_interval
+        self._retry_delay = retry_delay
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        # Nothing is trustworthy until LISTEN is active
+        self._cache.suspend()
+        self._thread = threading.Thread(
+            target=self._run, name="pg-cache-listener", daemon=True
+        )
+        self._thread.start()
 
-from config.settings import load_postgres_config
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self._poll_interval * 2)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            connection = None
+            try:
+                connection = self._connect()
+                connection.autocommit = True
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        sql.SQL("LISTEN {}").format(sql.Identifier(self._channel))
+                    )
+                self._cache.resume()
+                self._listen(connection)
+            except (psycopg2.Error, OSError):
+                logger.warning("Query cache listener disconnected", exc_info=True)
+            finally:
+                self._cache.suspend()
+                if connection is not None and not connection.closed:
+                    connection.close()
+
+            self._stop.wait(self._retry_delay)
+
+    def _listen(self, connection: extensions.connection) -> None:
+        while not self._stop.is_set():
+            readable, _, _ = select.select([connection], [], [], self._poll_interval)
+            if not readable:
+                continue
+
+            connection.poll()
+            while connection.notifies:
+                notification = connection.notifies.pop(0)
+                self._cache.invalidate_table(notification.payload)
 
 
 class PostgresTool:
     """
-    Tool for executing read-only PostgreSQL queries.
+    Tool for executing read-only SQL queries.
+
+    The SQL engine is a RelationalBackend (DB_BACKEND): a pooled
+    PostgreSQL server, or an in-process SQLite database.
     """
 
-    def __init__(self) -> None:
-        config = load_postgres_config()
-        self._connection = psycopg2.connect(
-            host=config.host,
-            port=config.port,
-            dbname=config.database,
-            user=config.user,
-            password=config.password,
+    def __init__(
+        self,
+        pooled: Optional[bool] = None,
+        backend: Optional[RelationalBackend] = None,
+    ) -> None:
+        self._backend = backend or create_relational_backend(
+            load_relational_config(), QUERY_CATALOG, pooled
         )
 
+        # Optional read-through result cache
+        self._cache: Optional[QueryCache] = None
+        self._listener: Optional[CacheInvalidationListener] = None
+
+        cache_config = load_query_cache_config()
+        connect = self._backend.listener_connect()
+        if cache_config.enabled and connect is None:
+            # Nothing would ever invalidate it
+            logger.info("Query cache disabled: %s has no change notifications", self._backend.name)
+        elif cache_config.enabled:
+            self._cache = QueryCache(cache_config.max_size, cache_config.ttl_seconds)
+            self._listener = CacheInvalidationListener(self._cache, cache_config.channel, connect)
+            self._listener.start()
+
+    @property
+    def backend(self) -> RelationalBackend:
+        return self._backend
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """
+        Snapshot of connection usage (see the backend's pool_stats).
+        """
+        return self._backend.pool_stats()
+
+    def data_version(self) -> Optional[Hashable]:
+        """
+        Database change counter from LISTEN/NOTIFY, else the backend's own
+        (SQLite), or None when changes are not being tracked.
+        """
+        if self._cache is None:
+            return self._backend.data_version()
+        return self._cache.change_counter()
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Result cache counters (hits, misses, evictions, hit rate, size).
+        """
+        if self._cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self._cache.stats()}
+
+    # -------------------------
+    # Queries
+    # -------------------------
+
     def run_query(
         self,
         query: str,
         params: Optional[Dict[str, Any]] = None,
+        timeout_ms: Optional[int] = None,
     ) -> Dict[str, Any]:
         """
         Execute a SELECT-only SQL query.
@@ -40,6 +208,7 @@ class PostgresTool:
         Args:
             query: SQL SELECT query.
             params: Optional named parameters.
+            timeout_ms: Optional statement_timeout override for this query.
 
         Returns:
             dict with:
@@ -49,11 +218,61 @@ class PostgresTool:
         if not query.strip().lower().startswith("select"):
             raise ValueError("Only SELECT queries are allowed.")
 
-        with self._connection.cursor(cursor_factory=RealDictCursor) as cursor:
-            cursor.execute(query, params)
-            rows: List[Dict[str, Any]] = cursor.fetchall()
+        def load() -> Dict[str, Any]:
+            return _result(self._backend.execute(query, params, timeout_ms))
+
+        with tool_span("postgres", "run_query"):
+            if self._cache is None:
+                return load()
+
+            return self._cache.get_or_load(query, params, load)
+
+    def run_named(
+        self,
+        name: str,
+        params: Sequence[Any],
+        timeout_ms: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Execute a query from QUERY_CATALOG.
+
+        On PostgreSQL it runs as a server-side prepared statement, PREPAREd
+        once per pooled connection, so repeat calls skip parsing and planning.
+
+        Args:
+            name: Catalog entry name.
+            params: Positional parameters for the statement.
+            timeout_ms: Optional statement_timeout override for this query.
+
+        Returns:
+            Same shape as run_query.
+        """
+        if name not in QUERY_CATALOG:
+            raise ValueError(f"Unknown catalog query: {name}")
+
+        params = tuple(params)
+
+        def load() -> Dict[str, Any]:
+            return _result(self._backend.execute_named(name, params, timeout_ms))
+
+        with tool_span("postgres", "run_named"):
+            if self._cache is None:
+                return load()
+
+            # Key on the statement body so table dependencies are known
+            return self._cache.get_or_load(QUERY_CATALOG[name][1], params, load)
+
+    def close(self) -> None:
+        """
+        Stop the cache listener and close every connection.
+        """
+        if self._listener is not None:
+            self._listener.stop()
+        self._backend.close()
+
 
-        return {
-            "rows": rows,
-            "row_count": len(rows),
-        }
+def _result(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "rows": rows,
+        "row_count": len(rows),
+    }
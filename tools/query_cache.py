@@ -0,0 +1,238 @@
+"""
+Query Result Cache
+
+Responsibilities:
+- Read-through cache for SELECT results keyed by (normalized SQL, params)
+- TTL expiry, size bound and LRU eviction
+- Table-level invalidation driven by database change notifications
+- Hit / miss / eviction counters for sizing
+"""
+
+from collections import OrderedDict
+import re
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Hashable, Optional, Tuple
+
+_WHITESPACE = re.compile(r"\s+")
+_TABLE_REFERENCE = re.compile(r"\b(?:from|join)\s+([a-z_][a-z0-9_.]*)", re.IGNORECASE)
+
+
+def normalize_sql(query: str) -> str:
+    """
+    Collapse whitespace and drop a trailing semicolon.
+    """
+    return _WHITESPACE.sub(" ", query).strip().rstrip(";").rstrip()
+
+
+def referenced_tables(query: str) -> FrozenSet[str]:
+    """
+    Tables named after FROM / JOIN, without schema qualification.
+    """
+    return frozenset(
+        name.rsplit(".", 1)[-1].lower() for name in _TABLE_REFERENCE.findall(query)
+    )
+
+
+def _freeze(params: Any) -> Hashable:
+    # Array parameters (ANY(%s) lookups) arrive as lists: freeze them too
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return tuple(sorted((key, _freeze_value(value)) for key, value in params.items()))
+    return tuple(_freeze_value(value) for value in params)
+
+
+def _freeze_value(value: Any) -> Hashable:
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze_value(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze_value(item) for item in value)
+    if isinstance(value, dict):
+        return _freeze(value)
+    return value
+
+
+class QueryCache:
+    """
+    Thread-safe LRU + TTL cache for query results.
+
+    Entries remember the tables they read from. invalidate_table()
+    drops every dependent entry and bumps a per-table generation so a
+    query that was already in flight during the write is not stored.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._max_size = max_size
+        self._ttl = ttl_seconds
+        self._clock = clock
+
+        # key -> (expires_at, tables, value)
+        self._entries: "OrderedDict[Tuple, Tuple[float, FrozenSet[str], Any]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0
+        self._changes = 0
+        self._lock = threading.Lock()
+
+        # Cleared while change notifications cannot be trusted
+        self._active = threading.Event()
+        self._active.set()
+
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+        }
+
+    @staticmethod
+    def make_key(query: str, params: Any) -> Tuple:
+        return normalize_sql(query), _freeze(params)
+
+    def get_or_load(
+        self,
+        query: str,
+        params: Any,
+        loader: Callable[[], Any],
+    ) -> Any:
+        """
+        Return the cached result for (query, params) or load and store it.
+        """
+        if not self._active.is_set():
+            return loader()
+
+        key, tables = self._prepare(query, params)
+        hit, value, token = self._lookup(key, tables)
+        if hit:
+            return value
+
+        value = loader()
+        self._store(key, tables, token, value)
+        return value
+
+    async def aget_or_load(
+        self,
+        query: str,
+        params: Any,
+        loader: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        Async variant of get_or_load for coroutine loaders.
+        """
+        if not self._active.is_set():
+            return await loader()
+
+        key, tables = self._prepare(query, params)
+        hit, value, token = self._lookup(key, tables)
+        if hit:
+            return value
+
+        value = await loader()
+        self._store(key, tables, token, value)
+        return value
+
+    def _prepare(self, query: str, params: Any) -> Tuple[Tuple, FrozenSet[str]]:
+        key = self.make_key(query, params)
+        return key, referenced_tables(key[0])
+
+    def _lookup(self, key: Tuple, tables: FrozenSet[str]) -> Tuple[bool, Any, Tuple]:
+        now = self._clock()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return True, entry[2], ()
+                del self._entries[key]
+                self._stats["expirations"] += 1
+
+            self._stats["misses"] += 1
+            token = (
+                self._epoch,
+                {table: self._generations.get(table, 0) for table in tables},
+            )
+
+        return False, None, token
+
+    def _store(self, key: Tuple, tables: FrozenSet[str], token: Tuple, value: Any) -> None:
+        epoch, generations = token
+
+        with self._lock:
+            # A write landed while we were loading: the result may be stale
+            if not self._active.is_set() or self._epoch != epoch or any(
+                self._generations.get(table, 0) != generation
+                for table, generation in generations.items()
+            ):
+                return
+
+            self._entries[key] = (self._clock() + self._ttl, tables, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate_table(self, table: str) -> int:
+        """
+        Drop every entry that reads from a table.
+
+        Returns:
+            Number of entries removed.
+        """
+        table = table.rsplit(".", 1)[-1].lower()
+
+        with self._lock:
+            self._generations[table] = self._generations.get(table, 0) + 1
+            self._changes += 1
+            stale = [key for key, entry in self._entries.items() if table in entry[1]]
+            for key in stale:
+                del self._entries[key]
+            self._stats["invalidations"] += len(stale)
+
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._changes += 1
+            self._stats["invalidations"] += len(self._entries)
+            self._entries.clear()
+
+    def suspend(self) -> None:
+        """
+        Stop serving and storing entries (e.g. change feed lost).
+        """
+        self._active.clear()
+        self.clear()
+
+    def resume(self) -> None:
+        self._active.set()
+
+    def change_counter(self) -> Optional[int]:
+        """
+        Number of invalidations seen so far, or None while suspended
+        (changes may be going unnoticed).
+        """
+        if not self._active.is_set():
+            return None
+        with self._lock:
+            return self._changes
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+
+        lookups = stats["hits"] + stats["misses"]
+        stats["max_size"] = self._max_size
+        stats["ttl_seconds"] = self._ttl
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["active"] = self._active.is_set()
+        return stats
@@ -0,0 +1,199 @@
+"""
+Tool Registry
+
+Responsibilities:
+- Own long-lived tool instances shared by graph nodes and the API
+- Build each tool exactly once, lazily and thread-safely
+- Expose explicit warmup / shutdown lifecycle hooks
+- Keep one Postgres pool per process: once bound to the server's event
+  loop, sync lookups share the asyncpg pool
+"""
+
+import asyncio
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from tools.async_postgres_tool import (
+    AsyncPostgresTool,
+    BlockingPostgresTool,
+    create_async_postgres_tool,
+)
+from tools.knowledge_base import KnowledgeBase
+from tools.postgres_tool import PostgresTool
+from tools.vector_tool import VectorSearchTool
+from tools.external_tool import ExternalMockTool
+
+
+class ToolRegistry:
+    """
+    Process-wide container for warm tool instances.
+
+    Tools are expensive to build (embedding model, Chroma client,
+    database connection), so each one is constructed once and then
+    reused by every request.
+    """
+
+    def __init__(
+        self,
+        factories: Optional[Dict[str, Callable[[], Any]]] = None,
+    ) -> None:
+        self._factories: Dict[str, Callable[[], Any]] = factories or {
+            "postgres": self._build_postgres,
+            "knowledge_base": self._build_knowledge_base,
+            "vector": self._build_vector,
+            "external": ExternalMockTool,
+            "postgres_async": self._build_async_postgres,
+        }
+        self._instances: Dict[str, Any] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # One lock per tool so a slow model load never blocks other tools
+        self._locks = {name: threading.Lock() for name in self._factories}
+        self._ready = threading.Event()
+        self._last_error: Optional[BaseException] = None
+
+    def get(self, name: str) -> Any:
+        """
+        Return the shared instance for a tool, building it on first use.
+        """
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        if name not in self._factories:
+            raise KeyError(f"Unknown tool: {name}")
+
+        with self._locks[name]:
+            instance = self._instances.get(name)
+            if instance is None:
+                instance = self._factories[name]()
+                self._instances[name] = instance
+
+        return instance
+
+    def peek(self, name: str) -> Any:
+        """
+        Return the instance if it has been built, without building it.
+        """
+        return self._instances.get(name)
+
+    def register(self, name: str, factory: Callable[[], Any]) -> None:
+        """
+        Add a lazily built subsystem (e.g. the local LLM) to the registry.
+        """
+        self._locks.setdefault(name, threading.Lock())
+        self._factories[name] = factory
+
+    def bind_loop(self, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        """
+        Record the event loop serving async requests (None to unbind).
+
+        Must be called before the "postgres" tool is built to take effect.
+        """
+        self._loop = loop
+
+    def postgres(self) -> Any:
+        return self.get("postgres")
+
+    def vector(self) -> VectorSearchTool:
+        return self.get("vector")
+
+    def external(self) -> ExternalMockTool:
+        return self.get("external")
+
+    def async_postgres(self) -> Any:
+        return self.get("postgres_async")
+
+    def knowledge_base(self) -> KnowledgeBase:
+        return self.get("knowledge_base")
+
+    def _build_postgres(self) -> Any:
+        # With asyncpg serving the loop, a psycopg2 pool would double the
+        # connections; route blocking lookups through the asyncpg pool
+        if self._loop is not None:
+            tool = self.async_postgres()
+            if isinstance(tool, AsyncPostgresTool):
+                return BlockingPostgresTool(tool, self._loop)
+        return PostgresTool()
+
+    def _build_knowledge_base(self) -> KnowledgeBase:
+        return KnowledgeBase.from_config(self.vector)
+
+    def _build_vector(self) -> VectorSearchTool:
+        return VectorSearchTool(articles=self.knowledge_base().load())
+
+    def _build_async_postgres(self) -> Any:
+        from graph.runtime import get_runtime
+
+        return create_async_postgres_tool(self.postgres, get_runtime().io_executor)
+
+    def warmup(self, names: Optional[Iterable[str]] = None) -> None:
+        """
+        Eagerly build tools so the first request does not pay load time.
+
+        Args:
+            names: Tools to warm. Defaults to every registered tool;
+                an empty list warms nothing and marks the registry ready.
+        """
+        try:
+            for name in list(self._factories) if names is None else names:
+                self.get(name)
+        except Exception as exc:
+            self._last_error = exc
+            raise
+
+        self._last_error = None
+        self._ready.set()
+
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    @property
+    def last_error(self) -> Optional[BaseException]:
+        return self._last_error
+
+    async def ashutdown(self) -> None:
+        """
+        Close async resources (pools bound to the event loop), then shut down.
+        """
+        for instance in list(self._instances.values()):
+            aclose = getattr(instance, "aclose", None)
+            if callable(aclose):
+                await aclose()
+
+        self.shutdown()
+
+    def shutdown(self) -> None:
+        """
+        Release tool resources. Tools exposing close() are closed.
+        """
+        self._ready.clear()
+
+        for name in list(self._instances):
+            with self._locks[name]:
+                instance = self._instances.pop(name, None)
+            close = getattr(instance, "close", None)
+            if callable(close):
+                close()
+
+
+# ======================================================
+# Process-wide registry
+# ======================================================
+
+_registry: Optional[ToolRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ToolRegistry:
+    """
+    Return the registry shared by build_graph() and the API.
+    """
+    global _registry
+
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ToolRegistry()
+
+    return _registry
@@ -0,0 +1,552 @@
+"""
+Relational Backends
+
+Responsibilities:
+- One interface for the SQL engines behind PostgresTool
+- psycopg2: bounded, health-checked pool with server-side prepared statements
+- SQLite: in-process database loaded from db/schema.sql and db/seed.sql
+- Translate %s / %(name)s parameters and catalog statements for SQLite
+"""
+
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+import itertools
+import logging
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Sequence, Tuple
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
+
+from config.settings import (
+    RelationalConfig,
+    load_postgres_config,
+    load_postgres_pool_config,
+)
+
+logger = logging.getLogger(__name__)
+
+# name -> (parameter types, statement body with $1..$n placeholders)
+Catalog = Dict[str, Tuple[Tuple[str, ...], str]]
+Rows = List[Dict[str, Any]]
+
+# What a failed statement raises on any engine (connection loss, bad
+# data, statement timeout); callers that degrade gracefully catch these
+DATABASE_ERRORS = (psycopg2.Error, sqlite3.Error, TimeoutError)
+
+
+class RelationalBackend(ABC):
+    """
+    SQL engine that runs SELECTs and QUERY_CATALOG statements.
+    """
+
+    name: str
+
+    @abstractmethod
+    def execute(self, query: str, params: Any, timeout_ms: Optional[int]) -> Rows:
+        """
+        Run an ad-hoc query with psycopg2-style (%s / %(name)s) parameters.
+        """
+
+    @abstractmethod
+    def execute_named(self, name: str, params: Tuple[Any, ...], timeout_ms: Optional[int]) -> Rows:
+        """
+        Run a catalog statement with positional parameters.
+        """
+
+    def listener_connect(self) -> Optional[Callable[[], Any]]:
+        """
+        Connection factory for LISTEN/NOTIFY, or None if the engine has
+        no change notifications.
+        """
+        return None
+
+    def data_version(self) -> Optional[Hashable]:
+        """
+        Changes whenever the data may have changed; None if unknown.
+        """
+        return None
+
+    @abstractmethod
+    def pool_stats(self) -> Dict[str, Any]:
+        ...
+
+    def close(self) -> None:
+        return None
+
+
+# ======================================================
+# PostgreSQL (psycopg2)
+# ======================================================
+
+class _CatalogConnection(extensions.connection):
+    """
+    Connection that remembers which catalog statements it has PREPAREd.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.prepared_statements: set = set()
+        self.last_used = time.monotonic()
+
+
+def _is_broken(connection: extensions.connection) -> bool:
+    """
+    Cheap, round-trip-free liveness check for a pooled connection.
+
+    psycopg2 only notices a dead server once a query has failed on the
+    connection, so idle connections are also probed (see _probe).
+    """
+    if connection.closed:
+        return True
+    status = connection.get_transaction_status()
+    return status == extensions.TRANSACTION_STATUS_UNKNOWN
+
+
+def _probe(connection: extensions.connection) -> bool:
+    """
+    One SELECT 1 round trip; False if the server is gone.
+    """
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        return True
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        return False
+
+
+class Psycopg2Backend(RelationalBackend):
+    """
+    PostgreSQL server behind a ThreadedConnectionPool.
+
+    In pooled mode connections are checked out per query and returned
+    afterwards. With pooling disabled a single connection is shared,
+    serialised across threads.
+    """
+
+    name = "postgres"
+
+    def __init__(self, catalog: Catalog, pooled: Optional[bool] = None) -> None:
+        config = load_postgres_config()
+        pool_config = load_postgres_pool_config()
+
+        self._catalog = catalog
+        self._pooled = pool_config.enabled if pooled is None else pooled
+        self._max_size = pool_config.max_size if self._pooled else 1
+        min_size = min(pool_config.min_size, self._max_size) if self._pooled else 1
+
+        self._checkout_timeout = pool_config.checkout_timeout
+        self._statement_timeout_ms = pool_config.statement_timeout_ms
+        self._probe_idle_seconds = pool_config.probe_idle_seconds
+
+        self._connect_kwargs = dict(
+            host=config.host,
+            port=config.port,
+            dbname=config.database,
+            user=config.user,
+            password=config.password,
+        )
+
+        self._pool = ThreadedConnectionPool(
+            min_size,
+            self._max_size,
+            # Default per-statement limit; queries can override it
+            options=f"-c statement_timeout={self._statement_timeout_ms}",
+            connection_factory=_CatalogConnection,
+            **self._connect_kwargs,
+        )
+
+        # ThreadedConnectionPool raises when exhausted; the semaphore makes
+        # callers wait (up to checkout_timeout) for a free slot instead.
+        self._slots = threading.BoundedSemaphore(self._max_size)
+
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_seconds": 0.0,
+            "timeouts": 0,
+            "recycled": 0,
+            "in_use": 0,
+            "peak_in_use": 0,
+        }
+
+    def listener_connect(self) -> Callable[[], extensions.connection]:
+        return lambda: psycopg2.connect(**self._connect_kwargs)
+
+    # -------------------------
+    # Pool management
+    # -------------------------
+
+    def _get_healthy_connection(self) -> extensions.connection:
+        # Every connection in the pool may be stale after a DB restart:
+        # the ones idle for a while are probed before they are handed out
+        for _ in range(self._max_size + 1):
+            connection = self._pool.getconn()
+            if not _is_broken(connection):
+                # Read-only tool: never hold a transaction open between queries
+                if not connection.autocommit:
+                    connection.autocommit = True
+                idle = time.monotonic() - connection.last_used
+                if idle < self._probe_idle_seconds or _probe(connection):
+                    return connection
+
+            self._pool.putconn(connection, close=True)
+            with self._stats_lock:
+                self._stats["recycled"] += 1
+
+        raise psycopg2.OperationalError("No healthy Postgres connection available.")
+
+    @contextmanager
+    def _checkout(self) -> Iterator[extensions.connection]:
+        started = time.perf_counter()
+
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self._stats["waits"] += 1
+            if not self._slots.acquire(timeout=self._checkout_timeout):
+                with self._stats_lock:
+                    self._stats["timeouts"] += 1
+                raise TimeoutError(
+                    "Timed out waiting for a Postgres connection from the pool."
+                )
+
+        try:
+            connection = self._get_healthy_connection()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._stats_lock:
+            self._stats["checkouts"] += 1
+            self._stats["wait_seconds"] += time.perf_counter() - started
+            self._stats["in_use"] += 1
+            self._stats["peak_in_use"] = max(
+                self._stats["peak_in_use"], self._stats["in_use"]
+            )
+
+        broken = False
+        try:
+            yield connection
+        except extensions.QueryCanceledError:
+            # statement_timeout: the connection (and its PREPAREs) is fine
+            raise
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            broken = broken or _is_broken(connection)
+            connection.last_used = time.monotonic()
+            self._pool.putconn(connection, close=broken)
+
+            with self._stats_lock:
+                self._stats["in_use"] -= 1
+                if broken:
+                    self._stats["recycled"] += 1
+
+            self._slots.release()
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """
+        Snapshot of pool usage.
+
+        Returns:
+            dict with pool size, connections in use, saturation ratio
+            and cumulative checkout / wait / timeout / recycle counters.
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+
+        stats["backend"] = self.name
+        stats["pooled"] = self._pooled
+        stats["max_size"] = self._max_size
+        stats["available"] = self._max_size - stats["in_use"]
+        stats["saturation"] = stats["in_use"] / self._max_size
+        return stats
+
+    # -------------------------
+    # Queries
+    # -------------------------
+
+    def execute(self, query: str, params: Any, timeout_ms: Optional[int]) -> Rows:
+        return self._execute(query, params, timeout_ms)
+
+    def execute_named(self, name: str, params: Tuple[Any, ...], timeout_ms: Optional[int]) -> Rows:
+        """
+        Each statement is PREPAREd once per pooled connection, so repeat
+        calls skip parsing and planning.
+        """
+        placeholders = ", ".join(["%s"] * len(params))
+        return self._execute(f"EXECUTE {name} ({placeholders})", params, timeout_ms, prepare=name)
+
+    def _execute(
+        self,
+        query: str,
+        params: Any,
+        timeout_ms: Optional[int],
+        prepare: Optional[str] = None,
+    ) -> Rows:
+        override = timeout_ms is not None and timeout_ms != self._statement_timeout_ms
+
+        with self._checkout() as connection:
+            with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+                if prepare and prepare not in connection.prepared_statements:
+                    types, body = self._catalog[prepare]
+                    cursor.execute(f"PREPARE {prepare} ({', '.join(types)}) AS {body}")
+                    connection.prepared_statements.add(prepare)
+
+                if override:
+                    cursor.execute("SET statement_timeout = %s", (timeout_ms,))
+                try:
+                    cursor.execute(query, params)
+                    return cursor.fetchall()
+                finally:
+                    if override and not _is_broken(connection):
+                        cursor.execute(
+                            "SET statement_timeout = %s",
+                            (self._statement_timeout_ms,),
+                        )
+
+    def close(self) -> None:
+        if not self._pool.closed:
+            self._pool.closeall()
+
+
+# ======================================================
+# SQLite (in-process)
+# ======================================================
+
+_PARAMETER = re.compile(r"%\((\w+)\)s|%s|%%")
+# "= ANY($n)" (group 1) or a plain $n (group 2)
+_CATALOG_PLACEHOLDER = re.compile(r"=\s*ANY\(\$(\d+)\)|\$(\d+)", re.IGNORECASE)
+
+# Postgres-only DDL in the schema scripts (change-notification triggers)
+_POSTGRES_ONLY = re.compile(
+    r"^\s*(CREATE\s+(OR\s+REPLACE\s+)?FUNCTION|CREATE\s+TRIGGER|DROP\s+TRIGGER)",
+    re.IGNORECASE,
+)
+
+_memory_ids = itertools.count()
+
+
+def translate_parameters(query: str) -> str:
+    """
+    psycopg2 paramstyle -> sqlite3: %s -> ?, %(name)s -> :name, %% -> %.
+    """
+    def replace(match: "re.Match[str]") -> str:
+        if match.group(1):
+            return f":{match.group(1)}"
+        return "?" if match.group(0) == "%s" else "%"
+
+    return _PARAMETER.sub(replace, query)
+
+
+def translate_catalog(body: str, params: Sequence[Any]) -> Tuple[str, List[Any]]:
+    """
+    Catalog statement -> SQLite statement and flat parameters.
+
+    $n becomes a positional ?; "= ANY($n)" with an array parameter is
+    expanded to "IN (?, ...)".
+    """
+    values: List[Any] = []
+
+    # Placeholders are rewritten left to right, so values stay in order
+    def replace(match: "re.Match[str]") -> str:
+        if match.group(1):
+            items = list(params[int(match.group(1)) - 1])
+            values.extend(items)
+            return "IN (" + (", ".join("?" * len(items)) or "NULL") + ")"
+        values.append(params[int(match.group(2)) - 1])
+        return "?"
+
+    return _CATALOG_PLACEHOLDER.sub(replace, body), values
+
+
+def split_sql(script: str) -> List[str]:
+    """
+    Split a SQL script on semicolons outside quotes, $$ bodies and comments.
+    """
+    statements: List[str] = []
+    current: List[str] = []
+    i, length = 0, len(script)
+    quote: Optional[str] = None
+
+    while i < length:
+        char = script[i]
+        if quote is not None:
+            if script.startswith(quote, i):
+                current.append(quote)
+                i += len(quote)
+                quote = None
+                continue
+            current.append(char)
+        elif script.startswith("--", i):
+            end = script.find("\n", i)
+            i = length if end == -1 else end
+            continue
+        elif script.startswith("$$", i):
+            quote = "$$"
+            current.append("$$")
+            i += 2
+            continue
+        elif char == "'":
+            quote = "'"
+            current.append(char)
+        elif char == ";":
+            statements.append("".join(current).strip())
+            current = []
+        else:
+            current.append(char)
+        i += 1
+
+    statements.append("".join(current).strip())
+    return [statement for statement in statements if statement]
+
+
+class SQLiteBackend(RelationalBackend):
+    """
+    In-process SQLite database for single-node deployments and CI.
+
+    No socket or protocol round trip per query. Each thread gets its own
+    connection, so queries run in parallel (sqlite3 releases the GIL
+    while executing). ":memory:" is a process-private database, shared
+    by every connection of this backend and loaded from the schema and
+    seed scripts. A file database is loaded only if it has no tables.
+    """
+
+    name = "sqlite"
+
+    def __init__(
+        self,
+        catalog: Catalog,
+        path: str = ":memory:",
+        schema_path: Optional[str] = None,
+        seed_path: Optional[str] = None,
+        statement_timeout_ms: Optional[int] = None,
+    ) -> None:
+        self._catalog = catalog
+        self._statement_timeout_ms = statement_timeout_ms
+
+        if path == ":memory:":
+            # Shared cache lets every thread's connection see one database
+            self._database = f"file:supportdesk-{next(_memory_ids)}?mode=memory&cache=shared"
+        else:
+            self._database = f"file:{path}"
+
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+
+        # Keeps an in-memory database alive; also reads data_version
+        self._anchor = self._connect()
+        self._anchor_lock = threading.Lock()
+
+        if not self._anchor.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone():
+            for script in (schema_path, seed_path):
+                if script:
+                    self.load_script(script)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self._database, uri=True, check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+        with self._connections_lock:
+            self._connections.append(connection)
+        return connection
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        return connection
+
+    def load_script(self, path: str) -> None:
+        """
+        Run a Postgres-flavoured SQL script, skipping Postgres-only DDL.
+        """
+        with open(path, encoding="utf-8") as handle:
+            statements = split_sql(handle.read())
+
+        with self._anchor_lock:
+            for statement in statements:
+                if _POSTGRES_ONLY.match(statement):
+                    logger.debug("Skipping Postgres-only statement: %s", statement.split("\n", 1)[0])
+                    continue
+                self._anchor.execute(statement)
+            self._anchor.commit()
+
+    @contextmanager
+    def _deadline(self, connection: sqlite3.Connection, timeout_ms: Optional[int]) -> Iterator[None]:
+        timeout_ms = self._statement_timeout_ms if timeout_ms is None else timeout_ms
+        if not timeout_ms:
+            yield
+            return
+
+        deadline = time.perf_counter() + timeout_ms / 1000.0
+        # Checked every 1000 VM instructions; a non-zero return aborts
+        connection.set_progress_handler(lambda: time.perf_counter() > deadline, 1000)
+        try:
+            yield
+        except sqlite3.OperationalError as exc:
+            if time.perf_counter() > deadline:
+                raise TimeoutError(f"SQLite statement exceeded {timeout_ms} ms") from exc
+            raise
+        finally:
+            connection.set_progress_handler(None, 0)
+
+    def _run(self, query: str, params: Any, timeout_ms: Optional[int]) -> Rows:
+        connection = self._connection()
+        with self._deadline(connection, timeout_ms):
+            cursor = connection.execute(query, params if params is not None else ())
+            return [dict(row) for row in cursor]
+
+    def execute(self, query: str, params: Any, timeout_ms: Optional[int]) -> Rows:
+        return self._run(translate_parameters(query), params, timeout_ms)
+
+    def execute_named(self, name: str, params: Tuple[Any, ...], timeout_ms: Optional[int]) -> Rows:
+        query, values = translate_catalog(self._catalog[name][1], params)
+        return self._run(query, values, timeout_ms)
+
+    def data_version(self) -> int:
+        """
+        SQLite's own counter; moves when another connection commits.
+        """
+        with self._anchor_lock:
+            return self._anchor.execute("PRAGMA data_version").fetchone()[0]
+
+    def pool_stats(self) -> Dict[str, Any]:
+        with self._connections_lock:
+            connections = len(self._connections)
+        return {"backend": self.name, "pooled": False, "connections": connections}
+
+    def close(self) -> None:
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+
+
+def create_relational_backend(
+    config: RelationalConfig,
+    catalog: Catalog,
+    pooled: Optional[bool] = None,
+) -> RelationalBackend:
+    """
+    Build the backend named in config (DB_BACKEND).
+    """
+    if config.backend == Psycopg2Backend.name:
+        return Psycopg2Backend(catalog, pooled)
+    if config.backend == SQLiteBackend.name:
+        return SQLiteBackend(
+            catalog,
+            config.sqlite_path,
+            config.schema_path,
+            config.seed_path,
+            load_postgres_pool_config().statement_timeout_ms,
+        )
+
+    raise ValueError(f"Unknown DB_BACKEND: {config.backend}")
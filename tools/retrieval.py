@@ -0,0 +1,444 @@
+"""
+Retrieval Backends
+
+Responsibilities:
+- Common interface for top-k cosine retrieval over article embeddings
+- Exact NumPy engine (argpartition top-k), optionally over a compact
+  float16 or per-row-scaled int8 copy of the matrix with an exact fp32
+  re-rank of the best candidates
+- HNSW engines (Chroma's collection index or hnswlib)
+- IVF engine with int8-quantized candidate scoring and exact re-rank
+
+All engines take L2-normalized vectors and return exact cosine scores
+sorted high to low, so callers can apply one similarity cutoff. The one
+exception is compact exact storage with VECTOR_RERANK=0: its scores are
+the float16 / int8 approximations (int8 is about 1e-3 off the cosine).
+"""
+
+from abc import ABC, abstractmethod
+import mmap
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+
+from config.settings import RetrievalConfig
+
+# (row indices, cosine scores), best first
+Hits = Tuple[np.ndarray, np.ndarray]
+
+STORAGE_TYPES = ("float32", "float16", "int8")
+
+# Rows converted per step when building or scoring compact storage
+BLOCK_ROWS = 8192
+
+# float16 bits moved into float32 position read as x * 2**-112 (exact,
+# subnormals included), so widening is a few integer ops instead of
+# NumPy's slow float16 cast; scaling the query by 2**112 undoes it
+_FLOAT16_BIAS = np.float32(2.0 ** 112)
+_FLOAT16_MASK = np.int32(-0x70000001)  # 0x8FFFFFFF: sign bit + low 28 bits
+
+
+def top_k_desc(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k largest scores, sorted descending, in O(n + k log k).
+    """
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < scores.shape[0]:
+        candidates = np.argpartition(scores, -k)[-k:]
+    else:
+        candidates = np.arange(scores.shape[0])
+    return candidates[np.argsort(scores[candidates])[::-1]]
+
+
+def quantize_rows(embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    int8 codes and per-row fp32 scales with row ~= codes * scale.
+
+    Converted in blocks, so a memory-mapped matrix is never copied
+    whole into fp32.
+    """
+    count = embeddings.shape[0]
+    codes = np.empty(embeddings.shape, dtype=np.int8)
+    scales = np.empty(count, dtype=np.float32)
+    for start in range(0, count, BLOCK_ROWS):
+        block = np.asarray(embeddings[start:start + BLOCK_ROWS], dtype=np.float32)
+        peaks = np.abs(block).max(axis=1)
+        block_scales = (np.where(peaks > 0, peaks, 1.0) / 127.0).astype(np.float32)
+        codes[start:start + len(block)] = np.round(block / block_scales[:, None])
+        scales[start:start + len(block)] = block_scales
+    return codes, scales
+
+
+def _widen_float16(block: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """
+    float32 view of a finite float16 block, scaled by 2**-112.
+    """
+    np.copyto(out, block.view(np.int16))
+    np.left_shift(out, 13, out=out)
+    np.bitwise_and(out, _FLOAT16_MASK, out=out)
+    return out.view(np.float32)
+
+
+def release_pages(matrix: np.ndarray) -> None:
+    """
+    Unmap the resident pages of a read-only memory map once its rows have
+    been copied elsewhere; rows read later (re-rank) are faulted back in.
+    """
+    mapping = getattr(matrix, "_mmap", None)
+    if mapping is None or not hasattr(mmap, "MADV_DONTNEED"):
+        return
+    try:
+        mapping.madvise(mmap.MADV_DONTNEED)
+    except (OSError, ValueError):
+        pass
+
+
+class RetrievalBackend(ABC):
+    """
+    Top-k cosine search over a fixed embedding matrix.
+    """
+
+    name: str = ""
+
+    @abstractmethod
+    def build(self, embeddings: np.ndarray) -> None:
+        """
+        Index the article matrix (rows are L2-normalized).
+        """
+
+    @abstractmethod
+    def query(self, query: np.ndarray, top_k: int) -> Hits:
+        """
+        Return the top_k rows for one normalized query vector.
+        """
+
+    def memory_bytes(self) -> int:
+        """
+        Bytes of vector data this engine keeps resident (0 if unknown).
+        """
+        return 0
+
+    def query_batch(self, queries: np.ndarray, top_k: int) -> List[Hits]:
+        """
+        Top-k for each row of a (batch, dim) query matrix.
+        """
+        return [self.query(query, top_k) for query in queries]
+
+
+class ExactBackend(RetrievalBackend):
+    """
+    Brute-force dot product with argpartition selection.
+
+    storage="float16" or "int8" (per-row scale) scores a compact copy of
+    the matrix in blocks of BLOCK_ROWS rows, at 1/2 or ~1/4 of the fp32
+    memory. With rerank > 0 the best top_k * rerank rows are then
+    re-scored exactly from the fp32 matrix (a memory map is only paged
+    in for those rows); rerank=0 returns the compact scores.
+    """
+
+    name = "exact"
+
+    def __init__(self, storage: str = "float32", rerank: int = 0) -> None:
+        if storage not in STORAGE_TYPES:
+            raise ValueError(
+                f"Unsupported vector storage: {storage} (expected one of {STORAGE_TYPES})"
+            )
+        self._storage = storage
+        self._rerank = rerank
+        self._embeddings: Optional[np.ndarray] = None
+        self._matrix: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+
+    def build(self, embeddings: np.ndarray) -> None:
+        self._embeddings = embeddings
+        self._matrix = self._scales = None
+        if self._storage == "float32":
+            return
+
+        if self._storage == "int8":
+            self._matrix, self._scales = quantize_rows(embeddings)
+        else:
+            self._matrix = np.empty(embeddings.shape, dtype=np.float16)
+            for start in range(0, embeddings.shape[0], BLOCK_ROWS):
+                self._matrix[start:start + BLOCK_ROWS] = embeddings[start:start + BLOCK_ROWS]
+        release_pages(embeddings)
+
+    def memory_bytes(self) -> int:
+        if self._matrix is None:
+            return 0 if self._embeddings is None else self._embeddings.nbytes
+        return self._matrix.nbytes + (0 if self._scales is None else self._scales.nbytes)
+
+    def query(self, query: np.ndarray, top_k: int) -> Hits:
+        if self._matrix is not None:
+            return self._query_compact(query[None, :], top_k)[0]
+
+        scores = self._embeddings @ query
+        indices = top_k_desc(scores, top_k)
+        return indices, scores[indices]
+
+    def query_batch(self, queries: np.ndarray, top_k: int) -> List[Hits]:
+        if self._matrix is not None:
+            return self._query_compact(queries, top_k)
+
+        # One matrix multiply for the whole batch
+        scores = queries @ self._embeddings.T
+        hits = []
+        for row in scores:
+            indices = top_k_desc(row, top_k)
+            hits.append((indices, row[indices]))
+        return hits
+
+    def _query_compact(self, queries: np.ndarray, top_k: int) -> List[Hits]:
+        queries = np.asarray(queries, dtype=np.float32)
+        keep = top_k * self._rerank if self._rerank > 0 else top_k
+        widened = self._storage == "float16"
+        scaled = (queries * _FLOAT16_BIAS if widened else queries).T
+        # Per call, not per backend: queries run concurrently
+        buffer = np.empty(
+            (min(BLOCK_ROWS, self._matrix.shape[0]), queries.shape[1]),
+            dtype=np.int32 if widened else np.float32,
+        )
+
+        # Best `keep` rows of every block, per query
+        rows: List[List[np.ndarray]] = [[] for _ in queries]
+        values: List[List[np.ndarray]] = [[] for _ in queries]
+        for start in range(0, self._matrix.shape[0], BLOCK_ROWS):
+            codes = self._matrix[start:start + BLOCK_ROWS]
+            if widened:
+                block = _widen_float16(codes, buffer[:len(codes)])
+            else:
+                block = buffer[:len(codes)]
+                np.copyto(block, codes)
+            scores = block @ scaled
+            if self._scales is not None:
+                scores *= self._scales[start:start + BLOCK_ROWS, None]
+            for i in range(len(queries)):
+                best = top_k_desc(scores[:, i], keep)
+                rows[i].append(best + start)
+                values[i].append(scores[best, i])
+
+        hits = []
+        for i, query in enumerate(queries):
+            candidates = np.concatenate(rows[i]) if rows[i] else np.empty(0, dtype=np.int64)
+            approximate = np.concatenate(values[i]) if values[i] else np.empty(0, dtype=np.float32)
+            order = top_k_desc(approximate, keep)
+            shortlist, approximate = candidates[order], approximate[order]
+            if self._rerank <= 0:
+                hits.append((shortlist[:top_k], approximate[:top_k]))
+                continue
+
+            exact = np.asarray(self._embeddings[shortlist], dtype=np.float32) @ query
+            best = top_k_desc(exact, top_k)
+            hits.append((shortlist[best], exact[best]))
+        return hits
+
+
+class ChromaBackend(RetrievalBackend):
+    """
+    Queries the HNSW index of an existing Chroma collection.
+
+    The collection must use cosine space and ids of the form "doc_<row>".
+    """
+
+    name = "chroma"
+
+    def __init__(self, collection: Any) -> None:
+        self._collection = collection
+        self._size = 0
+
+    def build(self, embeddings: np.ndarray) -> None:
+        # Documents are added by VectorSearchTool; nothing else to index
+        self._size = embeddings.shape[0]
+
+    def query(self, query: np.ndarray, top_k: int) -> Hits:
+        return self.query_batch(query[None, :], top_k)[0]
+
+    def query_batch(self, queries: np.ndarray, top_k: int) -> List[Hits]:
+        k = min(top_k, self._size)
+        if k <= 0:
+            empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))
+            return [empty for _ in queries]
+
+        result = self._collection.query(
+            query_embeddings=queries.tolist(),
+            n_results=k,
+            include=["distances"],
+        )
+        hits = []
+        for ids, distances in zip(result["ids"], result["distances"]):
+            indices = np.array([int(doc_id[4:]) for doc_id in ids], dtype=np.int64)
+            # Cosine distance -> cosine similarity
+            hits.append((indices, 1.0 - np.asarray(distances, dtype=np.float32)))
+        return hits
+
+
+class HNSWBackend(RetrievalBackend):
+    """
+    Approximate search with a standalone hnswlib graph.
+    """
+
+    name = "hnsw"
+
+    def __init__(self, m: int = 16, ef_construction: int = 200, ef_search: int = 64) -> None:
+        try:
+            import hnswlib
+        except ImportError as exc:
+            raise ImportError(
+                "The 'hnsw' retrieval backend requires hnswlib: pip install hnswlib"
+            ) from exc
+
+        self._hnswlib = hnswlib
+        self._m = m
+        self._ef_construction = ef_construction
+        self._ef_search = ef_search
+        self._index = None
+        self._size = 0
+
+    def build(self, embeddings: np.ndarray) -> None:
+        self._size = embeddings.shape[0]
+        index = self._hnswlib.Index(space="cosine", dim=embeddings.shape[1])
+        index.init_index(
+            max_elements=max(self._size, 1),
+            ef_construction=self._ef_construction,
+            M=self._m,
+        )
+        if self._size:
+            index.add_items(np.asarray(embeddings, dtype=np.float32), np.arange(self._size))
+        index.set_ef(self._ef_search)
+        self._index = index
+
+    def query(self, query: np.ndarray, top_k: int) -> Hits:
+        return self.query_batch(query[None, :], top_k)[0]
+
+    def query_batch(self, queries: np.ndarray, top_k: int) -> List[Hits]:
+        k = min(top_k, self._size)
+        if k <= 0:
+            empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))
+            return [empty for _ in queries]
+
+        labels, distances = self._index.knn_query(queries, k=k)
+        return [
+            (row_labels.astype(np.int64), 1.0 - row_distances)
+            for row_labels, row_distances in zip(labels, distances)
+        ]
+
+
+class IVFBackend(RetrievalBackend):
+    """
+    Inverted-file index over k-means cells.
+
+    Candidates in the probed cells are scored on int8 codes with a
+    per-row scale, then the best top_k * rerank are re-scored exactly in
+    fp32 (rerank=0 returns the int8 scores).
+    """
+
+    name = "ivf"
+
+    def __init__(
+        self,
+        nlist: int = 1024,
+        nprobe: int = 16,
+        rerank: int = 4,
+        train_iterations: int = 10,
+        seed: int = 0,
+    ) -> None:
+        self._nlist = nlist
+        self._nprobe = nprobe
+        self._rerank = rerank
+        self._train_iterations = train_iterations
+        self._seed = seed
+
+        self._embeddings: Optional[np.ndarray] = None
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: list = []
+        self._codes: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+
+    def _train(self, embeddings: np.ndarray, nlist: int) -> np.ndarray:
+        rng = np.random.default_rng(self._seed)
+        sample_size = min(embeddings.shape[0], nlist * 64)
+        sample = np.asarray(
+            embeddings[rng.choice(embeddings.shape[0], sample_size, replace=False)],
+            dtype=np.float32,
+        )
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        # Spherical k-means: assign by dot product, re-normalize centroids
+        for _ in range(self._train_iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for cell in range(nlist):
+                members = sample[assignment == cell]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    centroids[cell] = centroid / (np.linalg.norm(centroid) or 1.0)
+
+        return centroids
+
+    def build(self, embeddings: np.ndarray) -> None:
+        self._embeddings = embeddings
+        count = embeddings.shape[0]
+        if count == 0:
+            self._centroids = np.empty((0, embeddings.shape[1]), dtype=np.float32)
+            self._lists = []
+            return
+
+        nlist = max(1, min(self._nlist, count))
+        self._centroids = self._train(embeddings, nlist)
+
+        # Assign in blocks to keep peak memory bounded on large corpora
+        assignment = np.empty(count, dtype=np.int64)
+        for start in range(0, count, 65536):
+            block = np.asarray(embeddings[start:start + 65536], dtype=np.float32)
+            assignment[start:start + 65536] = np.argmax(block @ self._centroids.T, axis=1)
+
+        order = np.argsort(assignment, kind="stable")
+        bounds = np.searchsorted(assignment[order], np.arange(nlist + 1))
+        self._lists = [order[bounds[i]:bounds[i + 1]] for i in range(nlist)]
+
+        self._codes, self._scales = quantize_rows(embeddings)
+
+    def memory_bytes(self) -> int:
+        if self._codes is None:
+            return 0
+        lists = sum(rows.nbytes for rows in self._lists)
+        return self._codes.nbytes + self._scales.nbytes + self._centroids.nbytes + lists
+
+    def query(self, query: np.ndarray, top_k: int) -> Hits:
+        if not self._lists:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        cells = top_k_desc(self._centroids @ query, self._nprobe)
+        candidates = np.concatenate([self._lists[cell] for cell in cells])
+        if candidates.size == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        approximate = (self._codes[candidates] @ query) * self._scales[candidates]
+        if self._rerank <= 0:
+            best = top_k_desc(approximate, top_k)
+            return candidates[best], approximate[best]
+
+        shortlist = candidates[top_k_desc(approximate, top_k * self._rerank)]
+
+        exact = np.asarray(self._embeddings[shortlist], dtype=np.float32) @ query
+        best = top_k_desc(exact, top_k)
+        return shortlist[best], exact[best]
+
+
+def create_backend(config: RetrievalConfig, collection: Any = None) -> RetrievalBackend:
+    """
+    Build the retrieval backend named in config.
+    """
+    if config.backend == ExactBackend.name:
+        return ExactBackend(config.storage, config.rerank)
+    if config.backend == ChromaBackend.name:
+        if collection is None:
+            raise ValueError("The 'chroma' retrieval backend needs a collection.")
+        return ChromaBackend(collection)
+    if config.backend == HNSWBackend.name:
+        return HNSWBackend(config.hnsw_m, config.hnsw_ef_construction, config.hnsw_ef_search)
+    if config.backend == IVFBackend.name:
+        return IVFBackend(config.ivf_nlist, config.ivf_nprobe, config.rerank)
+
+    raise ValueError(f"Unknown retrieval backend: {config.backend}")
@@ -2,19 +2,240 @@
 Vector Search Tool (Chroma-backed, deterministic)
 
 Responsibilities:
-- Load static articles
-- Store embeddings in Chroma
+- Load articles (the knowledge-base store, or the static list)
+- Store embeddings in Chroma (only when Chroma serves queries)
 - Perform deterministic cosine similarity filtering
+- Return the source and offsets of ingested document chunks
+- Reuse query embeddings via a bounded cache
+- Load article embeddings from a persistent, memory-mapped index
+- Delegate top-k retrieval to a configurable backend
+- Micro-batch concurrent queries into one encode + one scoring pass
+- Hybrid search: fuse BM25 and vector rankings, and answer confident
+  exact-term matches from BM25 alone without running the encoder
+- Time encode and scoring separately
+- Swap in new article index versions without blocking searches
 """
 
-from typing import Dict, List
+from concurrent.futures import Future
+from contextlib import contextmanager
+import copy
+from dataclasses import dataclass, field
+import itertools
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 import numpy as np
 
-import chromadb
-from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer
-
+from config.settings import (
+    SearchConfig,
+    load_article_index_config,
+    load_embedding_batch_config,
+    load_retrieval_config,
+    load_search_config,
+)
 from data.vector_articles import ARTICLES
+from tools.article_index import ArticleIndex, load_or_build, remove_matrix
+from tools.embedding_cache import EmbeddingCache
+from tools.embedding_model import load_embedding_model, model_key
+from tools.lexical import (
+    BM25Index,
+    LexicalHits,
+    is_confident,
+    reciprocal_rank_fusion,
+    weighted_fusion,
+)
+from tools.metrics import add_span, tool_span
+from tools.retrieval import ChromaBackend, Hits, RetrievalBackend, create_backend
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+MIN_SIMILARITY = 0.35  # tuned to your tests
+CITATION_KEYS = ("source", "page", "start", "end")
+
+
+def citation(hit: Dict[str, Any]) -> str:
+    """
+    Human-readable location of an ingested document chunk.
+    """
+    where = hit["source"]
+    if hit.get("page") is not None:
+        where += f", p. {hit['page']}"
+    if hit.get("start") is not None:
+        where += f" (chars {hit['start']}-{hit['end']})"
+    return where
+
+
+@dataclass
+class _PendingQuery:
+    query: str
+    top_k: int
+    embedding: Optional[np.ndarray]
+    future: Future = field(default_factory=Future)
+    # Index version the caller pinned; scored against exactly that one
+    version: Any = None
+    # (span name, seconds) of the batch this query rode in
+    spans: List[Tuple[str, float]] = field(default_factory=list)
+
+
+class EmbeddingBatcher:
+    """
+    Collects concurrent searches for up to `window_ms` (or `max_batch`
+    queries) and serves them with one encode and one scoring call.
+
+    A lone caller is dispatched immediately, so batching only adds
+    latency when other searches are actually in flight. Queries pinned
+    to different index versions share the encode but are scored apart.
+    """
+
+    def __init__(
+        self,
+        encode: Callable[[List[str]], np.ndarray],
+        score: Callable[[np.ndarray, int, Any], List[Hits]],
+        window_ms: float = 3.0,
+        max_batch: int = 32,
+    ) -> None:
+        self._encode = encode
+        self._score = score
+        self._window = window_ms / 1000.0
+        self._max_batch = max(1, max_batch)
+
+        self._queue: "queue.SimpleQueue[Optional[_PendingQuery]]" = queue.SimpleQueue()
+        self._inflight = 0
+        self._inflight_lock = threading.Lock()
+
+        self._stats = {"batches": 0, "queries": 0, "encoded": 0, "max_batch_seen": 0}
+
+        self._thread = threading.Thread(
+            target=self._run, name="embedding-batcher", daemon=True
+        )
+        self._thread.start()
+
+    def submit(
+        self,
+        query: str,
+        top_k: int,
+        embedding: Optional[np.ndarray] = None,
+        version: Any = None,
+    ) -> Tuple[Hits, np.ndarray]:
+        """
+        Queue one search and block until its batch has been scored.
+
+        Returns:
+            The hits and the query embedding they were scored with.
+        """
+        with self._inflight_lock:
+            self._inflight += 1
+        try:
+            pending = _PendingQuery(query, top_k, embedding, version=version)
+            self._queue.put(pending)
+            hits = pending.future.result()
+            # The batch ran on the worker thread; credit its time to this request
+            for name, seconds in pending.spans:
+                add_span(name, seconds)
+            return hits, pending.embedding
+        finally:
+            with self._inflight_lock:
+                self._inflight -= 1
+
+    def _collect(self, first: _PendingQuery) -> List[_PendingQuery]:
+        batch = [first]
+        deadline = time.perf_counter() + self._window
+
+        while len(batch) < self._max_batch:
+            # Nobody else is searching: don't make this caller wait
+            if self._queue.empty() and self._inflight <= len(batch):
+                break
+
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            self._process(self._collect(first))
+
+    def _process(self, batch: List[_PendingQuery]) -> None:
+        try:
+            spans = []
+            missing = [pending for pending in batch if pending.embedding is None]
+            if missing:
+                started = time.perf_counter()
+                vectors = self._encode([pending.query for pending in missing])
+                for pending, vector in zip(missing, vectors):
+                    pending.embedding = vector
+                spans.append(("vector.encode", time.perf_counter() - started))
+
+            # Almost always one group; several only right after an index swap
+            groups: Dict[int, List[_PendingQuery]] = {}
+            for pending in batch:
+                groups.setdefault(id(pending.version), []).append(pending)
+
+            started = time.perf_counter()
+            scored = []
+            for group in groups.values():
+                queries = np.stack([pending.embedding for pending in group])
+                top_k = max(pending.top_k for pending in group)
+                scored.extend(zip(group, self._score(queries, top_k, group[0].version)))
+            spans.append(("vector.score", time.perf_counter() - started))
+
+            for pending, (indices, scores) in scored:
+                pending.spans = spans
+                pending.future.set_result(
+                    (indices[:pending.top_k], scores[:pending.top_k])
+                )
+
+            self._stats["batches"] += 1
+            self._stats["queries"] += len(batch)
+            self._stats["encoded"] += len(missing)
+            self._stats["max_batch_seen"] = max(self._stats["max_batch_seen"], len(batch))
+        except Exception as exc:
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(exc)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        stats["mean_batch"] = stats["queries"] / stats["batches"] if stats["batches"] else 0.0
+        return stats
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+
+@dataclass
+class _IndexVersion:
+    """
+    One generation of the knowledge base: articles, embedding matrix and
+    top-k engine. Never changed once live; a search pins one version
+    from encode to formatting.
+    """
+
+    number: int
+    index: ArticleIndex
+    articles: List[Dict[str, str]]
+    backend: RetrievalBackend
+    collection: Any = None
+    # BM25 over title + content; None when SEARCH_MODE=vector
+    lexical: Optional[BM25Index] = None
+    readers: int = 0
+    retired: bool = False
 
 
 class VectorSearchTool:
@@ -23,77 +244,452 @@ class VectorSearchTool:
     with explicit cosine similarity filtering.
     """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        query_cache: Optional[EmbeddingCache] = None,
+        backend: Optional[RetrievalBackend] = None,
+        model: Any = None,
+        model_name: str = MODEL_NAME,
+        articles: Optional[List[Dict[str, str]]] = None,
+        index_dir: Optional[str] = None,
+        search_config: Optional[SearchConfig] = None,
+    ) -> None:
+        """
+        Args:
+            backend: Top-k engine prototype; each index version indexes
+                its own copy. Defaults to VECTOR_BACKEND.
+            model: Encoder with the SentenceTransformer encode() API.
+                Defaults to MODEL_NAME on EMBEDDING_BACKEND (torch or
+                onnxruntime is imported only then).
+            model_name: Names the index and query cache for `model`.
+            articles: Knowledge base; defaults to ARTICLES.
+            index_dir: Article index directory; defaults to ARTICLE_INDEX_DIR.
+            search_config: Vector-only or hybrid search; defaults to SEARCH_MODE.
+        """
+        if model is None:
+            # Heavy imports (torch / onnxruntime) are paid only when the tool is built
+            model = load_embedding_model(model_name)
+            model_name = model_key(model_name)
+
         # Embedding model
-        self._model = SentenceTransformer("all-MiniLM-L6-v2")
+        self._model = model
+        self._model_name = model_name
+        self._index_dir = index_dir or load_article_index_config().directory
 
-        # Chroma client (in-memory, non-persistent)
-        self._client = chromadb.Client(
-            Settings(
-                anonymized_telemetry=False,
-                is_persistent=False,
-            )
-        )
+        # Query text -> embedding; hits skip transformer inference
+        self._query_cache = query_cache or EmbeddingCache.from_config(model_name)
+
+        # Chroma keeps its own copy of every vector: only build it to serve queries
+        retrieval_config = load_retrieval_config()
+        self._chroma_client = None
+        self._use_chroma = backend is None and retrieval_config.backend == ChromaBackend.name
 
-        # Collection
-        self._collection = self._client.get_or_create_collection(
-            name="support_articles"
+        # Top-k engine (exact / chroma / hnsw / ivf), copied per version
+        self._backend_prototype = backend
+        if backend is None and not self._use_chroma:
+            self._backend_prototype = create_backend(retrieval_config)
+
+        # Hybrid search: BM25 next to the vectors, fast path for exact terms
+        self._search_config = search_config or load_search_config()
+        self._search_stats = {"queries": 0, "fast_path": 0}
+        self._search_stats_lock = threading.Lock()
+
+        # Live index version; swaps never wait for the searches using it
+        self._version_lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._numbers = itertools.count()
+        self._draining: List[_IndexVersion] = []
+
+        # Article embeddings (read-only memory map; only changed articles are encoded)
+        self._version = self._build_version(
+            ARTICLES if articles is None else articles, prune=True
         )
 
-        # Load once
-        self._load_documents()
+        # Concurrent searches share encode + scoring passes
+        self._batcher: Optional[EmbeddingBatcher] = None
+        batch_config = load_embedding_batch_config()
+        if batch_config.enabled:
+            self._batcher = EmbeddingBatcher(
+                self._encode_batch,
+                self._score_batch,
+                window_ms=batch_config.window_ms,
+                max_batch=batch_config.max_batch,
+            )
+
+    def _create_collection(self, name: str) -> Any:
+        if self._chroma_client is None:
+            import chromadb
+            from chromadb.config import Settings
 
-        # Cache embeddings for deterministic scoring
-        self._embeddings = self._embed_documents()
+            # Chroma client (in-memory, non-persistent)
+            self._chroma_client = chromadb.Client(
+                Settings(
+                    anonymized_telemetry=False,
+                    is_persistent=False,
+                )
+            )
+        return self._chroma_client.get_or_create_collection(
+            name=name,
+            metadata={"hnsw:space": "cosine"},
+        )
 
-    def _load_documents(self) -> None:
-        if self._collection.count() > 0:
+    @staticmethod
+    def _load_documents(
+        collection: Any,
+        articles: List[Dict[str, str]],
+        embeddings: np.ndarray,
+    ) -> None:
+        if not articles or collection.count() > 0:
             return
 
-        texts = [doc["content"] for doc in ARTICLES]
+        texts = [doc["content"] for doc in articles]
         ids = [f"doc_{i}" for i in range(len(texts))]
 
-        embeddings = self._model.encode(
-            texts, normalize_embeddings=True
-        ).tolist()
-
-        self._collection.add(
+        # Reuse the index rows instead of encoding the articles again
+        collection.add(
             documents=texts,
-            embeddings=embeddings,
+            embeddings=embeddings.tolist(),
             ids=ids,
         )
 
-    def _embed_documents(self) -> np.ndarray:
-        contents = [doc["content"] for doc in ARTICLES]
-        return self._model.encode(
-            contents, normalize_embeddings=True
+    # -------------------------
+    # Index versions
+    # -------------------------
+
+    def _build_version(self, articles: List[Dict[str, str]], prune: bool) -> _IndexVersion:
+        articles = list(articles)
+        number = next(self._numbers)
+        index = load_or_build(
+            self._model, self._model_name, articles, self._index_dir, prune=prune
         )
 
+        collection = None
+        if self._use_chroma:
+            collection = self._create_collection(f"support_articles-{number}")
+            self._load_documents(collection, articles, index.embeddings)
+            backend: RetrievalBackend = ChromaBackend(collection)
+        else:
+            # build() replaces the engine's state, so a shallow copy is enough
+            backend = copy.copy(self._backend_prototype)
+        backend.build(index.embeddings)
+
+        lexical = None
+        if self._search_config.mode == "hybrid":
+            lexical = BM25Index()
+            lexical.build(
+                f"{article.get('title', '')} {article['content']}" for article in articles
+            )
+
+        return _IndexVersion(number, index, articles, backend, collection, lexical)
+
+    def replace_articles(self, articles: List[Dict[str, str]]) -> str:
+        """
+        Index a new article list and swap it in atomically.
+
+        Only new or changed articles are encoded. Searches already
+        running finish on the version they started with, which is
+        released once the last of them returns.
+
+        Returns:
+            The live index id.
+        """
+        with self._build_lock:
+            version = self._build_version(articles, prune=False)
+            if version.index.index_id == self.index_id:
+                # Same content in the same order: keep the live version
+                self._dispose(version)
+                return self.index_id
+
+            with self._version_lock:
+                previous, self._version = self._version, version
+                previous.retired = True
+                drained = previous.readers == 0
+                if not drained:
+                    self._draining.append(previous)
+
+            if drained:
+                self._dispose(previous)
+
+            logger.info(
+                "Article index %s live (%d articles, %d embedded)",
+                version.index.index_id, len(version.articles), version.index.embedded,
+            )
+            return version.index.index_id
+
+    @contextmanager
+    def _pinned(self) -> Iterator[_IndexVersion]:
+        """
+        Hold the live version for the duration of one search.
+        """
+        with self._version_lock:
+            version = self._version
+            version.readers += 1
+        try:
+            yield version
+        finally:
+            with self._version_lock:
+                version.readers -= 1
+                drained = version.retired and version.readers == 0
+                if drained:
+                    self._draining.remove(version)
+            if drained:
+                self._dispose(version)
+
+    def _dispose(self, version: _IndexVersion) -> None:
+        """
+        Drop a version nobody reads any more (its Chroma collection and
+        its matrix file, unless the live index still uses it).
+        """
+        if version.collection is not None:
+            self._chroma_client.delete_collection(version.collection.name)
+        remove_matrix(self._index_dir, self._model_name, version.index.index_id)
+
+    def index_stats(self) -> Dict[str, Any]:
+        """
+        Live index version and any older versions still being read.
+        """
+        with self._version_lock:
+            version = self._version
+            draining = [
+                {"version": old.number, "index_id": old.index.index_id, "readers": old.readers}
+                for old in self._draining
+            ]
+        return {
+            "version": version.number,
+            "index_id": version.index.index_id,
+            "articles": len(version.articles),
+            "reused": version.index.reused,
+            "embedded": version.index.embedded,
+            "vector_bytes": version.backend.memory_bytes(),
+            "draining": draining,
+        }
+
+    # -------------------------
+    # Search
+    # -------------------------
+
+    def _encode_batch(self, queries: List[str]) -> np.ndarray:
+        with tool_span("vector", "encode"):
+            vectors = self._model.encode(queries, normalize_embeddings=True)
+        return np.stack(
+            [self._query_cache.put(query, vector) for query, vector in zip(queries, vectors)]
+        )
+
+    def _score_batch(self, queries: np.ndarray, top_k: int, version: _IndexVersion) -> List[Hits]:
+        with tool_span("vector", "score"):
+            return version.backend.query_batch(queries, top_k)
+
+    @property
+    def index_id(self) -> str:
+        """
+        Content hash of the live article index.
+        """
+        return self._version.index.index_id
+
+    def data_version(self) -> str:
+        """
+        Answers only change when the article index does.
+        """
+        return self._version.index.index_id
+
     def search(self, query: str, top_k: int = 3) -> Dict[str, List[Dict]]:
         """
         Perform semantic search with deterministic relevance cutoff.
+
+        In hybrid mode a confident BM25 match is returned without
+        encoding the query (score = query coverage); otherwise the BM25
+        and vector rankings are fused (score = fused score).
         """
-        query_embedding = self._model.encode(
-            [query], normalize_embeddings=True
-        )[0]
+        with self._pinned() as version:
+            lexical = self._lexical(version, query, top_k)
+            fast = self._fast_path(version, lexical)
+            if fast is not None:
+                return fast
 
-        # Cosine similarity (deterministic)
-        scores = np.dot(self._embeddings, query_embedding)
+            query_embedding = self._query_cache.get(query)
+            if self._batcher is not None:
+                (indices, scores), query_embedding = self._batcher.submit(
+                    query, top_k, query_embedding, version
+                )
+            else:
+                if query_embedding is None:
+                    query_embedding = self._encode_batch([query])[0]
+                with tool_span("vector", "score"):
+                    indices, scores = version.backend.query(query_embedding, top_k)
 
-        ranked_indices = np.argsort(scores)[::-1]
+            if lexical is None:
+                return self._format_hits(version, indices, scores)
+            return self._fuse(version, query, query_embedding, (indices, scores), lexical, top_k)
 
-        results = []
-        MIN_SIMILARITY = 0.35  # tuned to your tests
+    def search_many(self, queries: List[str], top_k: int = 3) -> List[Dict[str, List[Dict]]]:
+        """
+        Search several queries with one encode and one scoring call.
+
+        Results are returned in input order.
+        """
+        if not queries:
+            return []
+
+        with self._pinned() as version:
+            lexical = [self._lexical(version, query, top_k) for query in queries]
+            results: List[Optional[Dict[str, List[Dict]]]] = [
+                self._fast_path(version, hits) for hits in lexical
+            ]
+            pending = [i for i, result in enumerate(results) if result is None]
+            if not pending:
+                return results
+
+            embeddings = [self._query_cache.get(queries[i]) for i in pending]
+            missing = [j for j, embedding in enumerate(embeddings) if embedding is None]
+            if missing:
+                encoded = self._encode_batch([queries[pending[j]] for j in missing])
+                for j, embedding in zip(missing, encoded):
+                    embeddings[j] = embedding
+
+            hits = self._score_batch(np.stack(embeddings), top_k, version)
+            for i, embedding, vector_hits in zip(pending, embeddings, hits):
+                if lexical[i] is None:
+                    results[i] = self._format_hits(version, *vector_hits)
+                else:
+                    results[i] = self._fuse(
+                        version, queries[i], embedding, vector_hits, lexical[i], top_k
+                    )
+            return results
 
-        for idx in ranked_indices[:top_k]:
-            if scores[idx] < MIN_SIMILARITY:
-                continue
+    # -------------------------
+    # Hybrid (BM25 + vector)
+    # -------------------------
 
-            results.append(
-                {
-                    "content": ARTICLES[idx]["content"],
-                    "score": float(scores[idx]),
-                }
+    def _lexical(self, version: _IndexVersion, query: str, top_k: int) -> Optional[LexicalHits]:
+        if version.lexical is None:
+            return None
+        with tool_span("vector", "lexical"):
+            # The runner-up decides whether the best hit stands out
+            return version.lexical.search(query, max(top_k, 2))
+
+    def _fast_path(
+        self,
+        version: _IndexVersion,
+        lexical: Optional[LexicalHits],
+    ) -> Optional[Dict[str, List[Dict]]]:
+        """
+        Documents for a confident exact-term match, or None to encode.
+        """
+        config = self._search_config
+        confident = (
+            lexical is not None
+            and config.fast_path
+            and is_confident(lexical, config.fast_path_coverage, config.fast_path_margin)
+        )
+        with self._search_stats_lock:
+            self._search_stats["queries"] += 1
+            self._search_stats["fast_path"] += int(confident)
+        if not confident:
+            return None
+
+        keep = lexical.coverage >= config.fast_path_coverage
+        return {
+            "documents": [
+                self._hit(version.articles[row], score)
+                for row, score in zip(lexical.indices[keep], lexical.coverage[keep])
+            ]
+        }
+
+    def _fuse(
+        self,
+        version: _IndexVersion,
+        query: str,
+        query_embedding: np.ndarray,
+        vector_hits: Hits,
+        lexical: LexicalHits,
+        top_k: int,
+    ) -> Dict[str, List[Dict]]:
+        """
+        Vector hits above MIN_SIMILARITY and BM25 hits covering at least
+        LEXICAL_MIN_COVERAGE of the query, merged into one ranking.
+        """
+        config = self._search_config
+        indices, scores = vector_hits
+        semantic_rows = indices[scores >= MIN_SIMILARITY]
+        lexical_rows = lexical.indices[lexical.coverage >= config.min_coverage]
+
+        if config.fusion == "weighted":
+            rows = np.unique(np.concatenate([semantic_rows, lexical_rows]))
+            rows, fused = weighted_fusion(
+                rows,
+                version.lexical.coverage(query, rows),
+                np.asarray(version.index.embeddings[rows] @ query_embedding, dtype=np.float32),
+                config.lexical_weight,
             )
+        else:
+            rows, fused = reciprocal_rank_fusion([semantic_rows, lexical_rows], config.rrf_k)
+
+        return {
+            "documents": [
+                self._hit(version.articles[row], score)
+                for row, score in zip(rows[:top_k], fused[:top_k])
+            ]
+        }
+
+    @staticmethod
+    def _hit(article: Dict[str, Any], score: float) -> Dict[str, Any]:
+        hit = {
+            "content": article["content"],
+            "score": float(score),
+        }
+        # Ingested document chunks say where they came from
+        for key in CITATION_KEYS:
+            if key in article:
+                hit[key] = article[key]
+        return hit
+
+    @classmethod
+    def _format_hits(
+        cls,
+        version: _IndexVersion,
+        indices: np.ndarray,
+        scores: np.ndarray,
+    ) -> Dict[str, List[Dict]]:
+        results = []
+        for idx, score in zip(indices, scores):
+            # Hits are sorted, so everything after this is below the cutoff too
+            if score < MIN_SIMILARITY:
+                break
+            results.append(cls._hit(version.articles[idx], score))
 
         return {"documents": results}
+
+    def search_stats(self) -> Dict[str, Any]:
+        """
+        Search mode and how many queries the BM25 fast path answered.
+        """
+        with self._search_stats_lock:
+            stats = dict(self._search_stats)
+        stats["mode"] = self._search_config.mode
+        stats["fusion"] = self._search_config.fusion
+        stats["fast_path_share"] = (
+            stats["fast_path"] / stats["queries"] if stats["queries"] else 0.0
+        )
+        return stats
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Query-embedding cache counters (hits, misses, evictions, hit rate).
+        """
+        return self._query_cache.stats()
+
+    def batch_stats(self) -> Dict[str, Any]:
+        """
+        Micro-batching counters (batches, queries, mean batch size).
+        """
+        if self._batcher is None:
+            return {"enabled": False}
+        return {"enabled": True, **self._batcher.stats()}
+
+    def close(self) -> None:
+        """
+        Stop the batcher and persist the query-embedding cache.
+        """
+        if self._batcher is not None:
+            self._batcher.close()
+        self._query_cache.save()
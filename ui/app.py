@@ -5,14 +5,43 @@ Phase 5 responsibilities:
 - Chat interface
 - Call FastAPI backend
 - Display responses
-- Simulated streaming output
+- Render server-sent answer chunks as they arrive
 """
 
-import time
+import json
+from typing import Iterator, Tuple
+import uuid
+
 import requests
 import streamlit as st
 
-API_URL = "http://127.0.0.1:8000/chat"
+API_URL = "http://127.0.0.1:8000/chat/stream"
+
+
+@st.cache_resource
+def get_session() -> requests.Session:
+    """
+    Keep-alive HTTP session reused across Streamlit reruns.
+    """
+    return requests.Session()
+
+
+def iter_events(response: requests.Response) -> Iterator[Tuple[str, dict]]:
+    """
+    Parse a text/event-stream response into (event, data) pairs.
+    """
+    event, data = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if line is None:
+            continue
+        if line == "":
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data.append(line[len("data:"):].strip())
 
 # -------------------------
 # Page setup
@@ -32,6 +61,10 @@ st.write(
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
+# Identifies this browser session's history on the backend
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+
 # -------------------------
 # Chat display
 # -------------------------
@@ -55,30 +88,39 @@ if user_input:
     with st.chat_message("user"):
         st.markdown(user_input)
 
-    # Call backend
-    try:
-        response = requests.post(
-            API_URL,
-            json={"message": user_input},
-            timeout=60,
-        )
-        response.raise_for_status()
-        answer = response.json()["answer"]
-
-    except requests.exceptions.Timeout:
-        answer = "Error: The request timed out. Please try again."
-    except Exception as e:
-        answer = f"Error: {str(e)}"
-
-    # Simulated streaming output
+    # Call backend and render chunks as they arrive
     with st.chat_message("assistant"):
         placeholder = st.empty()
-        streamed_text = ""
-
-        for token in answer.split(" "):
-            streamed_text += token + " "
-            placeholder.markdown(streamed_text)
-            time.sleep(0.03)
+        answer = ""
+
+        try:
+            with get_session().post(
+                API_URL,
+                json={
+                    "message": user_input,
+                    "session_id": st.session_state.session_id,
+                },
+                stream=True,
+                timeout=(5, 60),
+            ) as response:
+                response.raise_for_status()
+                response.encoding = "utf-8"
+
+                for event, data in iter_events(response):
+                    if event == "token":
+                        answer += data["text"]
+                        placeholder.markdown(answer)
+                    elif event == "done":
+                        answer = data["answer"] or answer
+                    elif event == "error":
+                        answer = f"Error: {data['detail']}"
+
+        except requests.exceptions.Timeout:
+            answer = "Error: The request timed out. Please try again."
+        except Exception as e:
+            answer = f"Error: {str(e)}"
+
+        placeholder.markdown(answer)
 
     st.session_state.messages.append(
         {"role": "assistant", "content": answer}